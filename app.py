@@ -1,16 +1,69 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 # from supabase import create_client
+import logging
 import os
+import time
 from dotenv import load_dotenv
 from flask_cors import CORS, cross_origin
-from curate_be.arxiv_utils.pull_latest import fetch_latest_papers
-from curate_be.arxiv_utils.pull_author_info import fetch_and_compare_selected_papers, fetch_papers_by_author, hybrid_search_author_comparison
+from curate_be.arxiv_utils.categories import is_arxiv_category
+from curate_be.arxiv_utils.feed_cache import get_feed
+from curate_be.arxiv_utils.pull_author_info import fetch_and_compare_selected_papers, fetch_papers_by_author, hybrid_search_author_comparison, iter_hybrid_search_author_comparison
+from curate_be.arxiv_utils.tracing import get_metrics, increment, record_duration
+from curate_be.jobs import get_job, submit_job
+from curate_be.profiling import SamplingProfiler, load_profile, profiling_requested, save_profile
 
 load_dotenv()
 
+# DEBUG also logs the search pipeline's payload dumps (scores, vector results, prompts)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__, static_folder='curate_fe/build', static_url_path='')
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    # Timed until the response is closed, so streamed responses count their whole stream. Unhandled
+    # exceptions reach this hook as 500 responses, so they are counted as errors here
+    if request.path.startswith('/api/') and 'request_started' in g:
+        started, name, error = g.pop('request_started'), f"http.{request.endpoint}", response.status_code >= 500
+        response.call_on_close(lambda: record_duration(name, time.perf_counter() - started, error=error))
+        increment(f"{name}.requests")
+    return response
+
+def requested_profile_token():
+    return request.headers.get('X-Profile-Token') or request.args.get('profileToken')
+
+def profiled_request_details():
+    # Stored with the profile, minus the token
+    return {'endpoint': request.endpoint, 'path': request.path, 'args': {key: value for key, value in request.args.items() if key != 'profileToken'}}
+
+@app.before_request
+def start_profiler():
+    # Opt-in per request; without a token this is one header lookup
+    token = requested_profile_token()
+    if token is not None and request.path.startswith('/api/') and profiling_requested(token):
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def attach_profile(response):
+    if 'profiler' in g:
+        profiler = g.pop('profiler')
+        # Saved when the response is closed, which is after teardown has added any request error
+        g.profile_details = details = dict(profiled_request_details(), status=response.status_code)
+        response.headers['X-Profile-Id'] = profiler.profile_id
+        response.call_on_close(lambda: save_profile(profiler, **details))
+    return response
+
+@app.teardown_request
+def note_profile_error(error=None):
+    if error is not None and 'profile_details' in g:
+        g.profile_details['error'] = str(error)
+
 # url = os.environ.get("SUPABASE_URL")
 # key = os.environ.get("SUPABASE_KEY")
 
@@ -49,18 +102,32 @@ def add_researcher():
     
     return jsonify(data), 200
 
+def author_name_param(params):
+    # Author profiles are keyed by name, so a missing or blank name is rejected before any lookup
+    author_name = params.get('authorName')
+    return author_name if isinstance(author_name, str) and author_name.strip() else None
+
+def category_param(params, name='category'):
+    # Categories name data files and start background syncs, so only arXiv's own are accepted
+    category = params.get(name)
+    return category if is_arxiv_category(category) else None
+
 @app.route('/api/arxiv', methods=['GET'])
 def get_arxiv_papers():
-    subject_area = request.args.get('subjectArea')
-    papers = fetch_latest_papers(subject_area, max_results=300)
+    subject_area = category_param(request.args, 'subjectArea')
+    if subject_area is None:
+        return jsonify({'error': 'subjectArea must be an arXiv category, e.g. cs.CL'}), 400
+    papers = get_feed(subject_area, max_results=300)
     return jsonify(papers), 200
 
 @app.route('/api/author_papers', methods=['GET'])
 def get_author_papers():
-    author_name = request.args.get('authorName')
-    print(f"Received request for author: {author_name}")  # Debug log
+    author_name = author_name_param(request.args)
+    if author_name is None:
+        return jsonify({'error': 'authorName is required'}), 400
+    logger.debug("Received request for author: %s", author_name)
     papers = fetch_papers_by_author(author_name)
-    print(f"Found {len(papers)} papers")  # Debug log
+    logger.debug("Found %d papers", len(papers))
     return jsonify(papers), 200
 
 # @app.route('/api/similar_papers', methods=['GET'])
@@ -73,14 +140,77 @@ def get_author_papers():
 #     return jsonify(papers), 200
 @app.route('/api/similar_papers', methods=['GET'])
 def get_similar_papers():
-    author_name = request.args.get('authorName')
-    category = request.args.get('category')
-    selected_paper_ids = request.args.get('selectedPaperIds').split(',')
+    author_name = author_name_param(request.args)
+    if author_name is None:
+        return jsonify({'error': 'authorName is required'}), 400
+    category = category_param(request.args)
+    if category is None:
+        return jsonify({'error': 'category must be an arXiv category, e.g. cs.CL'}), 400
+    selected_paper_ids = request.args.get('selectedPaperIds', '').split(',')
 
     result = hybrid_search_author_comparison(selected_paper_ids, author_name, category)
 
     return jsonify(result), 200
 
+@app.route('/api/similar_papers/stream', methods=['GET'])
+def stream_similar_papers():
+    # Same parameters as /api/similar_papers; results arrive as newline-delimited JSON events
+    author_name = author_name_param(request.args)
+    if author_name is None:
+        return jsonify({'error': 'authorName is required'}), 400
+    category = category_param(request.args)
+    if category is None:
+        return jsonify({'error': 'category must be an arXiv category, e.g. cs.CL'}), 400
+    selected_paper_ids = request.args.get('selectedPaperIds', '').split(',')
+
+    def generate():
+        for event in iter_hybrid_search_author_comparison(selected_paper_ids, author_name, category):
+            yield app.json.dumps(event) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/similar_papers/jobs', methods=['POST'])
+def create_similar_papers_job():
+    # Same parameters as /api/similar_papers, as a JSON body or query string
+    params = request.get_json(silent=True) or request.args
+    author_name = author_name_param(params)
+    if author_name is None:
+        return jsonify({'error': 'authorName is required'}), 400
+    category = category_param(params)
+    if category is None:
+        return jsonify({'error': 'category must be an arXiv category, e.g. cs.CL'}), 400
+    selected_paper_ids = params.get('selectedPaperIds') or ''
+    if isinstance(selected_paper_ids, str):
+        selected_paper_ids = selected_paper_ids.split(',')
+
+    job_id = submit_job(hybrid_search_author_comparison, selected_paper_ids, author_name, category)
+
+    return jsonify({'job_id': job_id, 'status_url': f'/api/similar_papers/jobs/{job_id}'}), 202
+
+@app.route('/api/similar_papers/jobs/<job_id>', methods=['GET'])
+def get_similar_papers_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    # Spans and counters for this worker process only
+    return jsonify(get_metrics()), 200
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    # Collapsed stacks for flamegraph.pl or speedscope; ?format=json includes the request details
+    if not profiling_requested(requested_profile_token()):
+        return jsonify({'error': 'Profiling token required'}), 403
+    profile = load_profile(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Unknown profile'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(profile), 200
+    return Response(profile['collapsed'] + '\n', mimetype='text/plain')
+
 def build_cors_preflight_response():
     response = jsonify()
     response.headers.add("Access-Control-Allow-Origin", "*")
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Tests run against a fresh data directory and the local vector backend, with no upstream
+# credentials or arXiv request spacing; set before any curate_be module reads them
+os.environ['CURATE_DATA_DIR'] = tempfile.mkdtemp(prefix="curate-test-")
+os.environ['VECTOR_BACKEND'] = 'local'
+os.environ['ARXIV_MIN_INTERVAL_SECONDS'] = '0'
+os.environ.setdefault('OPENAI_API_KEY', 'test')
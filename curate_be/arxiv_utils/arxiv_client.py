@@ -0,0 +1,164 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+import arxiv
+import feedparser
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from curate_be.arxiv_utils.rate_limit import arxiv_limiter
+from curate_be.arxiv_utils.tracing import increment, span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# The arXiv query API endpoint; point it at a local stub server for testing
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+# Retries per page for connection errors, timeouts, 429/5xx responses and unexpectedly empty pages
+ARXIV_NUM_RETRIES = int(os.getenv("ARXIV_NUM_RETRIES", "4"))
+# Base delay for exponential backoff between retries (with full jitter)
+ARXIV_BACKOFF_SECONDS = float(os.getenv("ARXIV_BACKOFF_SECONDS", "3"))
+ARXIV_TIMEOUT_SECONDS = float(os.getenv("ARXIV_TIMEOUT_SECONDS", "30"))
+# Keep-alive connections kept open to the API host
+ARXIV_POOL_SIZE = int(os.getenv("ARXIV_POOL_SIZE", "8"))
+# Pages fetched within this many seconds are served from memory; older ones are revalidated
+ARXIV_PAGE_CACHE_SECONDS = float(os.getenv("ARXIV_PAGE_CACHE_SECONDS", "900"))
+ARXIV_PAGE_CACHE_ENTRIES = int(os.getenv("ARXIV_PAGE_CACHE_ENTRIES", "512"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class ArxivClient(arxiv.Client):
+    """
+    `arxiv.Client` with one pooled keep-alive session, the process-wide arXiv rate limiter, jittered
+    exponential backoff, and a page-level response cache.
+
+    Only `_parse_feed` (fetching one page of results) is overridden, so paging and result parsing
+    stay the library's.
+    """
+
+    def __init__(self, api_url=ARXIV_API_URL, page_size=100, num_retries=ARXIV_NUM_RETRIES,
+                 backoff_seconds=ARXIV_BACKOFF_SECONDS, cache_seconds=ARXIV_PAGE_CACHE_SECONDS):
+        # Request spacing is the shared limiter's job, not the per-client delay
+        super().__init__(page_size=page_size, delay_seconds=0, num_retries=num_retries)
+        self.query_url_format = api_url + "?{}"
+        self.backoff_seconds = backoff_seconds
+        self.cache_seconds = cache_seconds
+        adapter = HTTPAdapter(pool_connections=ARXIV_POOL_SIZE, pool_maxsize=ARXIV_POOL_SIZE)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"user-agent": "CurateIQ (arxiv.py/2.1.0)"})
+        # url -> (fetched_at, validators, feed)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, url):
+        with self._cache_lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+            return entry
+
+    def _store(self, url, validators, feed):
+        with self._cache_lock:
+            self._cache[url] = (time.monotonic(), validators, feed)
+            self._cache.move_to_end(url)
+            while len(self._cache) > ARXIV_PAGE_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def _backoff(self, try_index, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, self.backoff_seconds * 2 ** try_index)
+        time.sleep(delay)
+
+    def _parse_feed(self, url, first_page=True, _try_index=0):
+        """
+        Fetch and parse one page of results, serving it from the page cache when possible.
+
+        A fresh cached page costs no request. A stale one is revalidated with its ETag or
+        Last-Modified validators, so an unchanged page answers 304 without a body.
+        """
+        cached = self._cached(url)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_seconds:
+            increment('arxiv.page_cache_hits')
+            return cached[2]
+
+        for try_index in range(_try_index, self.num_retries + 1):
+            headers = {}
+            if cached is not None:
+                if cached[1].get("etag"):
+                    headers["If-None-Match"] = cached[1]["etag"]
+                if cached[1].get("last_modified"):
+                    headers["If-Modified-Since"] = cached[1]["last_modified"]
+
+            increment('arxiv.rate_limit_wait_seconds', arxiv_limiter.acquire())
+            increment('arxiv.requests')
+            try:
+                with span('arxiv.request'):
+                    response = self._session.get(url, headers=headers, timeout=ARXIV_TIMEOUT_SECONDS)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if try_index == self.num_retries:
+                    raise
+                logger.warning("arXiv request failed (try %d): %s", try_index, e)
+                increment('arxiv.retries')
+                self._backoff(try_index)
+                continue
+
+            if response.status_code == 304 and cached is not None:
+                increment('arxiv.not_modified')
+                self._store(url, cached[1], cached[2])
+                return cached[2]
+            if response.status_code in RETRY_STATUSES and try_index < self.num_retries:
+                logger.warning("arXiv returned %d (try %d), retrying", response.status_code, try_index)
+                increment('arxiv.retries')
+                self._backoff(try_index, response)
+                continue
+            if response.status_code != requests.codes.OK:
+                raise arxiv.HTTPError(url, try_index, response.status_code)
+
+            feed = feedparser.parse(response.content)
+            if len(feed.entries) == 0 and not first_page:
+                if try_index == self.num_retries:
+                    raise arxiv.UnexpectedEmptyPageError(url, try_index, feed)
+                increment('arxiv.retries')
+                self._backoff(try_index)
+                continue
+
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+            self._store(url, validators, feed)
+            return feed
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_arxiv_client():
+    """
+    Get the process-wide arXiv client, creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ArxivClient()
+        return _client
+
+def search_results(search):
+    """
+    Iterate an `arxiv.Search`'s results through the shared client.
+
+    Args:
+    search (arxiv.Search): The search to run.
+
+    Returns:
+    generator: The `arxiv.Result`s.
+    """
+    return get_arxiv_client().results(search)
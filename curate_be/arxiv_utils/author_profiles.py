@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+import arxiv
+import numpy as np
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.arxiv_client import search_results
+from curate_be.arxiv_utils.paper_store import decode_paper, encode_paper, remember_papers
+from curate_be.arxiv_utils.pull_latest import get_embeddings_batch, paper_from_result
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How long a stored profile is served as-is before checking arXiv for newer papers
+AUTHOR_PROFILE_TTL_HOURS = float(os.getenv("AUTHOR_PROFILE_TTL_HOURS", "24"))
+AUTHOR_MAX_RESULTS = 300
+
+# One lock per author so concurrent visits refresh a profile only once
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _slug(author_name):
+    normalized = " ".join(author_name.lower().split())
+    readable = re.sub(r'[^a-z0-9]+', '_', normalized).strip('_')[:60]
+    return f"{readable}-{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:8]}"
+
+def _profile_path(author_name):
+    return data_path("authors", f"{_slug(author_name)}.json")
+
+def _embeddings_path(author_name):
+    return data_path("authors", f"{_slug(author_name)}.npz")
+
+def _base_id(paper_id):
+    return re.sub(r'v\d+$', '', paper_id)
+
+def _author_lock(author_name):
+    with _locks_guard:
+        return _locks.setdefault(_slug(author_name), threading.Lock())
+
+def query_author_papers(author_name, updated_after=None, max_results=AUTHOR_MAX_RESULTS):
+    """
+    Query arXiv for an author's papers, most recently updated first.
+
+    Args:
+    author_name (str): The name of the author in the format "John Doe".
+    updated_after (datetime): If set, only fetch papers submitted or revised at or after this time.
+    max_results (int): The maximum number of papers to fetch.
+
+    Returns:
+    list: A list of dictionaries containing paper information.
+    """
+    query = f'au:"{author_name}"'
+    if updated_after is not None:
+        start = updated_after.astimezone(timezone.utc).strftime('%Y%m%d%H%M')
+        end = datetime.now(timezone.utc).strftime('%Y%m%d%H%M')
+        query += f' AND lastUpdatedDate:[{start} TO {end}]'
+    logger.debug("arXiv query: %s", query)
+    search = arxiv.Search(
+        query=query,
+        max_results=max_results,
+        sort_by=arxiv.SortCriterion.LastUpdatedDate
+    )
+    return [paper_from_result(result) for result in search_results(search)]
+
+def load_profile(author_name):
+    """
+    Load a stored author profile without touching arXiv.
+
+    Returns:
+    dict: The profile ('author_name', 'refreshed_at', 'papers', 'keywords'), or None.
+    """
+    profile = read_json(_profile_path(author_name))
+    if profile is None:
+        return None
+    profile['refreshed_at'] = datetime.fromisoformat(profile['refreshed_at'])
+    profile['papers'] = [decode_paper(paper) for paper in profile['papers']]
+    return profile
+
+def _save_profile(profile):
+    write_json(_profile_path(profile['author_name']), {
+        'author_name': profile['author_name'],
+        'refreshed_at': profile['refreshed_at'].isoformat(),
+        'papers': [encode_paper(paper) for paper in profile['papers']],
+        'keywords': profile['keywords']
+    })
+
+def get_author_papers(author_name):
+    """
+    Get an author's papers from their profile, refreshing it incrementally when it is stale.
+
+    A new profile costs one full arXiv query. After that, a stale profile only asks arXiv for
+    papers submitted or revised since the latest update stored, so new versions of older papers
+    are picked up too.
+
+    Args:
+    author_name (str): The name of the author in the format "John Doe".
+
+    Returns:
+    list: A list of dictionaries containing paper information, newest first.
+    """
+    with _author_lock(author_name):
+        profile = load_profile(author_name)
+        now = datetime.now(timezone.utc)
+        if profile is not None and (now - profile['refreshed_at']).total_seconds() < AUTHOR_PROFILE_TTL_HOURS * 3600:
+            return profile['papers']
+
+        if profile is None:
+            profile = {'author_name': author_name, 'papers': [], 'keywords': {}}
+            new_papers = query_author_papers(author_name)
+        else:
+            newest = max((paper['updated'] for paper in profile['papers']), default=None)
+            new_papers = query_author_papers(author_name, updated_after=newest)
+
+        # A paper comes back from arXiv under its latest version, which replaces any stored version
+        known_ids = {_base_id(paper['id']): paper['id'] for paper in profile['papers']}
+        fetched = {_base_id(paper['id']): paper for paper in new_papers}
+        added = [paper for base_id, paper in fetched.items() if known_ids.get(base_id) != paper['id']]
+        kept = [paper for paper in profile['papers'] if _base_id(paper['id']) not in fetched]
+        profile['papers'] = sorted(list(fetched.values()) + kept, key=lambda paper: paper['published'], reverse=True)
+        profile['refreshed_at'] = now
+        _save_profile(profile)
+        # Remember them so resolving the author's selected papers later needs no arXiv request
+        remember_papers(added)
+        logger.info("Refreshed profile for %s: %d new, %d total", author_name, len(added), len(profile['papers']))
+        return profile['papers']
+
+def _selection_key(paper_ids):
+    return ",".join(sorted(paper_ids))
+
+def get_profile_keywords(author_name, paper_ids):
+    """
+    Get the keywords previously derived for a selection of the author's papers.
+
+    Returns:
+    list: The keywords, or None if they have not been derived yet.
+    """
+    profile = read_json(_profile_path(author_name))
+    if profile is None:
+        return None
+    return profile['keywords'].get(_selection_key(paper_ids))
+
+def save_profile_keywords(author_name, paper_ids, keywords):
+    """
+    Store the keywords derived for a selection of the author's papers.
+    """
+    with _author_lock(author_name):
+        profile = load_profile(author_name)
+        if profile is None:
+            return
+        profile['keywords'][_selection_key(paper_ids)] = keywords
+        _save_profile(profile)
+
+def get_profile_embeddings(author_name, papers):
+    """
+    Get the title and abstract embeddings of some of an author's papers.
+
+    They are stored with the profile, so only papers never embedded for this author are sent to
+    the embedding API (or its cache).
+
+    Args:
+    author_name (str): The name of the author in the format "John Doe".
+    papers (list): Paper dictionaries with 'id', 'title' and 'summary'.
+
+    Returns:
+    tuple: (title vectors, abstract vectors), float32 arrays aligned with `papers`.
+    """
+    with _author_lock(author_name):
+        path = _embeddings_path(author_name)
+        try:
+            with np.load(path) as stored:
+                vectors = {id: (title, summary) for id, title, summary in zip(stored['ids'].tolist(), stored['title'], stored['summary'])}
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            vectors = {}
+
+        missing = list({paper['id']: paper for paper in papers if paper['id'] not in vectors}.values())
+        if missing:
+            embeddings = np.asarray(get_embeddings_batch([paper['title'] for paper in missing] + [paper['summary'] for paper in missing]), dtype=np.float32)
+            vectors.update((paper['id'], (embeddings[i], embeddings[len(missing) + i])) for i, paper in enumerate(missing))
+            ids = list(vectors)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npz')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, ids=np.asarray(ids), title=np.stack([vectors[id][0] for id in ids]),
+                             summary=np.stack([vectors[id][1] for id in ids]))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    if not papers:
+        return np.zeros((0, 0), dtype=np.float32), np.zeros((0, 0), dtype=np.float32)
+    return (np.stack([vectors[paper['id']][0] for paper in papers]),
+            np.stack([vectors[paper['id']][1] for paper in papers]))
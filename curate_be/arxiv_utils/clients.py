@@ -0,0 +1,35 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Keep-alive connections pooled for OpenAI requests, shared by every module and thread
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+
+_openai_client = None
+_lock = threading.Lock()
+
+def get_openai_client():
+    """
+    Get the process-wide OpenAI client, creating it on first use.
+
+    The client (and the `openai` package) is only loaded when a request first needs it, so
+    importing CurateIQ is fast and works without credentials. The vector index is created the
+    same way by `vector_index.get_index`.
+
+    Returns:
+    OpenAI: The shared client.
+    """
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            import httpx
+            from openai import DefaultHttpxClient, OpenAI
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=OPENAI_TIMEOUT_SECONDS,
+                http_client=DefaultHttpxClient(limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS))
+            )
+        return _openai_client
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.storage import data_path
+
+load_dotenv()
+
+# Roughly 6KB per cached ada-002 vector, so the default cap keeps the cache around 300MB
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+_conn = None
+_lock = threading.Lock()
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(data_path("embeddings.sqlite3"), check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+    return _conn
+
+def embedding_key(model, text):
+    """
+    Content address of an embedding: a hash of the model name and the exact input text.
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+def get_cached_embeddings(model, texts):
+    """
+    Look up cached embeddings for a list of texts.
+
+    Args:
+    model (str): The embedding model name.
+    texts (list): The input texts.
+
+    Returns:
+    dict: Maps each text that was cached to its embedding vector.
+    """
+    keys = {embedding_key(model, text): text for text in texts}
+    if not keys:
+        return {}
+
+    found = {}
+    with _lock:
+        conn = _connection()
+        key_list = list(keys)
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[keys[key]] = array('f', blob).tolist()
+        if found:
+            now = time.time()
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, embedding_key(model, text)) for text in found]
+            )
+            conn.commit()
+    return found
+
+def put_cached_embeddings(model, texts, vectors):
+    """
+    Store embeddings in the cache, evicting the least recently used entries past the size cap.
+
+    Args:
+    model (str): The embedding model name.
+    texts (list): The input texts.
+    vectors (list): The embedding vector for each text.
+    """
+    now = time.time()
+    rows = [(embedding_key(model, text), array('f', vector).tobytes(), now) for text, vector in zip(texts, vectors)]
+    with _lock:
+        conn = _connection()
+        conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > EMBEDDING_CACHE_MAX_ENTRIES:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (count - EMBEDDING_CACHE_MAX_ENTRIES,)
+            )
+        conn.commit()
@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.paper_store import decode_paper, encode_paper
+from curate_be.arxiv_utils.pull_latest import fetch_latest_papers
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+from curate_be.arxiv_utils.tracing import increment
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# arXiv announces new submissions at 20:00 US Eastern, Sunday through Thursday
+ANNOUNCEMENT_TZ = ZoneInfo("America/New_York")
+ANNOUNCEMENT_HOUR = 20
+ANNOUNCEMENT_WEEKDAYS = {6, 0, 1, 2, 3}
+
+# Time after an announcement before the new listings are reliably served by the API, and an upper
+# bound on how long any entry is treated as fresh (e.g. around holidays)
+FEED_CACHE_GRACE_MINUTES = float(os.getenv("FEED_CACHE_GRACE_MINUTES", "30"))
+FEED_CACHE_MAX_TTL_HOURS = float(os.getenv("FEED_CACHE_MAX_TTL_HOURS", "24"))
+
+# (category, max_results) -> {'fetched_at': datetime, 'fresh_until': datetime, 'papers': list}
+_entries = {}
+# (category, max_results) -> Future of the upstream fetch currently in flight
+_in_flight = {}
+_lock = threading.Lock()
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="feed-refresh")
+
+def next_announcement(after):
+    """
+    The first arXiv announcement time strictly after `after` (a timezone-aware datetime).
+    """
+    local = after.astimezone(ANNOUNCEMENT_TZ)
+    candidate = local.replace(hour=ANNOUNCEMENT_HOUR, minute=0, second=0, microsecond=0)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() not in ANNOUNCEMENT_WEEKDAYS:
+        candidate += timedelta(days=1)
+    # Rebuild from the wall-clock time so DST changes keep it at 20:00 local
+    candidate = datetime(candidate.year, candidate.month, candidate.day, ANNOUNCEMENT_HOUR, tzinfo=ANNOUNCEMENT_TZ)
+    return candidate.astimezone(timezone.utc)
+
+def _fresh_until(fetched_at):
+    return min(
+        next_announcement(fetched_at) + timedelta(minutes=FEED_CACHE_GRACE_MINUTES),
+        fetched_at + timedelta(hours=FEED_CACHE_MAX_TTL_HOURS)
+    )
+
+def _entry_path(category, max_results):
+    return data_path("feeds", f"{category}-{max_results}.json")
+
+def _load_entry(key):
+    with _lock:
+        entry = _entries.get(key)
+    if entry is not None:
+        return entry
+
+    stored = read_json(_entry_path(*key))
+    if stored is None:
+        return None
+    entry = {
+        'fetched_at': datetime.fromisoformat(stored['fetched_at']),
+        'fresh_until': datetime.fromisoformat(stored['fresh_until']),
+        'papers': [decode_paper(paper) for paper in stored['papers']]
+    }
+    with _lock:
+        _entries.setdefault(key, entry)
+        return _entries[key]
+
+def _fetch(key):
+    category, max_results = key
+    try:
+        papers = fetch_latest_papers(category, max_results=max_results)
+        fetched_at = datetime.now(timezone.utc)
+        entry = {'fetched_at': fetched_at, 'fresh_until': _fresh_until(fetched_at), 'papers': papers}
+        write_json(_entry_path(category, max_results), {
+            'fetched_at': fetched_at.isoformat(),
+            'fresh_until': entry['fresh_until'].isoformat(),
+            'papers': [encode_paper(paper) for paper in papers]
+        })
+        with _lock:
+            _entries[key] = entry
+        return entry
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+
+def _start_fetch(key, background):
+    """
+    Start an upstream fetch for `key` unless one is already running, and return its future.
+    """
+    with _lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _in_flight[key] = future
+
+    def run():
+        try:
+            future.set_result(_fetch(key))
+        except Exception as e:
+            if background:
+                # Nobody waits on a background refresh; the stale entry keeps being served
+                logger.exception("Background refresh of the %s feed failed", key[0])
+            future.set_exception(e)
+
+    if background:
+        _refresh_pool.submit(run)
+    else:
+        run()
+    return future, True
+
+def get_feed(category, max_results=300):
+    """
+    Get the latest papers for a category through the feed cache.
+
+    Entries stay fresh until shortly after arXiv's next announcement. A stale entry is served
+    immediately while it is refreshed in the background, and concurrent requests for the same
+    category share a single upstream fetch.
+
+    Args:
+    category (str): The arXiv category.
+    max_results (int): The maximum number of papers to fetch.
+
+    Returns:
+    list: A list of dictionaries containing paper information.
+    """
+    key = (category, max_results)
+    entry = _load_entry(key)
+    if entry is not None:
+        if datetime.now(timezone.utc) >= entry['fresh_until']:
+            increment('feed_cache.stale_hits')
+            _start_fetch(key, background=True)
+        else:
+            increment('feed_cache.hits')
+        return entry['papers']
+
+    # Nothing cached yet: wait for the (possibly shared) fetch
+    increment('feed_cache.misses')
+    future, _ = _start_fetch(key, background=False)
+    return future.result()['papers']
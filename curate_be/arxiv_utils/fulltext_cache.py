@@ -0,0 +1,302 @@
+import gzip
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import requests
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.storage import data_path
+from curate_be.arxiv_utils.tracing import increment
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Total size of the compressed full-text cache before least recently used papers are evicted
+FULLTEXT_CACHE_MAX_BYTES = int(os.getenv("FULLTEXT_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Concurrent PDF downloads, PDF parsing processes, and the deadline for each paper's download and
+# for its parse. Every web worker process gets its own parse processes, so keep that pool small
+FULLTEXT_DOWNLOAD_WORKERS = int(os.getenv("FULLTEXT_DOWNLOAD_WORKERS", "4"))
+FULLTEXT_PARSE_WORKERS = int(os.getenv("FULLTEXT_PARSE_WORKERS", str(min(2, os.cpu_count() or 1))))
+FULLTEXT_TIMEOUT_SECONDS = float(os.getenv("FULLTEXT_TIMEOUT_SECONDS", "60"))
+# Parse processes are replaced after this many PDFs, so memory pdfminer holds on to is returned
+FULLTEXT_PARSE_TASKS_PER_CHILD = int(os.getenv("FULLTEXT_PARSE_TASKS_PER_CHILD", "50"))
+
+_lock = threading.Lock()
+
+# Long-lived pools shared by every request, created on first use
+_download_pool = None
+_parse_pool = None
+# Parse workers report (task ID, PID) here as they start each parse, so a hung one can be killed
+_parse_started = None
+_pools_lock = threading.Lock()
+# Parses are only submitted when a worker is free, so a parse's deadline runs from when it starts
+# and any parse past its deadline is one that is actually running
+_parse_slots = threading.BoundedSemaphore(FULLTEXT_PARSE_WORKERS)
+# Parse futures currently holding a slot
+_slot_holders = set()
+_slots_lock = threading.Lock()
+_parse_task_ids = itertools.count()
+
+def _cache_dir():
+    return os.path.dirname(data_path("fulltext", "_"))
+
+def _text_path(paper_id):
+    # Old-style IDs such as "hep-th/9901001v1" contain a slash
+    return os.path.join(_cache_dir(), paper_id.replace('/', '_') + '.txt.gz')
+
+def get_cached_text(paper_id):
+    """
+    Read a paper's extracted full text from the cache.
+
+    Args:
+    paper_id (str): The versioned arXiv ID, e.g. "2306.04050v2".
+
+    Returns:
+    str: The text, or None if it is not cached.
+    """
+    path = _text_path(paper_id)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            text = f.read()
+    except (FileNotFoundError, OSError, EOFError):
+        return None
+    # Reads count as use for LRU eviction
+    os.utime(path)
+    return text
+
+def put_cached_text(paper_id, text):
+    """
+    Store a paper's extracted full text, then evict the least recently used texts past the size cap.
+    """
+    path = _text_path(paper_id)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    _evict()
+
+def _evict():
+    with _lock:
+        entries = []
+        for entry in os.scandir(_cache_dir()):
+            if entry.name.endswith('.txt.gz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= FULLTEXT_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+def download_pdf(pdf_url, timeout=FULLTEXT_TIMEOUT_SECONDS):
+    """
+    Download a PDF and return its bytes.
+    """
+    response = requests.get(pdf_url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+def parse_pdf(pdf_bytes):
+    """
+    Extract the text of a PDF the same way `arxiv2text.arxiv_to_text` does.
+
+    Runs in a worker process, so it must stay a picklable module-level function.
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resource_manager = PDFResourceManager()
+    text_stream = io.StringIO()
+    device = TextConverter(resource_manager, text_stream, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    for page in PDFPage.get_pages(io.BytesIO(pdf_bytes)):
+        interpreter.process_page(page)
+    text = text_stream.getvalue()
+    text_stream.close()
+    return text
+
+def _init_parse_worker(started):
+    global _parse_started
+    _parse_started = started
+
+def _run_parse(task_id, parse, pdf_bytes):
+    # Runs in a parse worker
+    _parse_started.put((task_id, os.getpid()))
+    return parse(pdf_bytes)
+
+def _download_pool_instance():
+    global _download_pool
+    with _pools_lock:
+        if _download_pool is None:
+            _download_pool = ThreadPoolExecutor(max_workers=FULLTEXT_DOWNLOAD_WORKERS)
+        return _download_pool
+
+def _parse_pool_instance():
+    global _parse_pool, _parse_started
+    with _pools_lock:
+        if _parse_pool is None:
+            # Spawned rather than forked: forking copies the threaded web server's locks mid-use
+            context = multiprocessing.get_context('spawn')
+            _parse_started = context.Queue()
+            _parse_pool = ProcessPoolExecutor(max_workers=FULLTEXT_PARSE_WORKERS, mp_context=context,
+                                              max_tasks_per_child=FULLTEXT_PARSE_TASKS_PER_CHILD,
+                                              initializer=_init_parse_worker, initargs=(_parse_started,))
+        return _parse_pool
+
+def _parse_worker_pid(started, task_id):
+    # Every task reports when it starts, so the hung task's report is already queued or imminent
+    while True:
+        try:
+            reported_task_id, pid = started.get(timeout=1)
+        except queue.Empty:
+            return None
+        if reported_task_id == task_id:
+            return pid
+
+def _recycle_parse_pool(pool, task_id):
+    """
+    Replace the parse pool after the parse `task_id` overran its deadline.
+
+    A running parse cannot be cancelled, so its worker is killed; otherwise a hung PDF would hold
+    its worker for the life of the process. The executor then counts as broken and stops its other
+    workers. Parses of other requests that were still in the old pool fail with BrokenProcessPool
+    and are resubmitted by `iter_full_texts`.
+    """
+    global _parse_pool, _parse_started
+    with _pools_lock:
+        if _parse_pool is not pool:
+            # Already recycled by another request, which stopped every worker of the old pool
+            return
+        started = _parse_started
+        _parse_pool = _parse_started = None
+    increment('fulltext.parse_pool_recycles')
+    pid = _parse_worker_pid(started, task_id)
+    if pid is None:
+        logger.warning("Parse task %s never reported a worker; shutting its pool down without killing it", task_id)
+    else:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+    started.close()
+
+def _release_slot(future):
+    with _slots_lock:
+        if future in _slot_holders:
+            _slot_holders.remove(future)
+            _parse_slots.release()
+
+def iter_full_texts(papers, timeout=FULLTEXT_TIMEOUT_SECONDS):
+    """
+    Stream the full text of many papers, yielding each as soon as it is ready.
+
+    Cached texts are yielded first. The rest are downloaded with bounded concurrency and parsed in
+    a process pool, so several PDFs are parsed on separate cores. A paper that fails, or whose
+    download or parse runs for more than `timeout` seconds, is yielded with None as its text
+    instead of holding up the others. Time spent queued for a download thread or a parse worker
+    does not count. A parse that overruns its deadline has its pool recycled, which kills the
+    hung worker.
+
+    Args:
+    papers (list): Paper dictionaries with 'id' and 'pdf_url'.
+    timeout (float): Deadline in seconds for each paper's download, and for its parse.
+
+    Yields:
+    tuple: (paper, text or None), in completion order.
+    """
+    pending = []
+    for paper in papers:
+        text = get_cached_text(paper['id'])
+        if text is None:
+            pending.append(paper)
+        else:
+            yield paper, text
+    increment('fulltext_cache.hits', len(papers) - len(pending))
+    increment('fulltext_cache.misses', len(pending))
+    if not pending:
+        return
+
+    # paper ID -> when its download or parse started running
+    started = {}
+
+    def download(paper):
+        started[paper['id']] = time.monotonic()
+        return download_pdf(paper['pdf_url'], timeout)
+
+    # future -> (stage, paper, (parse pool, PDF bytes, whether this is a retry, task ID) for parses)
+    futures = {_download_pool_instance().submit(download, paper): ('download', paper, None) for paper in pending}
+    # (paper, PDF bytes, whether this is a retry) waiting for a free parse worker
+    waiting = []
+
+    while futures or waiting:
+        while waiting and _parse_slots.acquire(blocking=False):
+            paper, pdf_bytes, retried = waiting.pop(0)
+            pool = _parse_pool_instance()
+            task_id = next(_parse_task_ids)
+            future = pool.submit(_run_parse, task_id, parse_pdf, pdf_bytes)
+            started[paper['id']] = time.monotonic()
+            with _slots_lock:
+                _slot_holders.add(future)
+            future.add_done_callback(_release_slot)
+            futures[future] = ('parse', paper, (pool, pdf_bytes, retried, task_id))
+
+        now = time.monotonic()
+        wake = min((started[paper['id']] + timeout for _, paper, _ in futures.values() if paper['id'] in started), default=now + timeout)
+        if waiting:
+            # Another request may free a parse worker at any time
+            wake = min(wake, now + 0.05)
+        if futures:
+            done, _ = wait(futures, timeout=max(wake - now, 0), return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(max(wake - now, 0))
+            done = set()
+
+        for future in done:
+            stage, paper, parse = futures.pop(future)
+            started.pop(paper['id'], None)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                if stage == 'parse' and not parse[2]:
+                    # Its pool was recycled because another parse hung; try once in the new pool
+                    waiting.append((paper, parse[1], True))
+                    continue
+                logger.warning("Failed to %s %s: parse pool was shut down", stage, paper['id'])
+                yield paper, None
+                continue
+            except Exception as e:
+                logger.warning("Failed to %s %s: %s", stage, paper['id'], e)
+                yield paper, None
+                continue
+            if stage == 'download':
+                waiting.append((paper, result, False))
+            else:
+                put_cached_text(paper['id'], result)
+                yield paper, result
+
+        now = time.monotonic()
+        for future in [future for future, (_, paper, _) in futures.items() if started.get(paper['id'], now) + timeout <= now]:
+            stage, paper, parse = futures.pop(future)
+            started.pop(paper['id'], None)
+            if stage == 'parse':
+                _release_slot(future)
+                _recycle_parse_pool(parse[0], parse[3])
+            logger.warning("Timed out after %ss in the %s stage for %s", timeout, stage, paper['id'])
+            yield paper, None
@@ -0,0 +1,127 @@
+import logging
+import threading
+
+from curate_be.arxiv_utils.storage import data_path, file_version, read_json, write_json
+from curate_be.arxiv_utils.vector_index import INDEX_NAME, VECTOR_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Pinecone limits: at most 1000 IDs per delete call, and upserts should stay well under 2MB
+DELETE_BATCH_SIZE = 1000
+UPSERT_BATCH_SIZE = 100
+
+# namespace -> (ledger `file_version`, set of vector IDs stored in that namespace). The file is
+# re-read whenever it changes, so writes by the sync scripts reach the web process.
+_ledgers = {}
+_lock = threading.Lock()
+
+def _ledger_path(namespace):
+    # Keyed by backend and index so switching VECTOR_BACKEND never reuses the wrong ledger
+    return data_path("ledger", VECTOR_BACKEND, INDEX_NAME, f"{namespace or '__default__'}.json")
+
+def _load(namespace):
+    # Called with _lock held; returns the current IDs, or None if there is no ledger yet
+    path = _ledger_path(namespace)
+    cached = _ledgers.get(namespace)
+    version = file_version(path)
+    if version is None:
+        return cached[1] if cached else None
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    stored = read_json(path)
+    if stored is None:
+        return cached[1] if cached else None
+    _ledgers[namespace] = (version, set(stored))
+    return _ledgers[namespace][1]
+
+def _save(namespace, ids):
+    # Called with _lock held
+    path = _ledger_path(namespace)
+    write_json(path, sorted(ids))
+    _ledgers[namespace] = (file_version(path), ids)
+
+def rebuild_ledger(index, namespace=""):
+    """
+    Rebuild a namespace's ledger from the index itself by paging through its IDs.
+
+    Args:
+    index: The vector index.
+    namespace (str): The namespace to enumerate.
+
+    Returns:
+    set: The IDs stored in the namespace.
+    """
+    ids = set()
+    for id_page in index.list(namespace=namespace):
+        ids.update(id_page)
+    with _lock:
+        _save(namespace, ids)
+    logger.info("Rebuilt ID ledger for namespace %r with %d ids", namespace, len(ids))
+    return ids
+
+def _ensure_loaded(index, namespace):
+    with _lock:
+        if _load(namespace) is not None:
+            return
+    rebuild_ledger(index, namespace)
+
+def get_stored_ids(index, namespace=""):
+    """
+    Get the IDs stored in a namespace from the local ledger.
+
+    Args:
+    index: The vector index, used only if the ledger has to be rebuilt.
+    namespace (str): The namespace.
+
+    Returns:
+    set: A copy of the stored IDs, for O(1) membership checks.
+    """
+    _ensure_loaded(index, namespace)
+    with _lock:
+        return set(_load(namespace))
+
+def upsert_vectors(index, vectors, namespace="", batch_size=UPSERT_BATCH_SIZE):
+    """
+    Upsert vectors in batches and record their IDs in the ledger.
+
+    Args:
+    index: The vector index.
+    vectors (list): Vector dictionaries with "id", "values" and "metadata".
+    namespace (str): The namespace to upsert into.
+    batch_size (int): How many vectors to send per upsert call.
+    """
+    _ensure_loaded(index, namespace)
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        index.upsert(vectors=batch, namespace=namespace)
+        with _lock:
+            _save(namespace, _load(namespace) | {vector['id'] for vector in batch})
+
+def delete_vectors(index, ids, namespace="", batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete vectors by ID in exact batches and remove them from the ledger.
+
+    Args:
+    index: The vector index.
+    ids (list): The IDs to delete.
+    namespace (str): The namespace to delete from.
+    batch_size (int): How many IDs to send per delete call.
+    """
+    _ensure_loaded(index, namespace)
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        index.delete(ids=batch, namespace=namespace)
+        with _lock:
+            _save(namespace, _load(namespace) - set(batch))
+
+def delete_all_vectors(index, namespace=""):
+    """
+    Delete every vector the ledger knows about in a namespace.
+
+    Returns:
+    int: The number of IDs deleted.
+    """
+    ids = get_stored_ids(index, namespace)
+    delete_vectors(index, ids, namespace)
+    return len(ids)
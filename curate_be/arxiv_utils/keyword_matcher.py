@@ -0,0 +1,108 @@
+from collections import deque
+from functools import lru_cache
+import numpy as np
+
+# Below this many distinct keywords, C-level str.count beats a pure-Python automaton scan. The
+# crossover is around 150-200 keywords (see the keyword_matching benchmark); extracted profiles
+# have 10, so searches normally use str.count
+AUTOMATON_MIN_KEYWORDS = 200
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton that counts many keywords in a single pass over a text.
+
+    Matching is case-insensitive. Each keyword is counted the way `str.count` counts it
+    (non-overlapping occurrences, scanning left to right), and a keyword listed twice counts twice,
+    so `count(text)` equals `sum(text.lower().count(k.lower()) for k in keywords)`.
+
+    For small keyword sets the automaton is skipped and `str.count` is used directly, since a
+    handful of C-level scans is faster than one Python-level scan.
+    """
+
+    def __init__(self, keywords, use_automaton=None):
+        keywords = [keyword.lower() for keyword in keywords]
+        self.keywords = keywords
+        # The empty string "occurs" len(text) + 1 times under str.count
+        self.empty_weight = sum(1 for keyword in keywords if not keyword)
+
+        patterns = {}
+        for keyword in keywords:
+            if keyword:
+                patterns[keyword] = patterns.get(keyword, 0) + 1
+        self.patterns = patterns
+        self.lengths = [len(pattern) for pattern in patterns]
+        self.weights = list(patterns.values())
+        self.use_automaton = len(patterns) >= AUTOMATON_MIN_KEYWORDS if use_automaton is None else use_automaton
+        if self.use_automaton:
+            self._build_automaton()
+
+    def _build_automaton(self):
+        patterns = self.patterns
+
+        # Trie
+        self.goto = [{}]
+        self.output = [[]]
+        for pattern_index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(pattern_index)
+
+        # Failure links, breadth first, merging the outputs of each state's fallback
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def count(self, text):
+        """
+        Total number of keyword occurrences in `text`.
+        """
+        text = text.lower()
+        total = self.empty_weight * (len(text) + 1)
+        if not self.use_automaton:
+            return total + sum(text.count(pattern) * weight for pattern, weight in self.patterns.items())
+
+        goto, fail, output, lengths, weights = self.goto, self.fail, self.output, self.lengths, self.weights
+        last_end = {}
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_index in output[state]:
+                # Skip occurrences overlapping the previous one of the same keyword, like str.count
+                if position - lengths[pattern_index] + 1 >= last_end.get(pattern_index, 0):
+                    total += weights[pattern_index]
+                    last_end[pattern_index] = position + 1
+        return total
+
+    def count_many(self, texts):
+        """
+        Score a whole corpus at once.
+
+        Returns:
+        np.ndarray: The keyword occurrence count of each text.
+        """
+        return np.fromiter((self.count(text) for text in texts), dtype=float, count=len(texts))
+
+@lru_cache(maxsize=64)
+def _cached_matcher(keywords):
+    return KeywordMatcher(keywords)
+
+def get_matcher(keywords):
+    """
+    Get the compiled matcher for a keyword list, reusing it across requests with the same keywords.
+    """
+    return _cached_matcher(tuple(keywords))
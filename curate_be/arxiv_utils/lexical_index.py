@@ -0,0 +1,201 @@
+import os
+import pickle
+import tempfile
+import threading
+import numpy as np
+
+from curate_be.arxiv_utils.pull_latest import get_embeddings_batch
+from curate_be.arxiv_utils.storage import data_path
+from curate_be.arxiv_utils.tracing import increment, span
+
+class LexicalIndex:
+    """
+    Lexical statistics for a fixed list of papers, built once and queried many times.
+
+    Holds the token arrays, document frequencies and BM25 statistics of the paper summaries
+    (matching `rank_bm25.BM25Okapi` with whitespace tokenization) and a fitted TF-IDF model with
+    its document matrix. Scores come back as arrays aligned with `self.ids`.
+
+    Indexes built by `build_lexical_index` also carry `title_vectors`, the L2-normalized float32
+    title embeddings in the same order, so searches only have to embed their queries.
+    """
+
+    def __init__(self, papers, k1=1.5, b=0.75, epsilon=0.25):
+        # scipy and sklearn are imported when an index is first built or loaded, not at startup
+        from scipy import sparse
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.ids = [paper['id'] for paper in papers]
+        self.title_vectors = None
+        self.positions = {id: position for position, id in enumerate(self.ids)}
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        # BM25 statistics over whitespace-split summaries
+        self.tokens = [paper['summary'].split() for paper in papers]
+        self.vocabulary = {}
+        rows, cols = [], []
+        for row, document in enumerate(self.tokens):
+            for token in document:
+                rows.append(row)
+                cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+        term_counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(self.ids), len(self.vocabulary))
+        )
+        term_counts.sum_duplicates()
+        self.doc_len = np.array([len(document) for document in self.tokens], dtype=float)
+        self.avgdl = self.doc_len.mean() if len(self.ids) else 0.0
+        self.doc_freqs = np.diff(term_counts.tocsc().indptr)
+        self.idf = self._calc_idf(len(self.ids), self.doc_freqs)
+        self.bm25_weights = self._bm25_weights(term_counts)
+
+        # TF-IDF model over the raw summaries. With no papers (or no words in any summary) there is
+        # nothing to fit, and every TF-IDF score is zero
+        corpus = [paper['summary'] for paper in papers]
+        try:
+            self.vectorizer = TfidfVectorizer().fit(corpus)
+            self.tfidf_matrix = self.vectorizer.transform(corpus)
+        except ValueError:
+            self.vectorizer = None
+            self.tfidf_matrix = sparse.csr_matrix((len(self.ids), 0))
+
+    def _calc_idf(self, corpus_size, doc_freqs):
+        idf = np.log(corpus_size - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+        if len(idf):
+            # Same floor BM25Okapi applies to very common terms
+            idf[idf < 0] = self.epsilon * idf.mean()
+        return idf
+
+    def _bm25_weights(self, term_counts):
+        # Precompute each (document, term) BM25 contribution so scoring is one sparse product
+        from scipy import sparse
+        weights = term_counts.tocoo()
+        tf = weights.data
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[weights.row] / self.avgdl) if self.avgdl else self.k1
+        data = self.idf[weights.col] * (tf * (self.k1 + 1) / (tf + norm))
+        return sparse.csr_matrix((data, (weights.row, weights.col)), shape=term_counts.shape)
+
+    def matches(self, papers):
+        """
+        Whether this index was built over exactly these papers, in this order.
+        """
+        return len(papers) == len(self.ids) and all(paper['id'] == id for paper, id in zip(papers, self.ids))
+
+    def bm25_query_vector(self, query):
+        counts = np.zeros(len(self.vocabulary))
+        for token in query.split():
+            column = self.vocabulary.get(token)
+            if column is not None:
+                counts[column] += 1
+        return counts
+
+    def bm25_scores(self, query):
+        """
+        BM25 score of every paper for a query.
+        """
+        return self.bm25_weights @ self.bm25_query_vector(query)
+
+    def bm25_scores_batch(self, queries):
+        """
+        BM25 scores of every paper for many queries at once, as a (queries x papers) array.
+        """
+        query_counts = np.array([self.bm25_query_vector(query) for query in queries]).reshape(len(queries), -1)
+        return (self.bm25_weights @ query_counts.T).T
+
+    def tfidf_scores(self, query):
+        """
+        TF-IDF cosine similarity of every paper to a query.
+        """
+        if self.vectorizer is None:
+            return np.zeros(len(self.ids))
+        query_vector = self.vectorizer.transform([query])
+        return (self.tfidf_matrix @ query_vector.T).toarray().flatten()
+
+    def tfidf_scores_batch(self, queries):
+        """
+        TF-IDF cosine similarities of every paper to many queries, as a (queries x papers) array.
+        """
+        if self.vectorizer is None:
+            return np.zeros((len(queries), len(self.ids)))
+        query_vectors = self.vectorizer.transform(queries)
+        return (query_vectors @ self.tfidf_matrix.T).toarray()
+
+# category -> LexicalIndex
+_indexes = {}
+_lock = threading.Lock()
+
+def _index_path(category):
+    return data_path("lexical", f"{category}.pkl")
+
+def title_vector_matrix(papers):
+    """
+    Embed paper titles (from the embedding cache where possible) as an L2-normalized float32
+    (papers x dimensions) matrix.
+    """
+    if not papers:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = np.asarray(get_embeddings_batch([paper['title'] for paper in papers]), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors
+
+def build_lexical_index(category, papers):
+    """
+    Build a category's lexical index, with its title embedding matrix, and cache it in memory and
+    on disk.
+
+    Called at ingest time whenever a category's synced papers change.
+
+    Args:
+    category (str): The arXiv category.
+    papers (list): The category's synced papers.
+
+    Returns:
+    LexicalIndex: The new index.
+    """
+    increment('lexical.index_builds')
+    with span('lexical.build'):
+        lexical_index = LexicalIndex(papers)
+        lexical_index.title_vectors = title_vector_matrix(papers)
+    # A unique temp file per build, as in `storage.write_json`: the web cold-start sync, the sync
+    # scripts and OAI backfills can rebuild the same category at once
+    path = _index_path(category)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(lexical_index, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    with _lock:
+        _indexes[category] = lexical_index
+    return lexical_index
+
+def get_lexical_index(category, papers):
+    """
+    Get a category's lexical index, from memory or disk, rebuilding it only if it does not match
+    the papers being searched.
+
+    Args:
+    category (str): The arXiv category.
+    papers (list): The papers being searched.
+
+    Returns:
+    LexicalIndex: An index whose positions line up with `papers`.
+    """
+    with _lock:
+        lexical_index = _indexes.get(category)
+    if lexical_index is None:
+        try:
+            with open(_index_path(category), 'rb') as f:
+                lexical_index = pickle.load(f)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            lexical_index = None
+    # Indexes pickled before title vectors were added are rebuilt once
+    if lexical_index is None or not lexical_index.matches(papers) or getattr(lexical_index, 'title_vectors', None) is None:
+        return build_lexical_index(category, papers)
+    with _lock:
+        _indexes[category] = lexical_index
+    return lexical_index
@@ -0,0 +1,218 @@
+import os
+import threading
+import numpy as np
+
+from curate_be.arxiv_utils.storage import data_path, file_version, read_json, write_json
+
+class _Record(dict):
+    """
+    A dict that also allows attribute access, mirroring Pinecone's response objects
+    (`results['matches']` and `results.matches` both work).
+    """
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class _Namespace:
+    def __init__(self, dimension):
+        self.ids = []
+        self.rows = {}
+        self.metadata = []
+        # Rows are L2-normalized so a dot product is the cosine similarity
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.raw = np.zeros((0, dimension), dtype=np.float32)
+        # `file_version` of the records file this copy matches, or None if never persisted
+        self.version = None
+
+class LocalIndex:
+    """
+    In-process vector index exposing the subset of the Pinecone `Index` API CurateIQ uses:
+    `upsert`, `query`, `fetch`, `delete`, `list` and `describe_index_stats`.
+
+    Search is exact brute-force cosine similarity over a NumPy matrix per namespace, which is
+    plenty for the few hundred papers a category holds. Every write is persisted to disk, and a
+    namespace is reloaded whenever another process (e.g. a sync script) has rewritten it since.
+    """
+
+    def __init__(self, name="curate-iq", dimension=1536, persist=True):
+        self.name = name
+        self.dimension = dimension
+        self.persist = persist
+        self._namespaces = {}
+        self._lock = threading.RLock()
+        if persist:
+            self._root = os.path.dirname(data_path("local_index", name, "_"))
+            for namespace in os.listdir(self._root):
+                if not namespace.startswith('.'):
+                    self._load(namespace)
+
+    def _dir(self, namespace):
+        return os.path.join(self._root, namespace or '__default__')
+
+    def _load(self, dirname):
+        records_path = os.path.join(self._root, dirname, 'records.json')
+        version = file_version(records_path)
+        try:
+            raw = np.load(os.path.join(self._root, dirname, 'vectors.npy'))
+        except OSError:
+            return
+        records = read_json(records_path)
+        # A writer replaces vectors.npy before records.json; skip a half-updated pair and retry later
+        if version is None or records is None or len(records['ids']) != len(raw):
+            return
+        namespace = '' if dirname == '__default__' else dirname
+        ns = _Namespace(self.dimension)
+        ns.ids = records['ids']
+        ns.metadata = records['metadata']
+        ns.rows = {id: row for row, id in enumerate(ns.ids)}
+        ns.raw = raw
+        ns.vectors = self._normalize(ns.raw)
+        ns.version = version
+        self._namespaces[namespace] = ns
+
+    def _refresh(self, namespace):
+        # Reload the namespace if its files changed on disk since this process last read or wrote them
+        if self.persist:
+            version = file_version(os.path.join(self._dir(namespace), 'records.json'))
+            ns = self._namespaces.get(namespace)
+            if version is not None and (ns is None or ns.version != version):
+                self._load(os.path.basename(self._dir(namespace)))
+        return self._namespaces.get(namespace)
+
+    def _save(self, namespace):
+        if not self.persist:
+            return
+        ns = self._namespaces[namespace]
+        directory = self._dir(namespace)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, 'vectors.tmp.npy')
+        np.save(tmp_path, ns.raw)
+        os.replace(tmp_path, os.path.join(directory, 'vectors.npy'))
+        records_path = os.path.join(directory, 'records.json')
+        write_json(records_path, {'ids': ns.ids, 'metadata': ns.metadata})
+        ns.version = file_version(records_path)
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def _namespace(self, namespace):
+        self._refresh(namespace)
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = _Namespace(self.dimension)
+        return self._namespaces[namespace]
+
+    def upsert(self, vectors, namespace=""):
+        """
+        Insert or overwrite vectors, given as dicts with "id", "values" and optional "metadata"
+        or as (id, values[, metadata]) tuples.
+        """
+        # The last copy of an ID repeated within the batch wins, as in Pinecone
+        batch = {}
+        for vector in vectors:
+            if isinstance(vector, dict):
+                id, values, metadata = vector['id'], vector['values'], vector.get('metadata') or {}
+            else:
+                id, values, metadata = vector[0], vector[1], (vector[2] if len(vector) > 2 else {})
+            batch[id] = (values, metadata)
+
+        with self._lock:
+            ns = self._namespace(namespace)
+            new_rows = []
+            for id, (values, metadata) in batch.items():
+                if id in ns.rows:
+                    row = ns.rows[id]
+                    ns.raw[row] = values
+                    ns.metadata[row] = metadata
+                else:
+                    ns.rows[id] = len(ns.ids)
+                    ns.ids.append(id)
+                    ns.metadata.append(metadata)
+                    new_rows.append(values)
+            if new_rows:
+                ns.raw = np.vstack([ns.raw, np.asarray(new_rows, dtype=np.float32)])
+            ns.vectors = self._normalize(ns.raw)
+            self._save(namespace)
+            return _Record(upserted_count=len(vectors))
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        with self._lock:
+            ns = self._namespace(namespace)
+            if delete_all:
+                ids = list(ns.ids)
+            drop = {ns.rows[id] for id in ids or [] if id in ns.rows}
+            if drop:
+                keep = [row for row in range(len(ns.ids)) if row not in drop]
+                ns.ids = [ns.ids[row] for row in keep]
+                ns.metadata = [ns.metadata[row] for row in keep]
+                ns.raw = ns.raw[keep]
+                ns.vectors = ns.vectors[keep]
+                ns.rows = {id: row for row, id in enumerate(ns.ids)}
+                self._save(namespace)
+            return _Record()
+
+    def query(self, vector, top_k=10, include_values=False, include_metadata=False, namespace=""):
+        """
+        Return the `top_k` vectors in a namespace most similar to `vector` by cosine similarity.
+        """
+        with self._lock:
+            ns = self._refresh(namespace)
+            if ns is None or not ns.ids:
+                return _Record(matches=[], namespace=namespace)
+            query = np.asarray(vector, dtype=np.float32)
+            query_norm = np.linalg.norm(query)
+            scores = ns.vectors @ (query / query_norm if query_norm else query)
+
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+
+            matches = []
+            for row in top:
+                match = _Record(id=ns.ids[row], score=float(scores[row]))
+                if include_values:
+                    match['values'] = ns.raw[row].tolist()
+                if include_metadata:
+                    match['metadata'] = dict(ns.metadata[row])
+                matches.append(match)
+            return _Record(matches=matches, namespace=namespace)
+
+    def fetch(self, ids, namespace=""):
+        with self._lock:
+            ns = self._refresh(namespace)
+            vectors = {}
+            for id in ids:
+                if ns is not None and id in ns.rows:
+                    row = ns.rows[id]
+                    vectors[id] = _Record(id=id, values=ns.raw[row].tolist(), metadata=dict(ns.metadata[row]))
+            return _Record(vectors=vectors, namespace=namespace)
+
+    def list(self, namespace="", prefix=None, limit=100):
+        """
+        Yield pages of the IDs stored in a namespace, like Pinecone's `Index.list`.
+        """
+        with self._lock:
+            ns = self._refresh(namespace)
+            ids = [id for id in (ns.ids if ns else []) if not prefix or id.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self):
+        with self._lock:
+            if self.persist:
+                for dirname in os.listdir(self._root):
+                    if not dirname.startswith('.'):
+                        self._refresh('' if dirname == '__default__' else dirname)
+            namespaces = {
+                name: _Record(vector_count=len(ns.ids))
+                for name, ns in self._namespaces.items() if ns.ids
+            }
+            return _Record(
+                dimension=self.dimension,
+                namespaces=namespaces,
+                total_vector_count=sum(ns.vector_count for ns in namespaces.values())
+            )
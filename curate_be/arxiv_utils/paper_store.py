@@ -0,0 +1,248 @@
+import arxiv
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.arxiv_client import search_results
+from curate_be.arxiv_utils.pull_latest import paper_from_result
+from curate_be.arxiv_utils.storage import data_path, file_version, read_json, write_json
+from curate_be.arxiv_utils.tracing import increment, span
+
+load_dotenv()
+
+# A category older than this is reported as stale in its freshness watermark
+FRESHNESS_MAX_AGE_HOURS = float(os.getenv("FRESHNESS_MAX_AGE_HOURS", "24"))
+# How long an unversioned ID keeps resolving to the version it was last resolved to, so revised
+# papers are picked up
+PAPER_ALIAS_TTL_HOURS = float(os.getenv("PAPER_ALIAS_TTL_HOURS", "24"))
+
+_DATETIME_FIELDS = ('published', 'updated')
+
+# category -> (file version, papers), so repeated reads skip JSON parsing
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _category_path(category):
+    return data_path("categories", f"{category}.json")
+
+def encode_paper(paper):
+    """
+    Make a paper dictionary JSON-serializable by converting its dates to ISO strings.
+    """
+    encoded = dict(paper)
+    for field in _DATETIME_FIELDS:
+        if isinstance(encoded.get(field), datetime):
+            encoded[field] = encoded[field].isoformat()
+    return encoded
+
+def decode_paper(paper):
+    """
+    Inverse of `encode_paper`: parse a stored paper's ISO date strings back into datetimes.
+    """
+    for field in _DATETIME_FIELDS:
+        if isinstance(paper.get(field), str):
+            paper[field] = datetime.fromisoformat(paper[field])
+    return paper
+
+def save_category_papers(category, papers, synced_at=None):
+    """
+    Persist the papers currently synced into a category's namespace, along with the sync watermark.
+
+    Args:
+    category (str): The arXiv category (also the Pinecone namespace).
+    papers (list): A list of dictionaries containing paper information.
+    synced_at (datetime): When the sync finished. Defaults to now.
+    """
+    synced_at = synced_at or datetime.now(timezone.utc)
+    path = _category_path(category)
+    write_json(path, {
+        'category': category,
+        'synced_at': synced_at.isoformat(),
+        'papers': [encode_paper(paper) for paper in papers]
+    })
+    with _cache_lock:
+        _cache.pop(category, None)
+
+def _load_record(category):
+    path = _category_path(category)
+    version = file_version(path)
+    if version is None:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(category)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    record = read_json(path)
+    if record is None:
+        return None
+    record['papers'] = [decode_paper(paper) for paper in record['papers']]
+    with _cache_lock:
+        _cache[category] = (version, record)
+    return record
+
+def load_category_papers(category):
+    """
+    Load the papers synced into a category, without touching arXiv or Pinecone.
+
+    Args:
+    category (str): The arXiv category.
+
+    Returns:
+    list: Copies of the synced papers, or None if the category has never been synced. The
+    parsed file is cached and shared between requests, so callers get their own copies to modify.
+    """
+    record = _load_record(category)
+    return [dict(paper) for paper in record['papers']] if record else None
+
+def get_watermark(category):
+    """
+    Describe how fresh the synced data for a category is.
+
+    Args:
+    category (str): The arXiv category.
+
+    Returns:
+    dict: The sync time, newest paper date, paper count, age in seconds and whether it is stale.
+    """
+    record = _load_record(category)
+    if record is None:
+        return {'category': category, 'synced_at': None, 'newest_published': None,
+                'paper_count': 0, 'age_seconds': None, 'stale': True}
+
+    synced_at = datetime.fromisoformat(record['synced_at'])
+    age_seconds = (datetime.now(timezone.utc) - synced_at).total_seconds()
+    published = [paper['published'] for paper in record['papers'] if paper.get('published')]
+    return {
+        'category': category,
+        'synced_at': record['synced_at'],
+        'newest_published': max(published).isoformat() if published else None,
+        'paper_count': len(record['papers']),
+        'age_seconds': age_seconds,
+        'stale': age_seconds > FRESHNESS_MAX_AGE_HOURS * 3600
+    }
+
+_metadata_conn = None
+_metadata_lock = threading.Lock()
+
+def _metadata_connection():
+    global _metadata_conn
+    if _metadata_conn is None:
+        conn = sqlite3.connect(data_path("papers.sqlite3"), check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS papers (id TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aliases'").fetchone():
+            conn.execute("CREATE TABLE aliases (id TEXT PRIMARY KEY, paper_id TEXT NOT NULL, stored_at REAL NOT NULL)")
+            # Aliases used to be stored as paper rows that never expired
+            old_aliases = [(paper_id,) for paper_id, in conn.execute("SELECT id FROM papers") if _version(paper_id) is None]
+            conn.executemany("DELETE FROM papers WHERE id = ?", old_aliases)
+            conn.commit()
+        _metadata_conn = conn
+    return _metadata_conn
+
+def _base_id(paper_id):
+    return re.sub(r'v\d+$', '', paper_id)
+
+def _version(paper_id):
+    match = re.search(r'v(\d+)$', paper_id)
+    return int(match.group(1)) if match else None
+
+def remember_papers(papers, aliases=None):
+    """
+    Store paper metadata so later lookups by ID need no arXiv request.
+
+    Each paper is stored under its versioned ID. Extra IDs in `aliases` (e.g. the unversioned ID
+    it was requested by) resolve to it for PAPER_ALIAS_TTL_HOURS. An existing alias for a paper's
+    unversioned ID is moved to any newer version stored here.
+
+    Args:
+    papers (list): A list of dictionaries containing paper information.
+    aliases (dict): Optional map of extra ID -> paper ID.
+    """
+    records = {paper['id']: json.dumps(encode_paper(paper)) for paper in papers}
+    now = time.time()
+    with _metadata_lock:
+        conn = _metadata_connection()
+        conn.executemany("INSERT OR REPLACE INTO papers (id, record) VALUES (?, ?)", list(records.items()))
+        conn.executemany("INSERT OR REPLACE INTO aliases (id, paper_id, stored_at) VALUES (?, ?, ?)",
+                         [(alias, paper_id, now) for alias, paper_id in (aliases or {}).items() if paper_id in records])
+
+        # Point aliases at newer versions as they arrive
+        by_base_id = {}
+        for paper_id in records:
+            if _version(paper_id) is not None:
+                base_id = _base_id(paper_id)
+                if base_id not in by_base_id or _version(paper_id) > _version(by_base_id[base_id]):
+                    by_base_id[base_id] = paper_id
+        base_ids = list(by_base_id)
+        for start in range(0, len(base_ids), 500):
+            chunk = base_ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT id, paper_id FROM aliases WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            conn.executemany("UPDATE aliases SET paper_id = ?, stored_at = ? WHERE id = ?", [
+                (by_base_id[alias], now, alias) for alias, paper_id in rows
+                if (_version(paper_id) or 0) < _version(by_base_id[alias])
+            ])
+        conn.commit()
+
+def lookup_papers(paper_ids):
+    """
+    Look up stored paper metadata by ID.
+
+    Returns:
+    dict: Maps each known ID to its paper dictionary. Expired aliases are not known.
+    """
+    found = {}
+    cutoff = time.time() - PAPER_ALIAS_TTL_HOURS * 3600
+    with _metadata_lock:
+        conn = _metadata_connection()
+        for start in range(0, len(paper_ids), 500):
+            chunk = paper_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f"SELECT id, record FROM papers WHERE id IN ({placeholders})", chunk).fetchall()
+            rows += conn.execute(
+                f"SELECT aliases.id, papers.record FROM aliases JOIN papers ON papers.id = aliases.paper_id "
+                f"WHERE aliases.id IN ({placeholders}) AND aliases.stored_at >= ?", chunk + [cutoff]
+            ).fetchall()
+            found.update((paper_id, decode_paper(json.loads(record))) for paper_id, record in rows)
+    return found
+
+def resolve_papers(paper_ids):
+    """
+    Resolve arXiv IDs to paper metadata, fetching only unknown IDs in a single batched request.
+
+    Args:
+    paper_ids (list): arXiv IDs, with or without a version suffix.
+
+    Returns:
+    list: Paper dictionaries in the order of `paper_ids`, skipping IDs arXiv does not know.
+    """
+    paper_ids = [paper_id for paper_id in dict.fromkeys(paper_ids) if paper_id]
+    known = lookup_papers(paper_ids)
+    missing = [paper_id for paper_id in paper_ids if paper_id not in known]
+    increment('paper_store.hits', len(known))
+    increment('paper_store.misses', len(missing))
+
+    if missing:
+        search = arxiv.Search(id_list=missing, max_results=len(missing))
+        with span('arxiv.fetch'):
+            fetched = [paper_from_result(result) for result in search_results(search)]
+        # A versioned ID gets exactly that version; an unversioned one whatever arXiv returned
+        by_id = {paper['id']: paper for paper in fetched}
+        by_base_id = {_base_id(paper['id']): paper for paper in fetched}
+        aliases = {}
+        for paper_id in missing:
+            paper = by_id.get(paper_id) or by_base_id.get(_base_id(paper_id))
+            if paper is not None:
+                known[paper_id] = paper
+                if paper['id'] != paper_id:
+                    aliases[paper_id] = paper['id']
+        remember_papers(fetched, aliases)
+
+    return [known[paper_id] for paper_id in paper_ids if paper_id in known]
@@ -1,41 +1,95 @@
 import arxiv
-from curate_be.arxiv_utils.pull_latest import get_embeddings, index, fetch_latest_papers, pull_and_upsert_latest_papers
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from curate_be.arxiv_utils.pull_latest import get_embeddings_batch, fetch_latest_papers, pull_and_upsert_latest_papers
 import pprint
 
-from curate_be.arxiv_utils.rank import combined_search, extract_keywords, generate_kw, rank_papers
+from curate_be.arxiv_utils.rank import aggregate_query_results, combined_search, extract_keywords, iter_score_queries, generate_kw, rank_papers
+from curate_be.arxiv_utils.fulltext_cache import iter_full_texts
+from curate_be.arxiv_utils.categories import is_arxiv_category
+from curate_be.arxiv_utils.author_profiles import get_author_papers, get_profile_embeddings, get_profile_keywords, save_profile_keywords
+from curate_be.arxiv_utils.paper_store import get_watermark, load_category_papers, resolve_papers
+from curate_be.arxiv_utils.tracing import span
+from curate_be.arxiv_utils.vector_index import get_index
 from curate_be.sync_papers.add_and_delete import update_namespace
 
+logger = logging.getLogger(__name__)
+
+# Never-synced categories are synced in the background, one sync per category at a time
+_cold_start_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cold-start-sync")
+# category -> Future of the sync currently running
+_cold_starts = {}
+_cold_starts_lock = threading.Lock()
+
 def fetch_papers_by_author(author_name):
     """
     Fetch all papers written by a given author from arXiv.
 
+    Papers come from the author's stored profile, which only asks arXiv for papers newer than
+    the ones it already has.
+
     Args:
     author_name (str): The name of the author in the format "John Doe".
 
     Returns:
     list: A list of dictionaries containing paper information.
     """
-    print(f"Fetching papers for author: {author_name}")  
-    formatted_name = f"\"{author_name}\""
-    query = f'au:{formatted_name}'
-    print(f"arXiv query: {query}") 
-    search = arxiv.Search(
-        query=query,
-        max_results=300, 
-        sort_by=arxiv.SortCriterion.SubmittedDate
-    )
-    papers = []
-    for result in search.results():
-        paper_info = {
-            'id': result.entry_id.split('/')[-1],
-            'title': result.title,
-            'summary': result.summary,
-            'authors': [author.name for author in result.authors],
-            'published': result.published,
-            'pdf_url': result.pdf_url
-        }
-        papers.append(paper_info)
-    print(f"Found {len(papers)} papers for {author_name}") 
+    logger.debug("Fetching papers for author: %s", author_name)
+    papers = get_author_papers(author_name)
+    logger.debug("Found %d papers for %s", len(papers), author_name)
+    return papers
+
+def _cold_start_sync(category):
+    try:
+        with span('sync.cold_start'):
+            update_namespace(get_index(), category)
+    except Exception:
+        logger.exception("Cold-start sync of %s failed", category)
+    finally:
+        with _cold_starts_lock:
+            _cold_starts.pop(category, None)
+
+def queue_cold_start_sync(category):
+    """
+    Sync a category in the background unless a sync of it is already running.
+
+    Only arXiv categories are synced, so arbitrary names cannot start paid arXiv and embedding work.
+
+    Returns:
+    Future: The running sync, or None if `category` is not an arXiv category.
+    """
+    if not is_arxiv_category(category):
+        logger.warning("Not syncing unknown category %r", category)
+        return None
+    with _cold_starts_lock:
+        future = _cold_starts.get(category)
+        if future is None:
+            future = _cold_starts[category] = _cold_start_pool.submit(_cold_start_sync, category)
+        return future
+
+def cold_start_pending(category):
+    with _cold_starts_lock:
+        return category in _cold_starts
+
+def load_synced_papers(category):
+    """
+    Load the papers already synced into a category's namespace.
+
+    The search path never syncs a namespace itself; that is the job of the sync scripts in
+    `curate_be.sync_papers`. A category that has never been synced is queued for a background
+    sync and searched as empty until it finishes.
+
+    Args:
+    category (str): The arXiv category.
+
+    Returns:
+    list: A list of dictionaries containing paper information.
+    """
+    papers = load_category_papers(category)
+    if papers is None:
+        queue_cold_start_sync(category)
+        return []
     return papers
 
 def fetch_and_find_similar_papers(author_name, category, selected_paper_ids):
@@ -59,11 +113,11 @@ def fetch_and_find_similar_papers(author_name, category, selected_paper_ids):
     selected_papers = [paper for paper in author_papers if paper['id'] in selected_paper_ids]
     
     # Generate embeddings for the selected papers
-    selected_embeddings = [get_embeddings(paper['summary']) for paper in selected_papers]
+    selected_embeddings = get_embeddings_batch([paper['summary'] for paper in selected_papers])
     
     similar_papers = {}
     for i, embedding in enumerate(selected_embeddings):
-        matches = index.query(
+        matches = get_index().query(
             top_k=100,
             include_metadata=True,
             vector=embedding
@@ -115,25 +169,13 @@ def fetch_and_compare_selected_papers(selected_paper_ids, author_name, category)
         author_papers = fetch_papers_by_author(author_name)
         selected_paper_ids = [paper['id'] for paper in author_papers][:5]
     
-    selected_papers = []
-    for paper_id in selected_paper_ids:
-        search = arxiv.Search(id_list=[paper_id])
-        for result in search.results():
-            paper_info = {
-                'id': result.entry_id.split('/')[-1],
-                'title': result.title,
-                'summary': result.summary,
-                'authors': [author.name for author in result.authors],
-                'published': result.published,
-                'pdf_url': result.pdf_url
-            }
-            selected_papers.append(paper_info)
-
-    selected_embeddings = [get_embeddings(paper['title']) for paper in selected_papers]
+    selected_papers = resolve_papers(selected_paper_ids)
+
+    selected_embeddings = get_embeddings_batch([paper['title'] for paper in selected_papers])
 
     similar_papers = {}
     for i, embedding in enumerate(selected_embeddings):
-        matches = index.query(
+        matches = get_index().query(
             top_k=100,
             include_metadata=True,
             vector=embedding
@@ -378,82 +420,110 @@ def fetch_and_compare_selected_papers(selected_paper_ids, author_name, category)
 
 #     return unique_papers
 
-def hybrid_search_author_comparison(selected_paper_ids, author_name, category):
+def iter_hybrid_search_author_comparison(selected_paper_ids, author_name, category, progress=None):
     """
-    Perform a hybrid search to compare selected papers and find similar papers.
-    
+    Perform a hybrid search to compare selected papers and find similar papers, yielding results
+    as they become available.
+
+    Yields, in order: a 'keywords' event with the extracted keywords; a 'partial' event with the
+    provisional ranking from lexical and keyword scores, before the queries are embedded; and a
+    'final' event with the same contents as `hybrid_search_author_comparison` returns. If a stage
+    fails, an 'error' event with the error message is yielded instead and the stream ends, so
+    clients can tell a failed search from a truncated stream.
+
     Args:
     selected_paper_ids (list): A list of arXiv IDs for the selected papers.
     author_name (str): The name of the author in the format "John Doe".
     category (str): The arXiv category to fetch latest papers from.
-    
-    Returns:
-    dict: A dictionary containing a list of similar papers sorted by relevance and the generated keywords.
+    progress (callable): Optional callback, called with the name of each stage as it starts.
+
+    Yields:
+    dict: Events with a 'type' of 'keywords', 'partial', 'final' or 'error'.
     """
+    try:
+        yield from _iter_hybrid_search(selected_paper_ids, author_name, category, progress)
+    except Exception as e:
+        logger.exception("Hybrid search failed")
+        yield {'type': 'error', 'error': str(e)}
+
+def _iter_hybrid_search(selected_paper_ids, author_name, category, progress):
     # pull_and_upsert_latest_papers(category, max_results=300)
+    progress = progress or (lambda stage: None)
 
+    # An empty selectedPaperIds query parameter splits to ['']
+    selected_paper_ids = [paper_id for paper_id in selected_paper_ids if paper_id]
+    progress('resolving_papers')
     if len(selected_paper_ids) == 0:
-        author_papers = fetch_papers_by_author(author_name)
-        selected_paper_ids = [paper['id'] for paper in author_papers][:5]
-
-    selected_papers = []
-    for paper_id in selected_paper_ids:
-        search = arxiv.Search(id_list=[paper_id])
-        for result in search.results():
-            paper_info = {
-                'id': result.entry_id.split('/')[-1],
-                'title': result.title,
-                'summary': result.summary,
-                'authors': [author.name for author in result.authors],
-                'published': result.published,
-                'pdf_url': result.pdf_url
-            }
-            selected_papers.append(paper_info)
-
-    try:
-        # keywords = generate_kw(selected_papers)
-        keywords = [keyword[0] for keyword in extract_keywords(selected_papers)]
-        print("KEYWORDS: ", keywords)
-    except Exception as e:
-        print("ERROR GENERATING KEYWORDS: ", e)
-        keywords = []
-
-    combined_results = []
-    update_namespace(index, category)
-    all_papers = fetch_latest_papers(category, max_results=50)
-    for paper in selected_papers:
-        query = paper['title']
+        # The author's profile already holds the full paper records
+        selected_papers = fetch_papers_by_author(author_name)[:5]
+    else:
+        selected_papers = resolve_papers(selected_paper_ids)
+
+    progress('extracting_keywords')
+    selected_ids = [paper['id'] for paper in selected_papers]
+    keywords = get_profile_keywords(author_name, selected_ids) if author_name else None
+    if keywords is None:
+        try:
+            # keywords = generate_kw(selected_papers)
+            texts = {paper['id']: text for paper, text in iter_full_texts(selected_papers) if text}
+            keywords = [keyword[0] for keyword in extract_keywords(selected_papers, texts=texts)]
+            logger.debug("KEYWORDS: %s", keywords)
+            # Keywords missing a paper whose full text could not be fetched are only used this once
+            if author_name and all(paper_id in texts for paper_id in selected_ids):
+                save_profile_keywords(author_name, selected_ids, keywords)
+        except Exception as e:
+            logger.warning("ERROR GENERATING KEYWORDS: %s", e)
+            keywords = []
+    yield {'type': 'keywords', 'keywords': keywords}
+
+    progress('loading_corpus')
+    all_papers = load_synced_papers(category)
+    progress('scoring')
+    queries = [paper['title'] for paper in selected_papers]
+    unique_papers = []
+    if queries and all_papers:
         if keywords:
-            print("KW SEARCH")
-            search_results = combined_search(index, category, query, all_papers, keywords, weight_bm25=0.4, weight_embedding=0, weight_tfidf=0.5, weight_keyword=0.05, top_k=50)
+            logger.debug("KW SEARCH")
+            weights = dict(keywords=keywords, weight_bm25=0.4, weight_embedding=0, weight_tfidf=0.5, weight_keyword=0.05, top_k=50)
         else:
-            search_results = combined_search(index, category, query, all_papers, weight_bm25=0., weight_embedding=0.2, weight_tfidf=0.2, top_k=50)
-        combined_results.extend(search_results)
-        print(f"Results for query '{query}':", search_results)
-
-    # pprint.pprint(combined_results)
-
-    # Count frequencies and accumulate scores
-    result_count = {}
-    result_scores = {}
-    for result in combined_results:
-        paper_id = result['id']
-        if paper_id not in result_count:
-            result_count[paper_id] = 0
-            result_scores[paper_id] = 0
-        result_count[paper_id] += 1
-        result_scores[paper_id] += result['combined_score']
-
-    # Rank papers based on frequency and score
-    ranked_papers = sorted(result_count.keys(), key=lambda id: (result_count[id], result_scores[id]), reverse=True)
-
-    unique_papers = [next(result for result in combined_results if result['id'] == paper_id) for paper_id in ranked_papers]
-
-    return {
+            weights = dict(weight_bm25=0., weight_embedding=0.2, weight_tfidf=0.2, top_k=50)
+        if author_name:
+            # The queries are the selected papers' titles, whose embeddings the profile keeps
+            weights['embed'] = lambda queries: get_profile_embeddings(author_name, selected_papers)[0]
+
+        # The lexical ranking streams while the queries are being embedded
+        for stage, scores in iter_score_queries(category, queries, all_papers, **weights):
+            unique_papers = aggregate_query_results(all_papers, scores)
+            if stage == 'lexical':
+                yield {'type': 'partial', 'stage': stage, 'papers': unique_papers}
+
+    yield {
+        'type': 'final',
         'papers': unique_papers,
-        'keywords': keywords
+        'keywords': keywords,
+        'freshness': dict(get_watermark(category), sync_pending=cold_start_pending(category))
     }
 
+def hybrid_search_author_comparison(selected_paper_ids, author_name, category, progress=None):
+    """
+    Perform a hybrid search to compare selected papers and find similar papers.
+    
+    Args:
+    selected_paper_ids (list): A list of arXiv IDs for the selected papers.
+    author_name (str): The name of the author in the format "John Doe".
+    category (str): The arXiv category to fetch latest papers from.
+    progress (callable): Optional callback, called with the name of each stage as it starts.
+    
+    Returns:
+    dict: A dictionary containing a list of similar papers sorted by relevance, the generated keywords
+    and the freshness watermark of the category's synced data. A never-synced category returns no
+    papers, with 'sync_pending' set in the watermark while its first sync runs in the background.
+    """
+    # Errors propagate to the caller rather than becoming an 'error' event
+    for event in _iter_hybrid_search(selected_paper_ids, author_name, category, progress):
+        if event['type'] == 'final':
+            return {key: value for key, value in event.items() if key != 'type'}
+
 if __name__ == "__main__":
     category = input("Enter the arXiv subject area (e.g., cs.AI for Artificial Intelligence): ")
     author_name = input("Enter the author's name: ")
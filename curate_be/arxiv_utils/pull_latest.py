@@ -1,29 +1,38 @@
 import pprint
 from typing import Dict, List
 import arxiv
-from pinecone import Pinecone, ServerlessSpec
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from curate_be.arxiv_utils.utils import get_all_ids_from_index
+from curate_be.arxiv_utils.arxiv_client import search_results
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.embedding_cache import get_cached_embeddings, put_cached_embeddings
+from curate_be.arxiv_utils.id_ledger import get_stored_ids, upsert_vectors
+from curate_be.arxiv_utils.tracing import increment, span, traced
+from curate_be.arxiv_utils.vector_index import get_index
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get the API keys from the environment variables
-openai_api_key = os.getenv("OPENAI_API_KEY")
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
-
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=openai_api_key)
-
-# Initialize Pinecone
-pc = Pinecone(api_key=pinecone_api_key)
-
-index_name = "curate-iq"
-index = pc.Index(index_name)
+EMBEDDING_MODEL = "text-embedding-ada-002"
+# Inputs per embeddings request (the API accepts up to 2048)
+EMBEDDING_BATCH_SIZE = 256
 
+def paper_from_result(result):
+    """
+    Convert an `arxiv.Result` into the paper dictionary used throughout CurateIQ.
+    """
+    return {
+        'id': result.entry_id.split('/')[-1],
+        'title': result.title,
+        'summary': result.summary,
+        'authors': [author.name for author in result.authors],
+        'published': result.published,
+        'updated': result.updated,
+        'pdf_url': result.pdf_url
+    }
+
+@traced('arxiv.fetch')
 def fetch_latest_papers(category, max_results=300):
     """
     Fetch the latest papers from arXiv for a given category.
@@ -41,19 +50,43 @@ def fetch_latest_papers(category, max_results=300):
         max_results=max_results,
         sort_by=arxiv.SortCriterion.SubmittedDate
     )
-    papers = []
-    for result in search.results():
-        paper_info = {
-            'id': result.entry_id.split('/')[-1],
-            'title': result.title,
-            'summary': result.summary,
-            'authors': [author.name for author in result.authors],
-            'published': result.published,
-            'pdf_url': result.pdf_url
-        }
-        papers.append(paper_info)
+    papers = [paper_from_result(result) for result in search_results(search)]
     return papers
 
+@traced('embedding')
+def get_embeddings_batch(texts, model=EMBEDDING_MODEL):
+    """
+    Generate embeddings for many texts, sending many inputs per OpenAI request.
+
+    Embeddings are cached on disk by a hash of the model and text, so only texts that have never
+    been embedded before cost an API call.
+
+    Args:
+    texts (list): The texts to embed.
+    model (str): The embedding model to use.
+
+    Returns:
+    list: One embedding vector per input text, in the same order.
+    """
+    embeddings = get_cached_embeddings(model, texts)
+    missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+    increment('embedding_cache.hits', len(embeddings))
+    increment('embedding_cache.misses', len(missing))
+
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+        batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+        increment('openai.embedding_requests')
+        with span('openai.embeddings'):
+            response = get_openai_client().embeddings.create(
+                input=batch,
+                model=model
+            )
+        vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        put_cached_embeddings(model, batch, vectors)
+        embeddings.update(zip(batch, vectors))
+
+    return [embeddings[text] for text in texts]
+
 def get_embeddings(text):
     """
     Generate embeddings for the given text using OpenAI's embedding model.
@@ -64,11 +97,7 @@ def get_embeddings(text):
     Returns:
     list: The embedding vector.
     """
-    response = openai_client.embeddings.create(
-        input=text,
-        model="text-embedding-ada-002"
-    )
-    return response.data[0].embedding
+    return get_embeddings_batch([text])[0]
 
 def upsert_papers_to_pinecone(papers: List[Dict], namespace: str):
     """
@@ -78,9 +107,18 @@ def upsert_papers_to_pinecone(papers: List[Dict], namespace: str):
     papers (list): A list of dictionaries containing paper information.
     namespace (str): The namespace to insert the vectors into.
     """
+    embeddings = get_embeddings_batch([paper['title'] for paper in papers])
+    vectors = paper_vectors(papers, embeddings)
+
+    if vectors:
+        upsert_vectors(get_index(), vectors, namespace=namespace)
+
+def paper_vectors(papers, embeddings):
+    """
+    Build the vector records (ID, values and metadata) for papers and their title embeddings.
+    """
     vectors = []
-    for paper in papers:
-        embedding = get_embeddings(paper['title'])
+    for paper, embedding in zip(papers, embeddings):
         vector = {
             "id": paper['id'],
             "values": embedding,
@@ -93,9 +131,7 @@ def upsert_papers_to_pinecone(papers: List[Dict], namespace: str):
             }
         }
         vectors.append(vector)
-
-    if vectors:
-        index.upsert(vectors=vectors, namespace=namespace)
+    return vectors
 
 def pull_and_upsert_latest_papers(category, max_results=300):
     """
@@ -107,11 +143,9 @@ def pull_and_upsert_latest_papers(category, max_results=300):
     """
     papers = fetch_latest_papers(category, max_results)
     
-    ids = [paper['id'] for paper in papers]
-    stored_ids = get_all_ids_from_index(index, 1536, namespace=category)
+    stored_ids = get_stored_ids(get_index(), namespace=category)
     
-    new_papers = [id for id in ids if id not in stored_ids]
-    papers_to_upsert = [paper for paper in papers if paper['id'] in new_papers]
+    papers_to_upsert = [paper for paper in papers if paper['id'] not in stored_ids]
     upsert_papers_to_pinecone(papers_to_upsert, namespace=category)
     print(f"Upserted {len(papers_to_upsert)} new papers from category {category} to Pinecone.")
 
@@ -1,18 +1,36 @@
 from typing import Dict, List
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import os
-import arxiv
+import hashlib
 import json
-from rank_bm25 import BM25Okapi
-from curate_be.arxiv_utils.pull_latest import get_embeddings
-from sklearn.feature_extraction.text import TfidfVectorizer
+import logging
+import time
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.fulltext_cache import iter_full_texts
+from curate_be.arxiv_utils.keyword_matcher import get_matcher
+from curate_be.arxiv_utils.lexical_index import LexicalIndex, get_lexical_index
+from curate_be.arxiv_utils.paper_store import resolve_papers
+from curate_be.arxiv_utils.pull_latest import get_embeddings, get_embeddings_batch
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+from curate_be.arxiv_utils.tracing import increment, span, traced
 import numpy as np
-from arxiv2text import arxiv_to_text
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# LLM reranking: candidates reranked, prompt tokens of candidates per request, tokens of author
+# abstracts per request, and concurrent requests
+RERANK_MODEL = os.getenv("RERANK_MODEL", "gpt-4o")
+RERANK_SHORTLIST_SIZE = int(os.getenv("RERANK_SHORTLIST_SIZE", "60"))
+RERANK_CHUNK_TOKENS = int(os.getenv("RERANK_CHUNK_TOKENS", "6000"))
+RERANK_AUTHOR_TOKENS = int(os.getenv("RERANK_AUTHOR_TOKENS", "3000"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "4"))
+# Cached rerankings older than this are recomputed and removed
+RERANK_CACHE_TTL_HOURS = float(os.getenv("RERANK_CACHE_TTL_HOURS", "24"))
+# Reciprocal rank fusion constant
+RERANK_RRF_K = 60
 
 RANK_SYSTEM_MSG = """
 
@@ -57,84 +75,205 @@ MAKE SURE YOUR RESPONSE IS JSON ONLY WITH NO OTHER TEXT. I WILL BE DIRECTLY PARS
 DO NOT WRAP YOUR JSON IN ```json``` or any other text please. AT LEAST 100 OF THEM SHOULD BE SINGLE WORDS ONLY (NOT PHRASES).
 """
 
-def rank_papers(author_paper_ids, papers):
-    
-    # use arxiv api to get abstracts of selected paper ids
-    arxiv_resp = arxiv.Search(id_list=author_paper_ids)
-    # author_abstracts = [paper.summary for paper in arxiv_resp.results()]
-
+def _estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+def _paper_block(paper):
+    return f"\n\nPaper ID: {paper['id']}\n\n{paper['title']}\n\n{paper['summary']}"
+
+def shortlist_candidates(author_papers, papers, size=RERANK_SHORTLIST_SIZE):
+    """
+    Order candidates by lexical and dense similarity to the author's papers and keep the top `size`.
+
+    BM25 scores (author titles against candidate abstracts) and title embedding similarities are
+    each turned into a ranking and merged with reciprocal rank fusion.
+
+    Returns:
+    tuple: (shortlist, rest), both lists of papers in shortlist order.
+    """
+    if not author_papers or len(papers) <= 1:
+        return papers[:size], papers[size:]
+
+    queries = [paper['title'] for paper in author_papers]
+    bm25_scores = LexicalIndex(papers).bm25_scores_batch(queries).max(axis=0)
+    embeddings = np.asarray(get_embeddings_batch(queries + [paper['title'] for paper in papers]))
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    dense_scores = (embeddings[:len(queries)] @ embeddings[len(queries):].T).max(axis=0)
+
+    fused = np.zeros(len(papers))
+    for scores in (bm25_scores, dense_scores):
+        fused[np.argsort(-scores, kind='stable')] += 1.0 / (RERANK_RRF_K + 1 + np.arange(len(papers)))
+    order = np.argsort(-fused, kind='stable')
+    return [papers[i] for i in order[:size]], [papers[i] for i in order[size:]]
+
+def chunk_candidates(papers, token_budget=RERANK_CHUNK_TOKENS):
+    """
+    Split candidates into chunks whose prompts fit in `token_budget` tokens.
+
+    Papers are dealt round-robin in shortlist order, so every chunk holds a similar mix of
+    stronger and weaker candidates and positions within different chunks are comparable.
+
+    Returns:
+    list: Lists of papers.
+    """
+    total = sum(_estimate_tokens(_paper_block(paper)) for paper in papers)
+    num_chunks = max(1, -(-total // token_budget))
+    chunks = [papers[i::num_chunks] for i in range(num_chunks)]
+    return [chunk for chunk in chunks if chunk]
+
+def _author_prompt(author_papers):
     author_str = "HERE ARE THE PAPERS THAT YOU HAVE TO BASE YOUR RANKING ON:\n"
 
-    # give title and abstract of each paper
-    for paper in arxiv_resp.results():
-        author_str += f"\n\nPaper ID: {paper.entry_id}\n{paper.title}\n{paper.summary}"
+    # give title and abstract of each paper, falling back to titles once the budget is spent
+    budget = RERANK_AUTHOR_TOKENS
+    for paper in author_papers:
+        block = f"\n\nPaper ID: {paper['id']}\n{paper['title']}\n{paper['summary']}"
+        if _estimate_tokens(block) > budget:
+            block = f"\n\nPaper ID: {paper['id']}\n{paper['title']}"
+        budget -= _estimate_tokens(block)
+        author_str += block
 
     author_str += "\n\n--------------------\n\n"
     author_str += "HERE ARE THE NEW PAPERS THAT YOU ACTUALLY HAVE TO RANK:\n"
+    return author_str
+
+def _rank_chunk(author_str, papers):
+    author_str += "".join(_paper_block(paper) for paper in papers)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("RANK PROMPT: %s", author_str)
+
+    increment('openai.chat_requests')
+    with span('llm.rank'):
+        response = get_openai_client().chat.completions.create(
+            model=RERANK_MODEL,
+            messages=[
+                {"role": "system", "content": RANK_SYSTEM_MSG},
+                {"role": "user", "content": author_str + "\nMAKE SURE YOUR RESPONSE IS JSON ONLY WITH NO OTHER TEXT. I WILL BE DIRECTLY PARSING YOUR RESPONSE AS JSON."}
+            ],
+            # Room for every ID in the chunk (about 15 tokens each) plus the JSON around them
+            max_tokens=100 + 20 * len(papers),
+            response_format={"type": "json_object"}
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("RANK RESPONSE: %s", response.choices[0].message.content)
+
+    # Keep only IDs from this chunk, once each
+    chunk_ids = {paper['id'] for paper in papers}
+    ranking = json.loads(response.choices[0].message.content)["ranking"]
+    if not isinstance(ranking, list):
+        raise ValueError(f"Expected a list of paper IDs, got {type(ranking).__name__}")
+    return [id for id in dict.fromkeys(map(str, ranking)) if id in chunk_ids]
+
+def _rank_chunk_or_none(author_str, papers):
+    # One failed request (API error, invalid JSON, no "ranking") only costs its own chunk
+    try:
+        return _rank_chunk(author_str, papers)
+    except Exception as e:
+        logger.warning("Reranking a chunk of %d papers failed, keeping its shortlist order: %s", len(papers), e)
+        increment('rerank.chunk_failures')
+        return None
+
+def merge_chunk_rankings(shortlist, chunks, rankings):
+    """
+    Merge per-chunk LLM rankings into one ranking of the shortlist with reciprocal rank fusion.
+
+    A paper's LLM rank is its position within its chunk scaled by the number of chunks (chunks are
+    dealt round-robin, so position k in any chunk is roughly rank k * len(chunks) overall). Papers
+    the LLM left out rank after the rest of their chunk, and a chunk whose ranking is None (its
+    request failed) keeps its shortlist order. The shortlist order is the second vote and breaks
+    ties.
+
+    Returns:
+    list: Paper IDs, most relevant first.
+    """
+    fused = {}
+    for chunk, ranking in zip(chunks, rankings):
+        if ranking is None:
+            ranking = [paper['id'] for paper in chunk]
+        positions = {id: position for position, id in enumerate(ranking)}
+        for paper in chunk:
+            llm_rank = positions.get(paper['id'], len(chunk)) * len(chunks)
+            fused[paper['id']] = 1.0 / (RERANK_RRF_K + 1 + llm_rank)
+    for shortlist_rank, paper in enumerate(shortlist):
+        fused[paper['id']] += 1.0 / (RERANK_RRF_K + 1 + shortlist_rank)
+    return sorted(fused, key=lambda id: -fused[id])
+
+def _rerank_cache_path(author_paper_ids, shortlist):
+    key = json.dumps([RERANK_MODEL, RERANK_CHUNK_TOKENS, sorted(author_paper_ids), sorted(paper['id'] for paper in shortlist)])
+    return data_path("rerank_cache", hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+def _read_rerank_cache(path):
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+    return read_json(path) if age < RERANK_CACHE_TTL_HOURS * 3600 else None
+
+def _evict_rerank_cache(directory):
+    cutoff = time.time() - RERANK_CACHE_TTL_HOURS * 3600
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
 
-    # do the same for pulled papers
-    for paper in papers:
-        author_str += f"\n\nPaper ID: {paper['id']}\n\n{paper['title']}\n\n{paper['summary']}"
-
-    print(author_str)
-
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": RANK_SYSTEM_MSG},
-            {"role": "user", "content": author_str + "\nMAKE SURE YOUR RESPONSE IS JSON ONLY WITH NO OTHER TEXT. I WILL BE DIRECTLY PARSING YOUR RESPONSE AS JSON."}
-        ],
-        max_tokens=2000,
-        response_format={"type": "json_object"}
-    )
-
-    print(response.choices[0].message.content)
-
-    return json.loads(response.choices[0].message.content)["ranking"]
-
-def bm25_search(papers, query):
+def rank_papers(author_paper_ids, papers):
+    """
+    Rank candidate papers by relevance to an author's selected papers with the LLM.
+
+    Only a shortlist of RERANK_SHORTLIST_SIZE candidates is reranked. It is split into chunks of at
+    most RERANK_CHUNK_TOKENS prompt tokens, ranked concurrently, and merged with
+    `merge_chunk_rankings`; a chunk whose request fails keeps its shortlist order. A ranking with
+    no failed chunks is cached on disk per selection and shortlist for RERANK_CACHE_TTL_HOURS, so
+    a repeat feed costs no LLM requests.
+
+    Args:
+    author_paper_ids (list): IDs of the author's selected papers.
+    papers (list): Candidate paper dictionaries.
+
+    Returns:
+    list: Every candidate's ID; the reranked shortlist first, then the rest in shortlist order.
+    """
+    # get abstracts of selected paper ids, from the local metadata store where possible
+    author_papers = resolve_papers(author_paper_ids)
+    shortlist, rest = shortlist_candidates(author_papers, papers)
+    if not shortlist:
+        return []
+
+    cache_path = _rerank_cache_path(author_paper_ids, shortlist)
+    ranking = _read_rerank_cache(cache_path)
+    if ranking is not None:
+        increment('rerank_cache.hits')
+    else:
+        increment('rerank_cache.misses')
+        author_str = _author_prompt(author_papers)
+        chunks = chunk_candidates(shortlist)
+        with ThreadPoolExecutor(max_workers=min(RERANK_WORKERS, len(chunks))) as executor:
+            rankings = list(executor.map(lambda chunk: _rank_chunk_or_none(author_str, chunk), chunks))
+        ranking = merge_chunk_rankings(shortlist, chunks, rankings)
+        # A fallback ranking is not cached, so the next request asks the LLM again
+        if all(chunk_ranking is not None for chunk_ranking in rankings):
+            write_json(cache_path, ranking)
+            _evict_rerank_cache(os.path.dirname(cache_path))
+
+    return ranking + [paper['id'] for paper in rest]
+
+def bm25_search(papers, query, lexical_index=None):
     # tokenized_corpus = [arxiv_to_text(paper['pdf_url']) for paper in papers]
-    tokenized_corpus = [paper['summary'].split() for paper in papers]
-    bm25 = BM25Okapi(tokenized_corpus)
-    tokenized_query = query.split()
-    bm25_scores = bm25.get_scores(tokenized_query)
+    if lexical_index is None:
+        lexical_index = LexicalIndex(papers)
+    bm25_scores = lexical_index.bm25_scores(query)
     return bm25_scores
 
-def tfidf_search(papers, query, top_k=10):
-    # Prepare the corpus and vectorizer
-    # corpus = [arxiv_to_text(paper['pdf_url']) for paper in papers]
-    corpus = [paper['summary'] for paper in papers]
-    vectorizer = TfidfVectorizer().fit(corpus)
-    
-    # Transform the corpus and query to TF-IDF vectors
-    tfidf_matrix = vectorizer.transform(corpus)
-    query_vector = vectorizer.transform([query])
-    
-    # Calculate cosine similarity between query and documents
-    cosine_similarities = np.dot(tfidf_matrix, query_vector.T).toarray().flatten()
-    
-    # Get top_k results
-    top_indices = np.argsort(cosine_similarities)[-top_k:][::-1]
-    tfidf_scores = cosine_similarities[top_indices]
-    
-    # Prepare the results
-    results = [{'id': papers[i]['id'], 'score': tfidf_scores[j], 'metadata': papers[i]} for j, i in enumerate(top_indices)]
-    return results
-
+@traced('keywords.match')
 def keyword_matching_score(papers, keywords):
-    keyword_scores = []
-    keywords = [keyword.lower() for keyword in keywords]
-
-    for paper in papers:
-        summary = paper['summary'].lower()
-        score = sum(summary.count(keyword) for keyword in keywords)
-        keyword_scores.append(score)
-        # pdf_url = paper['pdf_url']
-        # if pdf_url:
-        #     pdf_text = arxiv_to_text(pdf_url)
-        #     score = sum(pdf_text.count(keyword) for keyword in keywords)
-        #     keyword_scores.append(score)
-
+    # One pass per summary with a matcher compiled once per keyword set
+    matcher = get_matcher(keywords)
+    keyword_scores = matcher.count_many([paper['summary'] for paper in papers]).tolist()
     return keyword_scores
 
 
@@ -173,73 +312,230 @@ def keyword_matching_score(papers, keywords):
 #     print("COMBINED RESULTS: ", combined_results)
 #     return combined_results[:top_k]
 
+def normalize_scores(scores, mask=None):
+    """
+    Scale a score array to [-1, 1] by its largest magnitude (over `mask`, if given).
+    """
+    candidates = scores[mask] if mask is not None else scores
+    peak = np.abs(candidates).max() if candidates.size else 0
+    return scores / peak if peak > 0 else np.zeros_like(scores, dtype=float)
+
+def fuse_scores(component_scores, weights, candidates, top_k):
+    """
+    Combine per-document score arrays with weights and pick the top-k candidates.
+
+    Args:
+    component_scores (dict): Maps a score name to an array aligned with document positions.
+    weights (dict): Maps the same names to their weights.
+    candidates (np.ndarray): Boolean mask of the documents eligible to be returned.
+    top_k (int): How many documents to return.
+
+    Returns:
+    tuple: (positions of the top documents by descending combined score, combined scores,
+    weighted normalized component scores)
+    """
+    weighted = {
+        name: weights[name] * normalize_scores(np.asarray(scores, dtype=float), candidates)
+        for name, scores in component_scores.items()
+    }
+    combined = np.sum(list(weighted.values()), axis=0)
+
+    candidate_positions = np.flatnonzero(candidates)
+    k = min(top_k, len(candidate_positions))
+    if k == 0:
+        return candidate_positions[:0], combined, weighted
+    top = candidate_positions[np.argpartition(-combined[candidate_positions], k - 1)[:k]]
+    top = top[np.argsort(-combined[top], kind='stable')]
+    return top, combined, weighted
+
 def combined_search(index, category, query, papers, keywords=None, weight_bm25=0.2, weight_embedding=0.3, weight_tfidf=0.4, weight_keyword=0.1, top_k=20):
     query_embedding = get_embeddings(query)
-    bm25_scores = bm25_search(papers, query)
-    tfidf_results = tfidf_search(papers, query, top_k)
+    lexical_index = get_lexical_index(category, papers)
+    with span('lexical.score'):
+        bm25_scores = bm25_search(papers, query, lexical_index)
+        tfidf_scores = lexical_index.tfidf_scores(query)
     if keywords:
         keyword_scores = keyword_matching_score(papers, keywords)
-    print("BM25 SCORES: ", bm25_scores)
-    print("TF-IDF RESULTS: ", tfidf_results)
-    # print("KEYWORD SCORES: ", keyword_scores)
-
-    pinecone_results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True,
-        namespace=category
-    )
-
-    print("PINECONE RESULTS: ", pinecone_results)
-    print('DONE')
-
-    paper_ids = [paper['id'] for paper in papers]
-    combined_results = []
-
+    else:
+        keyword_scores = np.zeros(len(papers))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("BM25 SCORES: %s", bm25_scores)
+
+    increment('vector.queries')
+    with span('vector.query'):
+        pinecone_results = index.query(
+            vector=query_embedding,
+            top_k=top_k,
+            include_metadata=False,
+            namespace=category
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("PINECONE RESULTS: %s", pinecone_results)
+
+    # Align the vector search results with document positions; only papers it returned are candidates
+    embedding_scores = np.zeros(len(papers))
+    candidates = np.zeros(len(papers), dtype=bool)
     for result in pinecone_results['matches']:
-        paper_id = result['id']
-        if paper_id in paper_ids:
-            matching_paper = papers[paper_ids.index(paper_id)]
-            bm25_score = bm25_scores[paper_ids.index(paper_id)]
-            if keywords:
-                keyword_score = keyword_scores[paper_ids.index(paper_id)]
-            tfidf_score = next((item['score'] * 100 for item in tfidf_results if item['id'] == paper_id), 0)
-            embedding_score = result['score']
-            if keywords:
-                combined_score = (weight_bm25 * bm25_score + weight_embedding * embedding_score + 
-                                  weight_tfidf * tfidf_score + weight_keyword * keyword_score)
-            else:
-                combined_score = (weight_bm25 * bm25_score + weight_embedding * embedding_score + 
-                                  weight_tfidf * tfidf_score)
-            combined_results.append({
-                'id': paper_id,
-                'combined_score': combined_score,
-                'bm25_score': bm25_score * weight_bm25,
-                'tfidf_score': tfidf_score * weight_tfidf,
-                'keyword_score': keyword_score * 0.25 if keywords else 0,
-                'embedding_score': 0.15,
-                'metadata': result['metadata']
-            })
-        else:
-            print(f"No matching paper found for paper_id: {paper_id}")
-
-    combined_results.sort(key=lambda x: x['combined_score'], reverse=True)
-    print("COMBINED RESULTS: ", combined_results)
-    return combined_results[:top_k]
-
+        position = lexical_index.positions.get(result['id'])
+        if position is None:
+            logger.debug("No matching paper found for paper_id: %s", result['id'])
+            continue
+        embedding_scores[position] = result['score']
+        candidates[position] = True
+
+    with span('fusion'):
+        top, combined, weighted = fuse_scores(
+            {'bm25': bm25_scores, 'embedding': embedding_scores, 'tfidf': tfidf_scores, 'keyword': keyword_scores},
+            {'bm25': weight_bm25, 'embedding': weight_embedding, 'tfidf': weight_tfidf, 'keyword': weight_keyword if keywords else 0},
+            candidates,
+            top_k
+        )
+
+    # Results refer back to the paper records rather than copying their metadata
+    combined_results = [{
+        'id': papers[position]['id'],
+        'combined_score': float(combined[position]),
+        'bm25_score': float(weighted['bm25'][position]),
+        'tfidf_score': float(weighted['tfidf'][position]),
+        'keyword_score': float(weighted['keyword'][position]),
+        'embedding_score': float(weighted['embedding'][position]),
+        'metadata': papers[position]
+    } for position in top]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("COMBINED RESULTS: %s", combined_results)
+    return combined_results
+
+def _fuse_query_scores(components, weights, candidates, k):
+    with span('fusion'):
+        weighted = {}
+        for name, scores in components.items():
+            peaks = np.abs(np.where(candidates, scores, 0)).max(axis=1, keepdims=True)
+            weighted[name] = weights[name] * np.divide(scores, peaks, out=np.zeros_like(scores, dtype=float), where=peaks > 0)
+        combined = np.sum(list(weighted.values()), axis=0)
+
+        # Each query's top_k candidates by combined score
+        masked = np.where(candidates, combined, -np.inf)
+        selected = np.zeros(combined.shape, dtype=bool)
+        np.put_along_axis(selected, np.argpartition(-masked, k - 1, axis=1)[:, :k], True, axis=1)
+
+    return {'combined': combined, 'weighted': weighted, 'selected': selected}
+
+def iter_score_queries(category, queries, papers, keywords=None, weight_bm25=0.2, weight_embedding=0.3, weight_tfidf=0.4, weight_keyword=0.1, top_k=20, embed=None):
+    """
+    Score many queries against a category's papers at once, first from lexical scores alone.
+
+    Lexical and dense scores for every query are computed as single (queries x papers) matrix
+    products. Dense scores use the papers' title embeddings (the vectors synced into the
+    namespace), kept as a matrix with the category's lexical index, so only the queries are
+    embedded per request. As in `combined_search`, each query's
+    candidates are its `top_k` papers by embedding similarity, and each query keeps its `top_k`
+    candidates by combined score.
+
+    Before the queries are embedded (an OpenAI request unless they are cached), a provisional
+    result is yielded that ranks every paper by the lexical and keyword scores only.
+
+    Args:
+    category (str): The arXiv category being searched.
+    queries (list): The query strings, e.g. the titles of the selected papers.
+    papers (list): The category's synced papers.
+    keywords (list): Optional keywords for keyword matching.
+    top_k (int): How many papers each query contributes.
+    embed (callable): Returns the query embeddings given the queries, e.g. from a stored author
+        profile; `get_embeddings_batch` by default.
+
+    Yields:
+    tuple: ('lexical', scores), then ('full', scores). The scores are dicts of (queries x papers)
+    arrays: 'combined' scores, 'weighted' component scores by name, and the boolean 'selected'
+    mask of each query's top_k papers.
+    """
+    lexical_index = get_lexical_index(category, papers)
+    with span('lexical.score'):
+        bm25_scores = lexical_index.bm25_scores_batch(queries)
+        tfidf_scores = lexical_index.tfidf_scores_batch(queries)
+    if keywords:
+        keyword_scores = np.tile(np.asarray(keyword_matching_score(papers, keywords), dtype=float), (len(queries), 1))
+    else:
+        keyword_scores = np.zeros((len(queries), len(papers)))
+
+    k = min(top_k, len(papers))
+    weights = {'bm25': weight_bm25, 'embedding': weight_embedding, 'tfidf': weight_tfidf, 'keyword': weight_keyword if keywords else 0}
+    components = {'bm25': bm25_scores, 'embedding': np.zeros(bm25_scores.shape), 'tfidf': tfidf_scores, 'keyword': keyword_scores}
+    yield 'lexical', _fuse_query_scores(components, weights, np.ones(bm25_scores.shape, dtype=bool), k)
+
+    # Cosine similarity of every query embedding to the title embeddings stored with the index
+    query_vectors = np.array((embed or get_embeddings_batch)(list(queries)), dtype=np.float32)
+    with span('vector.query'):
+        query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+        components['embedding'] = query_vectors @ lexical_index.title_vectors.T
+
+        # Each query's candidates are its top_k papers by embedding similarity, like the vector query
+        candidates = np.zeros(components['embedding'].shape, dtype=bool)
+        np.put_along_axis(candidates, np.argpartition(-components['embedding'], k - 1, axis=1)[:, :k], True, axis=1)
+
+    yield 'full', _fuse_query_scores(components, weights, candidates, k)
+
+def score_queries(category, queries, papers, keywords=None, weight_bm25=0.2, weight_embedding=0.3, weight_tfidf=0.4, weight_keyword=0.1, top_k=20):
+    """
+    Score many queries against a category's papers at once; see `iter_score_queries`.
+
+    Returns:
+    dict: (queries x papers) arrays: 'combined' scores, 'weighted' component scores by name, and
+    the boolean 'selected' mask of each query's top_k papers.
+    """
+    stages = dict(iter_score_queries(category, queries, papers, keywords, weight_bm25, weight_embedding, weight_tfidf, weight_keyword, top_k))
+    return stages['full']
+
+@traced('fusion.aggregate')
+def aggregate_query_results(papers, scores):
+    """
+    Rank papers across queries by how many queries returned them, then by summed combined score.
+
+    Args:
+    papers (list): The papers the scores are aligned with.
+    scores (dict): The output of `score_queries`.
+
+    Returns:
+    list: Result dictionaries in ranked order, each carrying the scores from the first query
+    that returned it.
+    """
+    combined = scores['combined']
+    weighted = scores['weighted']
+    selected = scores['selected']
+
+    # Aggregate in one pass: how many queries returned each paper, and its summed combined score
+    counts = selected.sum(axis=0)
+    score_sums = np.where(selected, combined, 0).sum(axis=0)
+    first_query = selected.argmax(axis=0)
+    returned = np.flatnonzero(counts)
+    ranked = returned[np.lexsort((-score_sums[returned], -counts[returned]))]
+
+    return [{
+        'id': papers[position]['id'],
+        'combined_score': float(combined[first_query[position], position]),
+        'bm25_score': float(weighted['bm25'][first_query[position], position]),
+        'tfidf_score': float(weighted['tfidf'][first_query[position], position]),
+        'keyword_score': float(weighted['keyword'][first_query[position], position]),
+        'embedding_score': float(weighted['embedding'][first_query[position], position]),
+        'metadata': papers[position]
+    } for position in ranked]
+
+@traced('keywords.generate')
 def generate_kw(papers):
     # given some papers, show them to GPT and get a list of keywords
     author_str = "Here are the papers that you have to generate keywords for:\n"
 
-    # give title and abstract of each paper
+    # give title and full text of each paper
+    texts = dict((paper['id'], text) for paper, text in iter_full_texts(papers))
     for paper in papers:
-        author_str += f"\n\nPaper ID: {paper['id']}\n{paper['title']}\n{arxiv_to_text(paper['pdf_url'])}"
+        author_str += f"\n\nPaper ID: {paper['id']}\n{paper['title']}\n{texts.get(paper['id']) or paper['summary']}"
 
     author_str += "\n\n--------------------\n\n"
     author_str += "Please generate 200 keywords. Make your response in JSON please. Do not use overly general keywords please like 'large language model' or 'method' or 'model'."
     author_str += "Make sure the keywords are MAX 2 WORDS. AT LEAST 100 OF THEM SHOULD BE SINGLE WORDS ONLY (NOT PHRASES)."
 
-    response = client.chat.completions.create(
+    increment('openai.chat_requests')
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": KW_SYSTEM_MSG},
@@ -251,12 +547,16 @@ def generate_kw(papers):
 
     return json.loads(response.choices[0].message.content)["keywords"]
 
-def extract_keywords(papers, top_n=10):
+@traced('keywords.extract')
+def extract_keywords(papers, top_n=10, texts=None):
 
-    # use full paper text
-    text = " ".join([arxiv_to_text(paper['pdf_url']) for paper in papers])
+    # use full paper text (texts maps paper ID to full text, fetched here if not given)
+    if texts is None:
+        texts = dict((paper['id'], text) for paper, text in iter_full_texts(papers) if text)
+    text = " ".join([texts[paper['id']] for paper in papers if paper['id'] in texts])
 
-    # Create a TF-IDF Vectorizer
+    # Create a TF-IDF Vectorizer (sklearn is imported on first use to keep startup fast)
+    from sklearn.feature_extraction.text import TfidfVectorizer
     vectorizer = TfidfVectorizer(stop_words='english', max_features=top_n)
     # Fit and transform the text
     tfidf_matrix = vectorizer.fit_transform([text])
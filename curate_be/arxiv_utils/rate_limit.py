@@ -0,0 +1,41 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# arXiv asks API clients for no more than one request every three seconds, across all threads
+ARXIV_MIN_INTERVAL_SECONDS = float(os.getenv("ARXIV_MIN_INTERVAL_SECONDS", "3"))
+
+class RateLimiter:
+    """
+    Spaces calls at least `min_interval` seconds apart across every thread that shares it.
+
+    Each caller reserves the next free slot under the lock and then sleeps outside it, so waiting
+    threads are released in order, one per interval.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, requests=1):
+        """
+        Block until `requests` requests may be sent.
+
+        Returns:
+        float: How long the caller waited, in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval * requests
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+# The process-wide arXiv API budget
+arxiv_limiter = RateLimiter(ARXIV_MIN_INTERVAL_SECONDS)
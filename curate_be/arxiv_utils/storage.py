@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Root directory for everything CurateIQ keeps on local disk (paper stores, caches, ledgers)
+DATA_DIR = os.getenv("CURATE_DATA_DIR", os.path.join(os.getcwd(), ".curate_data"))
+
+def data_path(*parts):
+    """
+    Build a path inside the local data directory, creating parent directories as needed.
+
+    Args:
+    *parts (str): Path components relative to the data directory.
+
+    Returns:
+    str: The absolute path.
+
+    Raises:
+    ValueError: If the path resolves outside the data directory, e.g. through "..".
+    """
+    path = os.path.join(DATA_DIR, *parts)
+    # Parts often come from request parameters (categories, paper IDs)
+    root = os.path.realpath(DATA_DIR)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root:
+        raise ValueError(f"{os.path.join(*parts)!r} is outside the data directory")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def file_version(path):
+    """
+    Identify the current contents of a file written by `write_json`, or None if it does not exist.
+
+    Every write replaces the file, so the inode changes even when two writes land within one
+    mtime tick.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def read_json(path, default=None):
+    """
+    Read a JSON file, returning `default` if it does not exist or cannot be parsed.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+def write_json(path, obj):
+    """
+    Atomically write `obj` as JSON so readers never see a half-written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
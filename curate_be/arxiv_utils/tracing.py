@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Recent durations kept per span name for the percentile estimates
+TRACING_SPAN_SAMPLES = int(os.getenv("TRACING_SPAN_SAMPLES", "1024"))
+
+logger = logging.getLogger(__name__)
+
+_started_at = time.time()
+# name -> {'count', 'total', 'max', 'errors', 'samples'}
+_spans = {}
+# name -> number
+_counters = {}
+_lock = threading.Lock()
+
+def record_duration(name, seconds, error=False):
+    """
+    Record one timed occurrence of a span.
+    """
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'errors': 0, 'samples': deque(maxlen=TRACING_SPAN_SAMPLES)}
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        stats['errors'] += error
+        stats['samples'].append(seconds)
+
+@contextmanager
+def span(name):
+    """
+    Time a block of code under `name`, e.g. `with span('vector.query'): ...`.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        record_duration(name, seconds, error)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span %s took %.1fms%s", name, seconds * 1000, " (failed)" if error else "")
+
+def traced(name):
+    """
+    Decorator form of `span`.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(name, value=1):
+    """
+    Add `value` to the counter `name`, e.g. upstream calls or cache hits.
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+def get_metrics():
+    """
+    Snapshot every span and counter recorded by this process.
+
+    Returns:
+    dict: 'spans' maps each name to its count, errors and total/mean/max seconds, with p50/p95
+    over the most recent TRACING_SPAN_SAMPLES occurrences; 'counters' maps each name to its value.
+    """
+    with _lock:
+        spans = {name: dict(stats, samples=sorted(stats['samples'])) for name, stats in _spans.items()}
+        counters = dict(_counters)
+
+    return {
+        'uptime_seconds': round(time.time() - _started_at, 3),
+        'pid': os.getpid(),
+        'spans': {name: {
+            'count': stats['count'],
+            'errors': stats['errors'],
+            'total_seconds': round(stats['total'], 6),
+            'mean_seconds': round(stats['total'] / stats['count'], 6),
+            'p50_seconds': round(_percentile(stats['samples'], 0.5), 6),
+            'p95_seconds': round(_percentile(stats['samples'], 0.95), 6),
+            'max_seconds': round(stats['max'], 6)
+        } for name, stats in sorted(spans.items())},
+        'counters': {name: round(value, 6) if isinstance(value, float) else value for name, value in sorted(counters.items())}
+    }
+
+def reset_metrics():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
@@ -0,0 +1,37 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "pinecone" (default) or "local" for the in-process LocalIndex
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "curate-iq")
+
+_indexes = {}
+_lock = threading.Lock()
+
+def get_index(index_name=INDEX_NAME):
+    """
+    Get the shared vector index for the configured backend.
+
+    Every module uses the same instance, so writes made through one module are visible to the
+    others (which matters for the local backend). A `LocalIndex` also reloads any namespace another
+    process has rewritten on disk, so the web process sees vectors written by the sync scripts.
+
+    Args:
+    index_name (str): The name of the index.
+
+    Returns:
+    The Pinecone `Index` or a `LocalIndex` with the same interface.
+    """
+    with _lock:
+        if index_name not in _indexes:
+            if VECTOR_BACKEND == "local":
+                from curate_be.arxiv_utils.local_index import LocalIndex
+                _indexes[index_name] = LocalIndex(index_name)
+            else:
+                from pinecone import Pinecone
+                pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+                _indexes[index_name] = pc.Index(index_name)
+        return _indexes[index_name]
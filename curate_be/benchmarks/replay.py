@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import json
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import curate_be.arxiv_utils.fulltext_cache as fulltext_cache
+from curate_be.arxiv_utils.arxiv_client import get_arxiv_client
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.storage import read_json, write_json
+
+# Response headers kept in recordings; the client only looks at these
+RECORDED_HEADERS = ("ETag", "Last-Modified", "Retry-After")
+
+class Cassette:
+    """
+    Recorded upstream responses, keyed by a hash of each request.
+
+    In 'record' mode every call goes to the live service and its response is stored. In 'replay'
+    mode responses come only from the recording, and a request that was never recorded raises
+    KeyError instead of reaching the network.
+    """
+
+    def __init__(self, path, mode):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.entries = read_json(path, {}) if mode == 'replay' else {}
+        if mode == 'replay' and not self.entries:
+            raise FileNotFoundError(f"No recorded responses in {path}")
+
+    def exchange(self, kind, request, live):
+        """
+        Get the response to a request: live and recorded, or replayed.
+
+        Args:
+        kind (str): The upstream, e.g. 'arxiv' or 'embeddings'.
+        request: A JSON-serializable description of the request, used as its key.
+        live (callable): Makes the live call and returns a JSON-serializable response.
+
+        Returns:
+        The recorded response.
+        """
+        key = kind + ":" + hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+        if self.mode == 'replay':
+            if key not in self.entries:
+                raise KeyError(f"No recorded {kind} response for {str(request)[:200]}; re-record the cassette")
+            return self.entries[key]
+        self.entries[key] = live()
+        return self.entries[key]
+
+    def save(self):
+        if self.mode == 'record':
+            write_json(self.path, self.entries)
+
+def _encode_array(array):
+    array = np.asarray(array, dtype=np.float32)
+    return {'shape': list(array.shape), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def _decode_array(encoded):
+    return np.frombuffer(base64.b64decode(encoded['data']), dtype=np.float32).reshape(encoded['shape'])
+
+@contextmanager
+def _patched(patches):
+    originals = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for obj, name, value in reversed(originals):
+            setattr(obj, name, value)
+
+@contextmanager
+def upstreams(arxiv_get, embeddings_create, download_pdf):
+    """
+    Swap the upstream calls CurateIQ makes for the given functions.
+
+    The vector index is not swapped: benchmarks run it on the local backend, so its cost is
+    measured rather than replayed.
+
+    Args:
+    arxiv_get (callable): Replaces the shared arXiv client's `session.get(url, **kwargs)`.
+    embeddings_create (callable): Replaces the shared OpenAI client's `embeddings.create(input, model)`.
+    download_pdf (callable): Replaces `fulltext_cache.download_pdf(pdf_url, timeout)`.
+    """
+    with _patched([
+        (get_arxiv_client()._session, 'get', arxiv_get),
+        (get_openai_client().embeddings, 'create', embeddings_create),
+        (fulltext_cache, 'download_pdf', download_pdf)
+    ]):
+        yield
+
+@contextmanager
+def cassette_upstreams(cassette):
+    """
+    Record or replay arXiv, OpenAI embedding and PDF download calls.
+
+    Args:
+    cassette (Cassette): Where responses are recorded to or replayed from.
+    """
+    live_get = get_arxiv_client()._session.get
+    live_create = get_openai_client().embeddings.create
+    live_download = fulltext_cache.download_pdf
+
+    def arxiv_get(url, **kwargs):
+        def live():
+            response = live_get(url, **kwargs)
+            return {
+                'status': response.status_code,
+                'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+                'body': base64.b64encode(response.content).decode('ascii')
+            }
+        recorded = cassette.exchange('arxiv', url, live)
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response._content = base64.b64decode(recorded['body'])
+        response.url = url
+        return response
+
+    def embeddings_create(input, model, **kwargs):
+        def live():
+            response = live_create(input=input, model=model, **kwargs)
+            return _encode_array([item.embedding for item in sorted(response.data, key=lambda item: item.index)])
+        vectors = _decode_array(cassette.exchange('embeddings', [model, input], live))
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=vector.tolist()) for i, vector in enumerate(vectors)])
+
+    def download_pdf(pdf_url, timeout=fulltext_cache.FULLTEXT_TIMEOUT_SECONDS):
+        def live():
+            return base64.b64encode(live_download(pdf_url, timeout)).decode('ascii')
+        return base64.b64decode(cassette.exchange('pdf', pdf_url, live))
+
+    with upstreams(arxiv_get, embeddings_create, download_pdf):
+        yield
@@ -0,0 +1,290 @@
+"""
+Latency benchmarks for the search pipeline, runnable without arXiv, OpenAI or Pinecone.
+
+Modes:
+    synthetic  Synthetic corpora of each --sizes, with fake embeddings and a fake arXiv API.
+    record     Live arXiv, OpenAI and PDF calls for --category, saved to --cassette.
+    replay     The same benchmarks as record, answered from --cassette.
+
+Every mode also times importing the Flask app in fresh interpreters without credentials, which is
+what a gunicorn worker pays at boot. With --max-startup-seconds the run exits non-zero if that
+import is slower, or if it loads a module that should wait for the first request.
+
+The vector index always runs on the local backend in a fresh data directory, so its cost is
+measured rather than replayed. Results (per-stage wall time percentiles, cold first-run time and
+tracemalloc allocations) are printed as JSON, tagged with the git commit, for tracking across
+commits.
+
+    python3 -m curate_be.benchmarks.run --sizes 50,500,5000 --out bench.json
+    python3 -m curate_be.benchmarks.run --sizes 50 --repeat 3 --max-startup-seconds 1.5
+    python3 -m curate_be.benchmarks.run --mode record --category cs.CL --author "Jane Doe" \\
+        --selected 2306.04050v2,2305.11206v1 --cassette cs_cl.json
+    python3 -m curate_be.benchmarks.run --mode replay --category cs.CL --author "Jane Doe" \\
+        --selected 2306.04050v2,2305.11206v1 --cassette cs_cl.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+import numpy as np
+
+def summarize(samples):
+    """
+    Summarize timing samples in seconds.
+
+    Returns:
+    dict: p50, p95, mean, min and max, rounded to microseconds.
+    """
+    samples = np.asarray(samples, dtype=float)
+    return {
+        'p50': round(float(np.percentile(samples, 50)), 6),
+        'p95': round(float(np.percentile(samples, 95)), 6),
+        'mean': round(float(samples.mean()), 6),
+        'min': round(float(samples.min()), 6),
+        'max': round(float(samples.max()), 6)
+    }
+
+def _timed_run(fn, before=None):
+    if before is not None:
+        before()
+    marks = []
+    start = time.perf_counter()
+    fn(lambda stage: marks.append((stage, time.perf_counter())))
+    end = time.perf_counter()
+    bounds = [mark[1] for mark in marks] + [end]
+    stages = {stage: bounds[i + 1] - at for i, (stage, at) in enumerate(marks)}
+    return end - start, stages
+
+def measure(name, fn, repeat, before=None, **labels):
+    """
+    Run a benchmark `repeat` times (plus one cold run and one traced run) and summarize it.
+
+    Args:
+    name (str): The benchmark name.
+    fn (callable): Runs the benchmark once; called with a `progress(stage)` callback that marks
+        where each stage starts.
+    repeat (int): Timed warm runs.
+    before (callable): Called before every run, outside the timing, e.g. to clear a cache.
+    **labels: Extra fields for the result, e.g. the corpus size.
+
+    Returns:
+    dict: The benchmark's results.
+    """
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        cold_wall, _ = _timed_run(fn, before)
+        runs = [_timed_run(fn, before) for _ in range(repeat)]
+
+        if before is not None:
+            before()
+        tracemalloc.start()
+        fn(lambda stage: None)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stage_names = list(dict.fromkeys(stage for _, stages in runs for stage in stages))
+    result = dict(labels, benchmark=name, runs=repeat)
+    result['cold_seconds'] = round(cold_wall, 6)
+    result['wall_seconds'] = summarize([wall for wall, _ in runs])
+    result['stages'] = {stage: summarize([stages.get(stage, 0.0) for _, stages in runs]) for stage in stage_names}
+    result['allocations'] = {'peak_bytes': peak, 'retained_bytes': current}
+    print(f"{name} {labels}: p50 {result['wall_seconds']['p50'] * 1000:.1f}ms, p95 {result['wall_seconds']['p95'] * 1000:.1f}ms, "
+          f"cold {cold_wall * 1000:.1f}ms, peak {peak / 2 ** 20:.1f}MiB", file=sys.stderr)
+    return result
+
+# Only imported once a request needs them; importing app.py must not load any of these
+DEFERRED_MODULES = ("openai", "pinecone", "sklearn", "scipy", "rank_bm25", "arxiv2text", "pdfminer")
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+print(json.dumps({'seconds': time.perf_counter() - start, 'loaded': [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+def measure_startup(repeat):
+    """
+    Time `import app` in `repeat` fresh interpreters, with no API keys and the default backend.
+
+    Returns:
+    dict: The benchmark's results, including any DEFERRED_MODULES the import loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {key: value for key, value in os.environ.items() if key not in ('OPENAI_API_KEY', 'PINECONE_API_KEY', 'VECTOR_BACKEND')}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=root, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {'benchmark': 'startup', 'runs': repeat}
+    result['import_seconds'] = summarize([run['seconds'] for run in runs])
+    result['deferred_modules_loaded'] = sorted({name for run in runs for name in run['loaded']})
+    print(f"startup: p50 {result['import_seconds']['p50'] * 1000:.1f}ms, p95 {result['import_seconds']['p95'] * 1000:.1f}ms, "
+          f"eagerly loaded {result['deferred_modules_loaded'] or 'nothing deferred'}", file=sys.stderr)
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def pipeline_benchmarks(category, corpus, author_name, author_papers, repeat, fetch_max_results, **labels):
+    """
+    Benchmark fetch_latest_papers, combined_search and hybrid_search_author_comparison against a
+    category whose namespace, paper store and lexical index are seeded from `corpus`.
+    """
+    from curate_be.arxiv_utils.arxiv_client import get_arxiv_client
+    from curate_be.arxiv_utils.lexical_index import build_lexical_index
+    from curate_be.arxiv_utils.paper_store import save_category_papers
+    from curate_be.arxiv_utils.pull_author_info import hybrid_search_author_comparison
+    from curate_be.arxiv_utils.pull_latest import fetch_latest_papers, upsert_papers_to_pinecone
+    from curate_be.arxiv_utils.rank import combined_search, extract_keywords
+    from curate_be.arxiv_utils.vector_index import get_index
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        upsert_papers_to_pinecone(corpus, namespace=category)
+        save_category_papers(category, corpus)
+        build_lexical_index(category, corpus)
+        keywords = [keyword for keyword, _ in extract_keywords(author_papers)]
+
+    index = get_index()
+    query = author_papers[0]['title']
+    selected_ids = [paper['id'] for paper in author_papers]
+    return [
+        measure('fetch_latest_papers', lambda progress: fetch_latest_papers(category, max_results=fetch_max_results),
+                repeat, before=lambda: get_arxiv_client()._cache.clear(), **labels),
+        measure('combined_search', lambda progress: combined_search(index, category, query, corpus, keywords), repeat, **labels),
+        measure('hybrid_search_author_comparison',
+                lambda progress: hybrid_search_author_comparison(selected_ids, author_name, category, progress=progress), repeat, **labels)
+    ]
+
+def keyword_matching_benchmarks(corpus, repeat, keyword_counts=(10, 40, 200, 1000)):
+    """
+    Benchmark both KeywordMatcher strategies, `str.count` per keyword and the automaton, on the
+    summaries of `corpus` for each keyword count. AUTOMATON_MIN_KEYWORDS should sit where the
+    automaton starts winning.
+    """
+    from curate_be.arxiv_utils.keyword_matcher import KeywordMatcher
+    from curate_be.benchmarks.synthetic import _vocabulary
+
+    summaries = [paper['summary'] for paper in corpus]
+    vocabulary = _vocabulary()
+    results = []
+    for keyword_count in keyword_counts:
+        # Spread over the vocabulary, so the keywords mix common and rare words
+        keywords = vocabulary[::max(len(vocabulary) // keyword_count, 1)][:keyword_count]
+        for strategy, use_automaton in (('str.count', False), ('automaton', True)):
+            matcher = KeywordMatcher(keywords, use_automaton=use_automaton)
+            results.append(measure('keyword_matching', lambda progress: matcher.count_many(summaries), repeat,
+                                   size=len(corpus), keywords=keyword_count, strategy=strategy))
+    return results
+
+def run_synthetic(sizes, repeat):
+    from curate_be.arxiv_utils.fulltext_cache import put_cached_text
+    from curate_be.arxiv_utils.paper_store import remember_papers
+    from curate_be.benchmarks.replay import upstreams
+    from curate_be.benchmarks.synthetic import SyntheticArxiv, fake_embeddings_create, make_corpus
+
+    corpora = {f"bench.{size}": make_corpus(size, seed=size) for size in sizes}
+    author_papers = make_corpus(5, seed=1, id_prefix="2312")
+    remember_papers(author_papers)
+    for paper in author_papers:
+        # Full texts are cached up front, so no PDF is ever downloaded
+        put_cached_text(paper['id'], " ".join([paper['summary']] * 20))
+
+    def no_pdf(pdf_url, timeout=None):
+        raise RuntimeError(f"Synthetic benchmarks should not download {pdf_url}")
+
+    results = []
+    with upstreams(SyntheticArxiv(corpora).get, fake_embeddings_create, no_pdf):
+        for size in sizes:
+            category = f"bench.{size}"
+            results += pipeline_benchmarks(category, corpora[category], "Synthetic Author", author_papers, repeat,
+                                           fetch_max_results=min(size, 300), size=size)
+    results += keyword_matching_benchmarks(corpora[f"bench.{sizes[0]}"], repeat)
+    return results
+
+def run_cassette(mode, cassette_path, category, author_name, selected_ids, max_results, repeat):
+    from curate_be.arxiv_utils.paper_store import resolve_papers
+    from curate_be.arxiv_utils.pull_latest import fetch_latest_papers
+    from curate_be.benchmarks.replay import Cassette, cassette_upstreams
+
+    cassette = Cassette(cassette_path, mode)
+    try:
+        with cassette_upstreams(cassette):
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                corpus = fetch_latest_papers(category, max_results=max_results)
+                author_papers = resolve_papers(selected_ids)
+            return pipeline_benchmarks(category, corpus, author_name, author_papers, repeat,
+                                       fetch_max_results=max_results, size=len(corpus))
+    finally:
+        cassette.save()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CurateIQ search pipeline offline.")
+    parser.add_argument('--mode', choices=['synthetic', 'record', 'replay'], default='synthetic')
+    parser.add_argument('--sizes', default="50,500,5000", help="Synthetic corpus sizes, comma separated")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed warm runs per benchmark")
+    parser.add_argument('--category', default="cs.CL")
+    parser.add_argument('--author', default="")
+    parser.add_argument('--selected', default="", help="Selected paper IDs for record/replay, comma separated")
+    parser.add_argument('--max-results', type=int, default=300)
+    parser.add_argument('--cassette', help="Recording file for record/replay")
+    parser.add_argument('--out', help="Write the JSON results here instead of stdout")
+    parser.add_argument('--max-startup-seconds', type=float,
+                        help="Fail if importing the app takes longer than this (p50), or loads a deferred module")
+    args = parser.parse_args(argv)
+    if args.mode != 'synthetic' and not (args.cassette and args.selected):
+        parser.error("record and replay need --cassette and --selected")
+
+    # Isolate every run: fresh local data and the local vector backend, set before curate_be is imported
+    data_dir = tempfile.mkdtemp(prefix="curate-bench-")
+    os.environ['CURATE_DATA_DIR'] = data_dir
+    os.environ['VECTOR_BACKEND'] = 'local'
+    if args.mode != 'record':
+        # Nothing leaves the process, so there is no arXiv request budget to respect
+        os.environ['ARXIV_MIN_INTERVAL_SECONDS'] = '0'
+        os.environ.setdefault('OPENAI_API_KEY', 'offline')
+
+    startup = measure_startup(max(args.repeat, 3))
+    if args.mode == 'synthetic':
+        sizes = [int(size) for size in args.sizes.split(',')]
+        results = run_synthetic(sizes, args.repeat)
+    else:
+        cassette = os.path.abspath(args.cassette)
+        results = run_cassette(args.mode, cassette, args.category, args.author,
+                               [paper_id for paper_id in args.selected.split(',') if paper_id], args.max_results, args.repeat)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'mode': args.mode,
+        'data_dir': data_dir,
+        'results': [startup] + results
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.max_startup_seconds is not None:
+        if startup['import_seconds']['p50'] > args.max_startup_seconds or startup['deferred_modules_loaded']:
+            print(f"Startup regression: p50 {startup['import_seconds']['p50']:.3f}s (limit {args.max_startup_seconds}s), "
+                  f"eagerly loaded {startup['deferred_modules_loaded']}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
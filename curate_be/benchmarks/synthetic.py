@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+import numpy as np
+import requests
+
+EMBEDDING_DIMENSION = 1536
+VOCABULARY_SIZE = 5000
+
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vi", "so", "pe", "gra", "tri", "on", "ex", "al", "ux", "dor"]
+
+def _vocabulary(size=VOCABULARY_SIZE):
+    words = []
+    i = 0
+    while len(words) < size:
+        n, word = i, ""
+        while True:
+            word += _SYLLABLES[n % len(_SYLLABLES)]
+            n //= len(_SYLLABLES)
+            if n == 0:
+                break
+        if len(word) > 2:
+            words.append(word)
+        i += 1
+    return words
+
+def make_corpus(n, seed=0, id_prefix="2401"):
+    """
+    Build `n` synthetic papers, newest first.
+
+    Words are drawn from a fixed vocabulary with a Zipf-like distribution, so term statistics look
+    like natural text. Titles have 6-14 words and abstracts 120-220.
+
+    Args:
+    n (int): The number of papers.
+    seed (int): Random seed; the same seed gives the same corpus.
+    id_prefix (str): Prefix of the generated arXiv IDs.
+
+    Returns:
+    list: Paper dictionaries in the shape `paper_from_result` produces.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(_vocabulary())
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+    papers = []
+    for i in range(n):
+        title = " ".join(rng.choice(vocabulary, size=rng.integers(6, 15), p=weights))
+        summary = " ".join(rng.choice(vocabulary, size=rng.integers(120, 221), p=weights))
+        paper_id = f"{id_prefix}.{i:05d}v1"
+        published = now - timedelta(minutes=10 * i)
+        papers.append({
+            'id': paper_id,
+            'title': title,
+            'summary': summary,
+            'authors': [f"Author {rng.integers(0, 1000)}" for _ in range(rng.integers(1, 6))],
+            'published': published,
+            'updated': published,
+            'pdf_url': f"http://arxiv.org/pdf/{paper_id}"
+        })
+    return papers
+
+def fake_embedding(text, dimension=EMBEDDING_DIMENSION):
+    """
+    A deterministic unit vector for a text, standing in for an embedding API response.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dimension)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def fake_embeddings_create(input, model, **kwargs):
+    """
+    Drop-in for `get_openai_client().embeddings.create` that returns `fake_embedding`s.
+    """
+    texts = [input] if isinstance(input, str) else input
+    return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=fake_embedding(text)) for i, text in enumerate(texts)])
+
+def _atom_entry(paper):
+    return (
+        "<entry>"
+        f"<id>http://arxiv.org/abs/{paper['id']}</id>"
+        f"<updated>{paper['updated'].strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>"
+        f"<published>{paper['published'].strftime('%Y-%m-%dT%H:%M:%SZ')}</published>"
+        f"<title>{escape(paper['title'])}</title>"
+        f"<summary>{escape(paper['summary'])}</summary>"
+        + "".join(f"<author><name>{escape(name)}</name></author>" for name in paper['authors'])
+        + f'<link href="http://arxiv.org/abs/{paper["id"]}" rel="alternate" type="text/html"/>'
+        f'<link title="pdf" href="{paper["pdf_url"]}" rel="related" type="application/pdf"/>'
+        '<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.CL"/>'
+        '<category term="cs.CL"/>'
+        "</entry>"
+    )
+
+def atom_feed(papers, total_results):
+    """
+    Render papers as an arXiv API Atom response page.
+    """
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        f"<opensearch:totalResults>{total_results}</opensearch:totalResults>"
+        + "".join(_atom_entry(paper) for paper in papers)
+        + "</feed>"
+    ).encode('utf-8')
+
+class SyntheticArxiv:
+    """
+    Answers arXiv API URLs from synthetic corpora, for use in place of the arXiv client's
+    `session.get`. `cat:` queries page through the category's corpus; `id_list` queries look
+    papers up by ID.
+    """
+
+    def __init__(self, corpora):
+        self.corpora = corpora
+        self.by_id = {paper['id']: paper for papers in corpora.values() for paper in papers}
+
+    def get(self, url, **kwargs):
+        args = {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+        start, page_size = int(args.get('start', 0)), int(args.get('max_results', 100))
+        if args.get('id_list'):
+            matched = [self.by_id[paper_id] for paper_id in args['id_list'].split(',') if paper_id in self.by_id]
+        else:
+            category = args.get('search_query', '').replace('cat:', '')
+            matched = self.corpora.get(category, [])
+        response = requests.Response()
+        response.status_code = 200
+        response._content = atom_feed(matched[start:start + page_size], len(matched))
+        response.url = url
+        return response
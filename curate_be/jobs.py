@@ -0,0 +1,87 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Background workers for long-running searches, and how long finished jobs stay pollable
+SEARCH_JOB_WORKERS = int(os.getenv("SEARCH_JOB_WORKERS", "2"))
+SEARCH_JOB_TTL_SECONDS = float(os.getenv("SEARCH_JOB_TTL_SECONDS", "3600"))
+
+# Jobs live in this process's memory, so status requests must reach the worker that took the POST
+_executor = ThreadPoolExecutor(max_workers=SEARCH_JOB_WORKERS, thread_name_prefix="search-job")
+_jobs = {}
+_lock = threading.Lock()
+
+def _update(job_id, **fields):
+    with _lock:
+        job = _jobs[job_id]
+        job.update(fields)
+        job['updated_at'] = time.time()
+
+def _prune():
+    cutoff = time.time() - SEARCH_JOB_TTL_SECONDS
+    with _lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job['status'] in ('done', 'failed') and job['updated_at'] < cutoff]:
+            del _jobs[job_id]
+
+def _run(job_id, fn, args, kwargs):
+    _update(job_id, status='running', started_at=time.time())
+
+    def progress(stage):
+        with _lock:
+            job = _jobs[job_id]
+            job['stage'] = stage
+            job['stages'].append({'stage': stage, 'at': time.time() - job['started_at']})
+            job['updated_at'] = time.time()
+
+    try:
+        result = fn(*args, progress=progress, **kwargs)
+        _update(job_id, status='done', stage='done', result=result)
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        _update(job_id, status='failed', error=str(e))
+
+def submit_job(fn, *args, **kwargs):
+    """
+    Run `fn(*args, progress=..., **kwargs)` on the background worker pool.
+
+    `fn` reports its progress by calling `progress(stage_name)`.
+
+    Returns:
+    str: The job ID to poll with `get_job`.
+    """
+    _prune()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _lock:
+        _jobs[job_id] = {
+            'id': job_id,
+            'status': 'queued',
+            'stage': None,
+            'stages': [],
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'started_at': None,
+            'updated_at': now
+        }
+    _executor.submit(_run, job_id, fn, args, kwargs)
+    return job_id
+
+def get_job(job_id):
+    """
+    Get a snapshot of a job's status, current stage, stage timings and (once done) its result.
+
+    Returns:
+    dict: The job, or None if it is unknown or has expired.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job, stages=list(job['stages'])) if job else None
@@ -0,0 +1,110 @@
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+
+load_dotenv()
+
+# Requests carrying this token (X-Profile-Token header or profileToken parameter) are profiled; unset disables profiling
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+# Sampling stops after this long even if the request has not finished
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def profiling_requested(token):
+    """
+    Check a client-supplied profiling token against PROFILE_TOKEN.
+    """
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token.encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack every PROFILE_SAMPLE_INTERVAL_MS from a background thread.
+
+    Samples are wall-clock, so time spent waiting (on arXiv, OpenAI, Pinecone or the PDF parsing
+    pool) shows up as well as time spent computing. Nothing is installed in the sampled thread, so
+    it runs at full speed apart from the sampler's share of the GIL.
+    """
+
+    def __init__(self, thread_id=None, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+        self.profile_id = uuid.uuid4().hex
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.started_at = None
+        self.duration = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.profile_id[:8]}", daemon=True)
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.duration is None:
+            self._stop.set()
+            self._thread.join()
+            self.duration = time.time() - self.started_at
+        return self
+
+    def _run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self):
+        """
+        The samples as collapsed stacks ("outer;...;inner count" per line), the input format of
+        flamegraph.pl and speedscope.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+def save_profile(profiler, **details):
+    """
+    Stop a profiler and store its samples under the data directory.
+
+    Args:
+    profiler (SamplingProfiler): The profiler.
+    **details: Extra fields to store with it, e.g. the request path.
+    """
+    profiler.stop()
+    write_json(data_path("profiles", f"{profiler.profile_id}.json"), dict(
+        details,
+        id=profiler.profile_id,
+        started_at=profiler.started_at,
+        duration_seconds=round(profiler.duration, 6),
+        interval_seconds=profiler.interval,
+        samples=sum(profiler.stacks.values()),
+        collapsed=profiler.collapsed()
+    ))
+
+def load_profile(profile_id):
+    """
+    Load a stored profile.
+
+    Returns:
+    dict: The profile, or None if there is no profile with this ID.
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return read_json(data_path("profiles", f"{profile_id}.json"))
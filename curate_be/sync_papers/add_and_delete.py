@@ -1,7 +1,13 @@
 import os
+import re
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from pinecone import Pinecone
 from curate_be.arxiv_utils.pull_latest import fetch_latest_papers, upsert_papers_to_pinecone
+from curate_be.arxiv_utils.id_ledger import delete_all_vectors, delete_vectors
+from curate_be.arxiv_utils.lexical_index import build_lexical_index
+from curate_be.arxiv_utils.paper_store import load_category_papers, save_category_papers
+from curate_be.arxiv_utils.tracing import traced
+from curate_be.arxiv_utils.vector_index import get_index
 # from curate_be.sync_papers.add_papers import arxiv_categories
 
 # arxiv_categories = [
@@ -33,46 +39,132 @@ arxiv_categories = ["cs.CL"]
 # Load environment variables
 load_dotenv()
 
-# Initialize Pinecone
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# Get the index name from environment variable or set it directly
-index_name = os.getenv("PINECONE_INDEX_NAME", "curate-iq")
-
-# Initialize the index
-index = pc.Index(index_name)
+# Retention window for a category's namespace: the newest SYNC_RETENTION_SIZE papers, optionally
+# also limited to papers published within the last SYNC_RETENTION_DAYS days
+SYNC_RETENTION_SIZE = int(os.getenv("SYNC_RETENTION_SIZE", "50"))
+SYNC_RETENTION_DAYS = float(os.getenv("SYNC_RETENTION_DAYS")) if os.getenv("SYNC_RETENTION_DAYS") else None
 
 def delete_all_records_from_namespace(index, namespace):
     try:
-        stats = index.describe_index_stats()
-    
-        results = index.query(vector=[0]*1536, top_k=600, include_values=False, namespace=namespace)
-        ids_to_delete = [match.id for match in results.matches]
-        
-        index.delete(ids=ids_to_delete, namespace=namespace)
-        print(f"Deleted {len(ids_to_delete)} vectors from namespace {namespace}")
+        deleted = delete_all_vectors(index, namespace)
+        print(f"Deleted {deleted} vectors from namespace {namespace}")
     except Exception as e:
         print(f"Error deleting all records from namespace {namespace}: {e}")
 
-def update_namespace(index, category):
+def base_paper_id(paper_id):
+    """
+    Strip the version suffix from an arXiv ID, e.g. "2306.04050v2" -> "2306.04050".
+    """
+    return re.sub(r'v\d+$', '', paper_id)
+
+def plan_sync(stored_papers, fetched_papers, retention_size=SYNC_RETENTION_SIZE, retention_days=SYNC_RETENTION_DAYS, now=None):
+    """
+    Diff freshly fetched papers against the papers stored in a namespace.
+
+    A fetched paper needs an upsert if it is new, if it is a new version of a stored paper, or if
+    its `updated` timestamp is newer than the stored one. Stored papers are only evicted when they
+    fall out of the retention window or are replaced by a newer version. Papers marked
+    'backfilled' (see `oai_harvest.backfill_category`) are outside the retention window and kept.
+
+    Args:
+    stored_papers (list): The papers currently synced into the namespace.
+    fetched_papers (list): The papers just fetched from arXiv.
+    retention_size (int): How many of the newest papers to keep.
+    retention_days (float): If set, also drop papers published more than this many days ago.
+    now (datetime): The reference time for `retention_days`. Defaults to now.
+
+    Returns:
+    tuple: (papers to upsert, IDs to delete, papers kept in the namespace after the sync)
+    """
+    stored_by_base = {base_paper_id(paper['id']): paper for paper in stored_papers}
+
+    merged = dict(stored_by_base)
+    to_upsert = {}
+    for paper in fetched_papers:
+        base_id = base_paper_id(paper['id'])
+        stored = stored_by_base.get(base_id)
+        revised = stored is not None and (
+            stored['id'] != paper['id']
+            or (stored.get('updated') and paper.get('updated') and paper['updated'] > stored['updated'])
+        )
+        if stored is None or revised:
+            to_upsert[base_id] = paper
+        merged[base_id] = dict(paper, backfilled=True) if stored is not None and stored.get('backfilled') else paper
+
+    # Backfilled papers were harvested on purpose, so only the synced window is subject to retention
+    kept = sorted((paper for paper in merged.values() if not paper.get('backfilled')), key=lambda paper: paper['published'], reverse=True)
+    if retention_days is not None:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+        kept = [paper for paper in kept if paper['published'] >= cutoff]
+    backfilled = [paper for paper in merged.values() if paper.get('backfilled')]
+    kept = sorted(kept[:retention_size] + backfilled, key=lambda paper: paper['published'], reverse=True)
+
+    kept_ids = {paper['id'] for paper in kept}
+    ids_to_delete = [paper['id'] for paper in stored_papers if paper['id'] not in kept_ids]
+    papers_to_upsert = [paper for paper in to_upsert.values() if paper['id'] in kept_ids]
+    return papers_to_upsert, ids_to_delete, kept
+
+def sync_namespace(index, category, max_results=50):
+    """
+    Incrementally sync a category's namespace with the latest arXiv papers.
+
+    Only new or revised papers are embedded and upserted, and only papers that aged out of the
+    retention window are deleted. A category that has never been synced gets a full rebuild.
+
+    Args:
+    index: The vector index holding the namespace.
+    category (str): The arXiv category (also the namespace).
+    max_results (int): How many of the latest papers to fetch from arXiv.
+    """
+    stored_papers = load_category_papers(category)
+    if stored_papers is None:
+        update_namespace(index, category, incremental=False)
+        return
+
+    fetched_papers = fetch_latest_papers(category, max_results=max_results)
+    papers_to_upsert, ids_to_delete, kept = plan_sync(stored_papers, fetched_papers)
+
+    upsert_papers_to_pinecone(papers_to_upsert, namespace=category)
+    delete_vectors(index, ids_to_delete, namespace=category)
+
+    save_category_papers(category, kept)
+    build_lexical_index(category, kept)
+    print(f"Synced namespace {category}: upserted {len(papers_to_upsert)}, deleted {len(ids_to_delete)}, kept {len(kept)}")
+
+@traced('sync.namespace')
+def update_namespace(index, category, incremental=True):
+    if incremental:
+        sync_namespace(index, category)
+        return
+
     print(f"Updating namespace: {category}")
-    
-    # Delete all records in the current namespace
-    delete_all_records_from_namespace(index, category)
-    
+
     # Fetch latest papers for the category
     papers = fetch_latest_papers(category, max_results=50)
+    if not papers:
+        # Nothing to search, so leave the namespace and the stored corpus as they are
+        print(f"No papers found for {category}; namespace left unchanged")
+        return
+
+    # Delete all records in the current namespace
+    delete_all_records_from_namespace(index, category)
     
     # Upsert new papers to Pinecone
     upsert_papers_to_pinecone(papers, namespace=category)
+
+    # Record what is now in the namespace so the search path can serve from it without re-syncing
+    save_category_papers(category, papers)
+    build_lexical_index(category, papers)
     
     print(f"Updated namespace {category} with {len(papers)} new papers")
 
 def update_all_namespaces(index):
-    for category in arxiv_categories:
-        update_namespace(index, category)
+    # Categories sync concurrently, sharing one arXiv request budget, and a failed run resumes where it stopped
+    from curate_be.sync_papers.sync_worker import print_report, run_sync
+    print_report(run_sync(arxiv_categories, index=index, checkpoint_name="update_all_namespaces"))
 
 if __name__ == "__main__":
+    index = get_index()
     # update_all_namespaces(index)
     update_namespace(index, "cs.CL")
 
@@ -1,4 +1,4 @@
-from curate_be.arxiv_utils.pull_latest import pull_and_upsert_latest_papers
+from curate_be.sync_papers.sync_worker import print_report, run_sync
 
 arxiv_categories = [
     "cs.AI", "cs.AR", "cs.CC", "cs.CE", "cs.CG", "cs.CL", "cs.CR", "cs.CV", "cs.CY", "cs.DB",
@@ -26,7 +26,7 @@ arxiv_categories = [
 ]
 
 if __name__ == "__main__":
-    for category in arxiv_categories:
-        pull_and_upsert_latest_papers(category)
+    # Same as pull_and_upsert_latest_papers for every category, but concurrent and rate limited
+    print_report(run_sync(arxiv_categories, max_results=300, prune=False, checkpoint_name="add_papers"))
 
     # python3 -m curate_be.sync_papers.add_papers
\ No newline at end of file
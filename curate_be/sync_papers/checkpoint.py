@@ -0,0 +1,124 @@
+import os
+import shutil
+import threading
+import time
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.paper_store import decode_paper, encode_paper
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+
+load_dotenv()
+
+# Papers per checkpointed batch: each batch is embedded, upserted and recorded as one unit
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "100"))
+# An unfinished run older than this is discarded instead of resumed, since its fetched papers are stale
+SYNC_CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("SYNC_CHECKPOINT_MAX_AGE_HOURS", "24"))
+
+class SyncCheckpoint:
+    """
+    Durable progress record for a named sync run, so a failed run can resume where it stopped.
+
+    Each category gets its own file under `sync_checkpoints/<name>/`, written atomically after
+    every step: the fetched plan (papers to upsert, IDs to delete, papers kept), then each batch
+    as it is embedded and upserted, then the category as done. Embeddings themselves live in the
+    embedding cache, so re-embedding a batch that was embedded but not upserted costs no API call.
+    """
+
+    def __init__(self, name, max_age_hours=SYNC_CHECKPOINT_MAX_AGE_HOURS):
+        self.name = name
+        self._lock = threading.Lock()
+        self._categories = {}
+        run = read_json(self._run_path())
+        if run is not None and time.time() - run['started_at'] > max_age_hours * 3600:
+            print(f"Discarding stale checkpoint for sync run {name}")
+            self.complete()
+            run = None
+        if run is None:
+            write_json(self._run_path(), {'name': name, 'started_at': time.time()})
+        else:
+            print(f"Resuming sync run {name}")
+
+    def _run_path(self):
+        return data_path("sync_checkpoints", self.name, "_run.json")
+
+    def _category_path(self, category):
+        return data_path("sync_checkpoints", self.name, f"{category}.json")
+
+    def _load(self, category):
+        if category not in self._categories:
+            self._categories[category] = read_json(self._category_path(category))
+        return self._categories[category]
+
+    def _save(self, category):
+        write_json(self._category_path(category), self._categories[category])
+
+    def get_plan(self, category):
+        """
+        Get a category's recorded plan.
+
+        Returns:
+        dict: 'fetched', 'papers_to_upsert', 'ids_to_delete', 'kept' and 'batches' (one
+            {'embedded', 'upserted'} dict per batch), or None if the category was not fetched yet.
+        """
+        with self._lock:
+            state = self._load(category)
+            if state is None:
+                return None
+            return {
+                'fetched': state['fetched'],
+                'papers_to_upsert': [decode_paper(dict(paper)) for paper in state['papers_to_upsert']],
+                'ids_to_delete': list(state['ids_to_delete']),
+                'kept': [decode_paper(dict(paper)) for paper in state['kept']],
+                'batches': [dict(batch) for batch in state['batches']]
+            }
+
+    def save_plan(self, category, fetched, papers_to_upsert, ids_to_delete, kept):
+        """
+        Record what a category's sync has to write, right after fetching it.
+        """
+        num_batches = (len(papers_to_upsert) + SYNC_BATCH_SIZE - 1) // SYNC_BATCH_SIZE
+        with self._lock:
+            self._categories[category] = {
+                'fetched': fetched,
+                'papers_to_upsert': [encode_paper(paper) for paper in papers_to_upsert],
+                'ids_to_delete': list(ids_to_delete),
+                'kept': [encode_paper(paper) for paper in kept],
+                'batches': [{'embedded': False, 'upserted': False} for _ in range(num_batches)],
+                'done': False
+            }
+            self._save(category)
+
+    def mark_batch(self, category, batch_index, stage):
+        """
+        Record that a batch finished a stage ('embedded' or 'upserted').
+        """
+        with self._lock:
+            self._load(category)['batches'][batch_index][stage] = True
+            self._save(category)
+
+    def mark_done(self, category):
+        with self._lock:
+            self._load(category)['done'] = True
+            self._save(category)
+
+    def is_done(self, category):
+        with self._lock:
+            state = self._load(category)
+            return state is not None and state['done']
+
+    def complete(self):
+        """
+        Remove the checkpoint once the whole run has succeeded.
+        """
+        with self._lock:
+            self._categories = {}
+            shutil.rmtree(data_path("sync_checkpoints", self.name, ""), ignore_errors=True)
+
+def batch_slices(num_papers):
+    """
+    Split `num_papers` papers into the checkpoint's batches.
+
+    Returns:
+    list: One slice per batch.
+    """
+    return [slice(start, start + SYNC_BATCH_SIZE) for start in range(0, num_papers, SYNC_BATCH_SIZE)]
@@ -0,0 +1,239 @@
+import os
+import random
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.id_ledger import delete_vectors, upsert_vectors
+from curate_be.arxiv_utils.lexical_index import build_lexical_index
+from curate_be.arxiv_utils.paper_store import load_category_papers, remember_papers, save_category_papers
+from curate_be.arxiv_utils.pull_latest import get_embeddings_batch, paper_vectors
+from curate_be.arxiv_utils.storage import data_path, read_json, write_json
+from curate_be.arxiv_utils.vector_index import get_index
+from curate_be.sync_papers.add_and_delete import base_paper_id
+
+load_dotenv()
+
+# arXiv's OAI-PMH endpoint; point it at a local fixture server for testing
+OAI_BASE_URL = os.getenv("OAI_BASE_URL", "https://oaipmh.arxiv.org/oai")
+# Papers embedded and upserted together; get_embeddings_batch splits them into API-sized requests
+OAI_EMBED_BATCH_SIZE = int(os.getenv("OAI_EMBED_BATCH_SIZE", "2000"))
+OAI_NUM_RETRIES = int(os.getenv("OAI_NUM_RETRIES", "5"))
+OAI_TIMEOUT_SECONDS = float(os.getenv("OAI_TIMEOUT_SECONDS", "120"))
+
+OAI_NS = "{http://www.openarchives.org/OAI/2.0/}"
+RAW_NS = "{http://arxiv.org/OAI/arXivRaw/}"
+
+# Archives that OAI-PMH groups under the "physics" set
+PHYSICS_ARCHIVES = {
+    "astro-ph", "cond-mat", "gr-qc", "hep-ex", "hep-lat", "hep-ph", "hep-th", "math-ph", "nlin",
+    "nucl-ex", "nucl-th", "physics", "quant-ph"
+}
+
+def oai_set_for_category(category):
+    """
+    Map an arXiv category to the OAI-PMH set that contains it, e.g. "cs.CL" -> "cs" and
+    "hep-th" -> "physics:hep-th". Sets are per archive, so records are filtered by category after.
+    """
+    archive = category.split('.')[0]
+    return f"physics:{archive}" if archive in PHYSICS_ARCHIVES else archive
+
+def _text(element, tag):
+    child = element.find(RAW_NS + tag)
+    return " ".join(child.text.split()) if child is not None and child.text else ""
+
+def _split_authors(authors):
+    # arXivRaw authors are free text: "A. Smith, B. Jones and C. Lee"
+    names = re.split(r',\s*|\s+and\s+', authors)
+    return [name.strip() for name in names if name.strip()]
+
+def paper_from_record(record):
+    """
+    Convert an arXivRaw OAI-PMH record into the paper dictionary used throughout CurateIQ.
+
+    Returns:
+    dict: The paper, or None for deleted records and records without version dates.
+    """
+    header = record.find(OAI_NS + "header")
+    if header is not None and header.get("status") == "deleted":
+        return None
+    raw = record.find(f"{OAI_NS}metadata/{RAW_NS}arXivRaw")
+    if raw is None:
+        return None
+
+    versions = raw.findall(RAW_NS + "version")
+    try:
+        dates = [parsedate_to_datetime(_text(version, "date")) for version in versions]
+    except (TypeError, ValueError):
+        dates = []
+    if not dates:
+        # Every paper is ordered and pruned by its publication date, so an undated record is unusable
+        return None
+    paper_id = _text(raw, "id") + versions[-1].get("version")
+    return {
+        'id': paper_id,
+        'title': _text(raw, "title"),
+        'summary': _text(raw, "abstract"),
+        'authors': _split_authors(_text(raw, "authors")),
+        'published': dates[0],
+        'updated': dates[-1],
+        'pdf_url': f"http://arxiv.org/pdf/{paper_id}",
+        'categories': _text(raw, "categories").split()
+    }
+
+def _get(session, params):
+    for try_index in range(OAI_NUM_RETRIES + 1):
+        try:
+            response = session.get(OAI_BASE_URL, params=params, timeout=OAI_TIMEOUT_SECONDS)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if try_index == OAI_NUM_RETRIES:
+                raise
+            print(f"OAI-PMH request failed (try {try_index}): {e}")
+            time.sleep(random.uniform(0, 5 * 2 ** try_index))
+            continue
+        # OAI-PMH flow control: 503 with Retry-After tells the harvester when to come back
+        if response.status_code == 503 and try_index < OAI_NUM_RETRIES:
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else random.uniform(0, 5 * 2 ** try_index)
+            print(f"OAI-PMH asked us to wait {delay:.0f}s")
+            time.sleep(delay)
+            continue
+        response.raise_for_status()
+        return response.content
+
+def harvest_records(oai_set, from_date=None, until_date=None):
+    """
+    Harvest arXivRaw records for a set, following resumption tokens page by page.
+
+    Args:
+    oai_set (str): The OAI-PMH set, e.g. "cs".
+    from_date (date): Only records added or changed on or after this date.
+    until_date (date): Only records added or changed on or before this date.
+
+    Yields:
+    tuple: (list of papers on the page, the largest header datestamp on the page)
+    """
+    params = {"verb": "ListRecords", "metadataPrefix": "arXivRaw", "set": oai_set}
+    if from_date:
+        params["from"] = from_date.isoformat()
+    if until_date:
+        params["until"] = until_date.isoformat()
+
+    with requests.Session() as session:
+        while True:
+            root = ET.fromstring(_get(session, params))
+            error = root.find(OAI_NS + "error")
+            if error is not None:
+                if error.get("code") == "noRecordsMatch":
+                    return
+                raise RuntimeError(f"OAI-PMH error {error.get('code')}: {error.text}")
+
+            records = root.findall(f"{OAI_NS}ListRecords/{OAI_NS}record")
+            papers = [paper for paper in map(paper_from_record, records) if paper is not None]
+            datestamps = [record.findtext(f"{OAI_NS}header/{OAI_NS}datestamp") for record in records]
+            yield papers, max(filter(None, datestamps), default=None)
+
+            token = root.find(f"{OAI_NS}ListRecords/{OAI_NS}resumptionToken")
+            if token is None or not (token.text or "").strip():
+                return
+            params = {"verb": "ListRecords", "resumptionToken": token.text.strip()}
+
+def _watermark_path(category):
+    return data_path("oai_harvest", f"{category}.json")
+
+def _updated_key(paper):
+    # Stored and harvested papers may lack 'updated' or mix naive and aware datetimes
+    updated = paper.get('updated') or ''
+    if isinstance(updated, str):
+        if not updated:
+            return ''
+        updated = datetime.fromisoformat(updated)
+    if updated.tzinfo is None:
+        updated = updated.replace(tzinfo=timezone.utc)
+    return updated.astimezone(timezone.utc).isoformat()
+
+def _flush(index, category, batch):
+    embeddings = get_embeddings_batch([paper['title'] for paper in batch])
+    upsert_vectors(index, paper_vectors(batch, embeddings), namespace=category)
+
+def backfill_category(category, from_date=None, until_date=None, index=None):
+    """
+    Backfill a category from OAI-PMH: store every harvested paper, embed them in large batches, and
+    upsert them into the category's namespace.
+
+    Without `from_date`, the harvest continues from the last datestamp a previous backfill of the
+    category reached. The category's paper store and lexical index are extended with the harvested
+    papers, so search covers them too. They are marked 'backfilled', which exempts them from the
+    retention pruning of later syncs (see SYNC_RETENTION_SIZE and SYNC_RETENTION_DAYS).
+
+    Args:
+    category (str): The arXiv category (also the namespace).
+    from_date (date): Harvest records from this date.
+    until_date (date): Harvest records up to this date.
+    index: The vector index. Defaults to the configured index.
+
+    Returns:
+    int: The number of papers harvested into the category.
+    """
+    index = index or get_index()
+    watermark = read_json(_watermark_path(category), {})
+    if from_date is None and watermark.get('datestamp'):
+        from_date = date.fromisoformat(watermark['datestamp'])
+
+    harvested = {}
+    batch = []
+    newest_datestamp = watermark.get('datestamp')
+    started = time.monotonic()
+    for page, datestamp in harvest_records(oai_set_for_category(category), from_date, until_date):
+        papers = [paper for paper in page if category in paper.pop('categories')]
+        remember_papers(papers)
+        for paper in papers:
+            harvested[base_paper_id(paper['id'])] = paper
+        batch.extend(papers)
+        if len(batch) >= OAI_EMBED_BATCH_SIZE:
+            _flush(index, category, batch)
+            batch = []
+        if datestamp and (newest_datestamp is None or datestamp > newest_datestamp):
+            newest_datestamp = datestamp
+        print(f"Harvested {len(harvested)} {category} papers ({time.monotonic() - started:.0f}s)")
+    if batch:
+        _flush(index, category, batch)
+
+    # Merge into the search corpus, keeping the newest version of each paper
+    corpus = {base_paper_id(paper['id']): paper for paper in load_category_papers(category) or []}
+    superseded = []
+    for base_id, paper in harvested.items():
+        stored = corpus.get(base_id)
+        if stored is None or _updated_key(paper) >= _updated_key(stored):
+            if stored is not None and stored['id'] != paper['id']:
+                superseded.append(stored['id'])
+            corpus[base_id] = dict(paper, backfilled=True)
+        else:
+            # The older harvested version was already upserted above
+            if stored['id'] != paper['id']:
+                superseded.append(paper['id'])
+            corpus[base_id] = dict(stored, backfilled=True)
+    delete_vectors(index, superseded, namespace=category)
+    kept = sorted(corpus.values(), key=lambda paper: paper['published'], reverse=True)
+    save_category_papers(category, kept)
+    build_lexical_index(category, kept)
+
+    write_json(_watermark_path(category), {
+        'datestamp': newest_datestamp,
+        'harvested_at': datetime.now(timezone.utc).isoformat()
+    })
+    print(f"Backfilled {category}: {len(harvested)} papers harvested, {len(kept)} in corpus")
+    return len(harvested)
+
+if __name__ == "__main__":
+    category = sys.argv[1]
+    from_date = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    until_date = date.fromisoformat(sys.argv[3]) if len(sys.argv) > 3 else None
+    backfill_category(category, from_date, until_date)
+
+    # python3 -m curate_be.sync_papers.oai_harvest cs.CL 2024-01-01 [2024-06-30]
@@ -0,0 +1,238 @@
+import os
+import queue
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+from curate_be.arxiv_utils.id_ledger import delete_vectors, get_stored_ids, upsert_vectors
+from curate_be.arxiv_utils.lexical_index import build_lexical_index
+from curate_be.arxiv_utils.paper_store import load_category_papers, save_category_papers
+from curate_be.arxiv_utils.pull_latest import fetch_latest_papers, get_embeddings_batch, paper_vectors
+from curate_be.arxiv_utils.vector_index import get_index
+from curate_be.sync_papers.add_and_delete import plan_sync
+from curate_be.sync_papers.checkpoint import SyncCheckpoint, batch_slices
+
+load_dotenv()
+
+# Threads per stage. Fetchers mostly wait on the shared arXiv budget (see arxiv_client), so a few
+# are enough to keep the embed and upsert stages busy
+SYNC_FETCH_WORKERS = int(os.getenv("SYNC_FETCH_WORKERS", "4"))
+SYNC_EMBED_WORKERS = int(os.getenv("SYNC_EMBED_WORKERS", "2"))
+SYNC_UPSERT_WORKERS = int(os.getenv("SYNC_UPSERT_WORKERS", "2"))
+
+_DONE = object()
+
+def _fetch_stage(index, category, max_results, prune, checkpoint=None):
+    """
+    Fetch a category's latest papers and plan what the sync has to write.
+
+    A category whose plan is already in the checkpoint is not fetched again.
+
+    Returns:
+    dict: The category's work item for the embed stage.
+    """
+    plan = checkpoint.get_plan(category) if checkpoint else None
+    if plan is not None:
+        plan.update(category=category, resumed=True)
+        return plan
+
+    # Every page request draws from the process-wide arXiv budget
+    fetched = fetch_latest_papers(category, max_results=max_results)
+
+    stored = load_category_papers(category)
+    if prune:
+        papers_to_upsert, ids_to_delete, kept = plan_sync(stored or [], fetched)
+        if stored is None:
+            # Never synced through the paper store, so the ledger is the only record of the namespace
+            kept_ids = {paper['id'] for paper in kept}
+            ids_to_delete = sorted(get_stored_ids(index, namespace=category) - kept_ids)
+    else:
+        stored = stored or []
+        papers_to_upsert, _, kept = plan_sync(stored, fetched, retention_size=len(stored) + len(fetched), retention_days=None)
+        stored_ids = get_stored_ids(index, namespace=category)
+        papers_to_upsert = [paper for paper in papers_to_upsert if paper['id'] not in stored_ids]
+        ids_to_delete = []
+
+    if checkpoint:
+        checkpoint.save_plan(category, len(fetched), papers_to_upsert, ids_to_delete, kept)
+    return {
+        'category': category,
+        'fetched': len(fetched),
+        'papers_to_upsert': papers_to_upsert,
+        'ids_to_delete': ids_to_delete,
+        'kept': kept,
+        'batches': [{'embedded': False, 'upserted': False} for _ in batch_slices(len(papers_to_upsert))],
+        'resumed': False
+    }
+
+def _embed_stage(item, checkpoint=None):
+    papers = item['papers_to_upsert']
+    item['vectors'] = {}
+    for batch_index, batch in enumerate(batch_slices(len(papers))):
+        if item['batches'][batch_index]['upserted']:
+            continue
+        # A batch embedded before a restart is served from the embedding cache
+        embeddings = get_embeddings_batch([paper['title'] for paper in papers[batch]])
+        item['vectors'][batch_index] = paper_vectors(papers[batch], embeddings)
+        if checkpoint and not item['batches'][batch_index]['embedded']:
+            checkpoint.mark_batch(item['category'], batch_index, 'embedded')
+    return item
+
+def _upsert_stage(index, item, checkpoint=None):
+    category = item['category']
+    for batch_index, vectors in sorted(item['vectors'].items()):
+        upsert_vectors(index, vectors, namespace=category)
+        if checkpoint:
+            checkpoint.mark_batch(category, batch_index, 'upserted')
+    delete_vectors(index, item['ids_to_delete'], namespace=category)
+    save_category_papers(category, item['kept'])
+    build_lexical_index(category, item['kept'])
+    if checkpoint:
+        checkpoint.mark_done(category)
+    return item
+
+def run_sync(categories, index=None, max_results=50, prune=True, checkpoint_name=None,
+             fetch_workers=SYNC_FETCH_WORKERS, embed_workers=SYNC_EMBED_WORKERS, upsert_workers=SYNC_UPSERT_WORKERS):
+    """
+    Sync many categories concurrently, with fetching, embedding and upserting as separate stages.
+
+    Fetch threads share the arXiv client's global rate limiter, so adding fetchers never exceeds arXiv's
+    request budget. Bounded queues between stages keep fetchers from running far ahead of the
+    embedding and upsert stages. A category that fails is reported and skipped; the rest carry on.
+
+    With a `checkpoint_name`, progress is checkpointed per category and per batch. Rerunning with
+    the same name after a failure skips finished categories and continues each unfinished one
+    from its last upserted batch, without fetching or embedding anything again. The checkpoint
+    is removed once every category has synced.
+
+    Args:
+    categories (list): The arXiv categories (also the namespaces) to sync.
+    index: The vector index. Defaults to the configured index.
+    max_results (int): How many of the latest papers to fetch per category.
+    prune (bool): If True, keep only the retention window in each namespace (as
+        `sync_namespace` does). If False, only add papers that are not stored yet.
+    checkpoint_name (str): If set, checkpoint the run under this name and resume it if it exists.
+    fetch_workers (int): Threads fetching from arXiv.
+    embed_workers (int): Threads computing embeddings.
+    upsert_workers (int): Threads writing to the vector index and the paper store.
+
+    Returns:
+    dict: Per-category stats under 'categories', plus run totals.
+    """
+    index = index or get_index()
+    checkpoint = SyncCheckpoint(checkpoint_name) if checkpoint_name else None
+    started = time.monotonic()
+    stats = {category: {'status': 'queued'} for category in categories}
+    stats_lock = threading.Lock()
+
+    def record(category, **fields):
+        with stats_lock:
+            stats[category].update(fields)
+
+    def timed(category, stage, fn, *args):
+        stage_start = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            record(category, **{f'{stage}_seconds': round(time.monotonic() - stage_start, 3)})
+
+    todo = queue.Queue()
+    for category in categories:
+        todo.put(category)
+    to_embed = queue.Queue(maxsize=max(1, embed_workers * 2))
+    to_upsert = queue.Queue(maxsize=max(1, upsert_workers * 2))
+
+    def worker(source, handle, sink):
+        while True:
+            item = source.get()
+            if item is _DONE:
+                return
+            category = item if isinstance(item, str) else item['category']
+            try:
+                result = handle(category, item)
+            except Exception as e:
+                print(f"Sync failed for {category}: {e}")
+                record(category, status='failed', error=str(e), finished_at=time.monotonic())
+                continue
+            if sink is not None and result is not None:
+                sink.put(result)
+
+    def fetch(category, _):
+        if checkpoint and checkpoint.is_done(category):
+            record(category, status='done', resumed=True)
+            return None
+        record(category, status='running', started_at=time.monotonic())
+        item = timed(category, 'fetch', _fetch_stage, index, category, max_results, prune, checkpoint)
+        record(category, fetched=item['fetched'], resumed=item['resumed'])
+        return item
+
+    def embed(category, item):
+        return timed(category, 'embed', _embed_stage, item, checkpoint)
+
+    def upsert(category, item):
+        timed(category, 'upsert', _upsert_stage, index, item, checkpoint)
+        upserted = sum(len(vectors) for vectors in item['vectors'].values())
+        record(category, status='done', upserted=upserted, deleted=len(item['ids_to_delete']),
+               kept=len(item['kept']), finished_at=time.monotonic())
+        print(f"Synced {category}: upserted {upserted}, deleted {len(item['ids_to_delete'])}, kept {len(item['kept'])}")
+
+    stages = [
+        (fetch_workers, todo, fetch, to_embed),
+        (embed_workers, to_embed, embed, to_upsert),
+        (upsert_workers, to_upsert, upsert, None)
+    ]
+    # Start every stage, then shut them down front to back once each upstream stage has drained
+    pools = []
+    for workers, source, handle, sink in stages:
+        threads = [threading.Thread(target=worker, args=(source, handle, sink), daemon=True) for _ in range(max(1, workers))]
+        for thread in threads:
+            thread.start()
+        pools.append((threads, source))
+    for threads, source in pools:
+        for _ in threads:
+            source.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.monotonic() - started
+    for category_stats in stats.values():
+        if 'started_at' in category_stats and 'finished_at' in category_stats:
+            wall = category_stats.pop('finished_at') - category_stats.pop('started_at')
+            category_stats['wall_seconds'] = round(wall, 3)
+            category_stats['papers_per_second'] = round(category_stats.get('fetched', 0) / wall, 2) if wall > 0 else None
+        category_stats.pop('started_at', None)
+        category_stats.pop('finished_at', None)
+
+    done = [s for s in stats.values() if s['status'] == 'done']
+    if checkpoint and len(done) == len(stats):
+        checkpoint.complete()
+    return {
+        'categories': stats,
+        'elapsed_seconds': round(elapsed, 3),
+        'succeeded': len(done),
+        'failed': len(stats) - len(done),
+        'fetched': sum(s.get('fetched', 0) for s in done),
+        'upserted': sum(s.get('upserted', 0) for s in done),
+        'papers_per_second': round(sum(s.get('fetched', 0) for s in done) / elapsed, 2) if elapsed > 0 else None
+    }
+
+def print_report(report):
+    """
+    Print a per-category throughput table for a `run_sync` report.
+    """
+    print(f"{'category':<20} {'status':<8} {'fetched':>7} {'upserted':>8} {'deleted':>7} {'fetch s':>8} {'embed s':>8} {'upsert s':>8} {'wall s':>8} {'papers/s':>8}")
+    for category, s in report['categories'].items():
+        print(f"{category:<20} {s['status']:<8} {s.get('fetched', '-'):>7} {s.get('upserted', '-'):>8} {s.get('deleted', '-'):>7} "
+              f"{s.get('fetch_seconds', '-'):>8} {s.get('embed_seconds', '-'):>8} {s.get('upsert_seconds', '-'):>8} "
+              f"{s.get('wall_seconds', '-'):>8} {s.get('papers_per_second') or '-':>8}")
+    print(f"{report['succeeded']} categories synced, {report['failed']} failed, {report['fetched']} papers fetched, "
+          f"{report['upserted']} upserted in {report['elapsed_seconds']}s ({report['papers_per_second']} papers/s)")
+
+if __name__ == "__main__":
+    from curate_be.sync_papers.add_papers import arxiv_categories
+
+    report = run_sync(sys.argv[1:] or arxiv_categories, checkpoint_name="sync_worker")
+    print_report(report)
+
+    # python3 -m curate_be.sync_papers.sync_worker [category ...]
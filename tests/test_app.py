@@ -0,0 +1,42 @@
+import pytest
+
+import app as curate_app
+import curate_be.profiling as profiling
+from curate_be.arxiv_utils.tracing import get_metrics
+from curate_be.profiling import load_profile
+
+@pytest.fixture
+def client():
+    return curate_app.app.test_client()
+
+def failing_feed(subject_area, max_results=300):
+    raise RuntimeError("arXiv is down")
+
+def test_failed_requests_are_counted_as_errors(client, monkeypatch):
+    monkeypatch.setattr(curate_app, 'get_feed', failing_feed)
+    before = get_metrics()['spans'].get('http.get_arxiv_papers', {}).get('errors', 0)
+
+    # Durations and profiles are recorded when the response is closed
+    with client.get('/api/arxiv?subjectArea=cs.CL') as response:
+        assert response.status_code == 500
+
+    assert get_metrics()['spans']['http.get_arxiv_papers']['errors'] == before + 1
+
+def test_failed_requests_keep_their_profile_and_error(client, monkeypatch):
+    monkeypatch.setattr(curate_app, 'get_feed', failing_feed)
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', "secret")
+
+    with client.get('/api/arxiv?subjectArea=cs.CL', headers={'X-Profile-Token': "secret"}) as response:
+        pass
+
+    profile = load_profile(response.headers['X-Profile-Id'])
+    assert profile['status'] == 500
+    assert profile['error'] == "arXiv is down"
+
+def test_unknown_categories_are_rejected(client):
+    for path in ('/api/similar_papers?authorName=A&category=../../escaped', '/api/similar_papers/stream?authorName=A&category=cs.XX',
+                 '/api/arxiv?subjectArea=../../escaped', '/api/arxiv'):
+        with client.get(path) as response:
+            assert response.status_code == 400
+    with client.post('/api/similar_papers/jobs', json={'authorName': "A", 'category': None}) as response:
+        assert response.status_code == 400
@@ -0,0 +1,53 @@
+import time
+from types import SimpleNamespace
+
+import arxiv
+import pytest
+import requests
+
+import curate_be.arxiv_utils.arxiv_client as arxiv_client
+from curate_be.arxiv_utils.arxiv_client import ArxivClient
+from curate_be.arxiv_utils.rate_limit import RateLimiter
+from curate_be.arxiv_utils.tracing import get_metrics
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry><id>http://arxiv.org/abs/2401.00001v1</id><title>A paper</title></entry>
+</feed>"""
+
+def response(status_code, content=b"", headers=None):
+    return SimpleNamespace(status_code=status_code, content=content, headers=headers or {})
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(arxiv_client, 'arxiv_limiter', RateLimiter(0.05))
+    return ArxivClient(api_url="http://arxiv.test/api/query", num_retries=3, backoff_seconds=0, cache_seconds=0)
+
+def counter(name):
+    return get_metrics()['counters'].get(name, 0)
+
+def test_retries_are_rate_limited(client, monkeypatch):
+    outcomes = [response(503, headers={'Retry-After': '0'}), requests.exceptions.ConnectionError("reset"), response(200, FEED)]
+    sent = []
+    def get(url, headers=None, timeout=None):
+        sent.append(time.monotonic())
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(client._session, 'get', get)
+    retries = counter('arxiv.retries')
+
+    feed = client._parse_feed("http://arxiv.test/api/query?search_query=x")
+
+    assert len(feed.entries) == 1
+    assert counter('arxiv.retries') - retries == 2
+    # Every attempt, retries included, waits for the shared limiter
+    assert len(sent) == 3
+    assert all(later - earlier >= 0.045 for earlier, later in zip(sent, sent[1:]))
+
+def test_gives_up_after_the_last_retry(client, monkeypatch):
+    monkeypatch.setattr(client._session, 'get', lambda url, headers=None, timeout=None: response(503))
+
+    with pytest.raises(arxiv.HTTPError):
+        client._parse_feed("http://arxiv.test/api/query?search_query=y")
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import curate_be.arxiv_utils.author_profiles as author_profiles
+import curate_be.arxiv_utils.pull_latest as pull_latest
+from curate_be.arxiv_utils.author_profiles import get_author_papers, get_profile_embeddings
+
+def paper(paper_id, days_ago):
+    published = datetime(2024, 6, 1, tzinfo=timezone.utc) - timedelta(days=days_ago)
+    return {'id': paper_id, 'title': f"Paper {paper_id}", 'summary': "", 'authors': ["Jane Doe"],
+            'published': published, 'updated': published, 'pdf_url': f"http://arxiv.org/pdf/{paper_id}"}
+
+def test_refresh_replaces_older_versions(monkeypatch):
+    responses = [[paper("2401.00001v1", 10), paper("2401.00002v1", 5)],
+                 [paper("2401.00002v2", 5), paper("2401.00003v1", 1)]]
+    monkeypatch.setattr(author_profiles, 'query_author_papers', lambda author_name, updated_after=None: responses.pop(0))
+
+    assert [p['id'] for p in get_author_papers("Jane Doe")] == ["2401.00002v1", "2401.00001v1"]
+
+    monkeypatch.setattr(author_profiles, 'AUTHOR_PROFILE_TTL_HOURS', 0)
+    assert [p['id'] for p in get_author_papers("Jane Doe")] == ["2401.00003v1", "2401.00002v2", "2401.00001v1"]
+
+def test_refresh_asks_for_papers_updated_since_the_last_update(monkeypatch):
+    revised = dict(paper("2401.00011v2", 30), updated=datetime(2024, 6, 1, tzinfo=timezone.utc))
+    queries = []
+    def query(author_name, updated_after=None):
+        queries.append(updated_after)
+        return [paper("2401.00012v1", 10), paper("2401.00011v1", 30)] if updated_after is None else [revised]
+    monkeypatch.setattr(author_profiles, 'query_author_papers', query)
+
+    get_author_papers("John Roe")
+    monkeypatch.setattr(author_profiles, 'AUTHOR_PROFILE_TTL_HOURS', 0)
+    # A revision of an older paper is picked up, although it was first submitted long ago
+    assert [p['id'] for p in get_author_papers("John Roe")] == ["2401.00012v1", "2401.00011v2"]
+    assert get_author_papers("John Roe")
+    assert queries == [None, paper("2401.00012v1", 10)['updated'], revised['updated']]
+
+def test_profile_embeddings_are_stored(monkeypatch):
+    embedded = []
+    def fake_batch(texts):
+        embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+    monkeypatch.setattr(author_profiles, 'get_embeddings_batch', fake_batch)
+    first, second = paper("2401.00021v1", 3), dict(paper("2401.00022v1", 2), summary="An abstract")
+
+    titles, summaries = get_profile_embeddings("Ann Poe", [first])
+    assert titles.tolist() == [[len(first['title']), 1.0]] and summaries.tolist() == [[0.0, 1.0]]
+
+    titles, summaries = get_profile_embeddings("Ann Poe", [second, first])
+    # Only the paper that was never embedded for this author is sent
+    assert embedded == [first['title'], first['summary'], second['title'], second['summary']]
+    assert np.array_equal(titles, [[len(second['title']), 1.0], [len(first['title']), 1.0]])
+    assert np.array_equal(summaries, [[len(second['summary']), 1.0], [0.0, 1.0]])
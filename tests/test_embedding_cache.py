@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import curate_be.arxiv_utils.embedding_cache as embedding_cache
+import curate_be.arxiv_utils.pull_latest as pull_latest
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.embedding_cache import get_cached_embeddings, put_cached_embeddings
+from curate_be.arxiv_utils.pull_latest import get_embeddings_batch
+
+def test_round_trip_and_least_recently_used_eviction(monkeypatch):
+    monkeypatch.setattr(embedding_cache, 'EMBEDDING_CACHE_MAX_ENTRIES', 2)
+    put_cached_embeddings("lru-model", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert get_cached_embeddings("lru-model", ["a", "c"]) == {"a": [1.0, 2.0]}
+
+    # "a" was just read, so "b" is the least recently used
+    put_cached_embeddings("lru-model", ["c"], [[5.0, 6.0]])
+    assert get_cached_embeddings("lru-model", ["a", "b", "c"]).keys() == {"a", "c"}
+
+    # Entries are per model
+    assert get_cached_embeddings("other-model", ["a"]) == {}
+
+def test_only_uncached_texts_are_embedded_in_batches(monkeypatch):
+    requests = []
+    def create(input, model):
+        requests.append(list(input))
+        # Out of order, as the API allows; results are matched up by index
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(text)), float(i)]) for i, text in reversed(list(enumerate(input)))])
+    monkeypatch.setattr(get_openai_client().embeddings, 'create', create)
+    monkeypatch.setattr(pull_latest, 'EMBEDDING_BATCH_SIZE', 2)
+
+    first = get_embeddings_batch(["x", "yy", "zzz", "x"], model="batch-model")
+    assert requests == [["x", "yy"], ["zzz"]]
+    assert [vector[0] for vector in first] == [1.0, 2.0, 3.0, 1.0]
+
+    second = get_embeddings_batch(["zzz", "wwww", "x"], model="batch-model")
+    assert requests[2:] == [["wwww"]]
+    assert second[0] == first[2] and second[2] == first[0]
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import curate_be.arxiv_utils.feed_cache as feed_cache
+from curate_be.arxiv_utils.feed_cache import get_feed, next_announcement
+from curate_be.arxiv_utils.storage import data_path
+
+def eastern(*args):
+    return datetime(*args, tzinfo=feed_cache.ANNOUNCEMENT_TZ)
+
+def papers(category, n=2):
+    published = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [{'id': f"2407.{i:05d}v1", 'title': f"{category} {i}", 'summary': "", 'authors': [], 'published': published,
+             'updated': published, 'pdf_url': ""} for i in range(n)]
+
+def wait_for_refresh(key):
+    deadline = time.monotonic() + 5
+    while key in feed_cache._in_flight:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def expire(key):
+    feed_cache._entries[key]['fresh_until'] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+def test_next_announcement():
+    # Thursday evening's announcement is followed by Sunday's
+    assert next_announcement(eastern(2024, 3, 7, 20, 0)) == eastern(2024, 3, 10, 20, 0)
+    assert next_announcement(eastern(2024, 3, 7, 19, 59)) == eastern(2024, 3, 7, 20, 0)
+    # 20:00 local on both sides of the DST change (March 10, 2024)
+    assert next_announcement(eastern(2024, 3, 6, 12, 0)) == datetime(2024, 3, 7, 1, 0, tzinfo=timezone.utc)
+    assert next_announcement(eastern(2024, 3, 9, 12, 0)) == datetime(2024, 3, 11, 0, 0, tzinfo=timezone.utc)
+
+def test_entries_stay_fresh_until_after_the_next_announcement():
+    fetched_at = eastern(2024, 3, 5, 10, 0).astimezone(timezone.utc)
+    assert feed_cache._fresh_until(fetched_at) == eastern(2024, 3, 5, 20, 30)
+    # Friday's fetch would stay fresh until Sunday evening, but the TTL caps it
+    friday = eastern(2024, 3, 8, 10, 0).astimezone(timezone.utc)
+    assert feed_cache._fresh_until(friday) == friday + timedelta(hours=feed_cache.FEED_CACHE_MAX_TTL_HOURS)
+
+def test_fresh_entries_are_served_from_the_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', lambda category, max_results: calls.append(category) or papers(category))
+
+    assert get_feed("math.AC") == papers("math.AC")
+    assert get_feed("math.AC") == papers("math.AC")
+    # A new process reads the stored entry instead of fetching
+    feed_cache._entries.clear()
+    assert get_feed("math.AC") == papers("math.AC")
+    assert calls == ["math.AC"]
+
+def test_stale_entries_are_served_while_refreshing(monkeypatch):
+    key = ("math.AG", 300)
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', lambda category, max_results: papers(category, 2))
+    get_feed("math.AG")
+    expire(key)
+
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', lambda category, max_results: papers(category, 3))
+    assert len(get_feed("math.AG")) == 2
+    wait_for_refresh(key)
+    assert len(get_feed("math.AG")) == 3
+
+def test_failed_refreshes_are_logged(monkeypatch, caplog):
+    key = ("math.AP", 300)
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', lambda category, max_results: papers(category))
+    get_feed("math.AP")
+    expire(key)
+
+    def fail(category, max_results):
+        raise RuntimeError("arXiv is down")
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', fail)
+    with caplog.at_level(logging.ERROR, logger=feed_cache.__name__):
+        assert get_feed("math.AP") == papers("math.AP")
+        wait_for_refresh(key)
+
+    assert "arXiv is down" in caplog.text
+    assert get_feed("math.AP") == papers("math.AP")
+
+def test_concurrent_misses_share_one_fetch(monkeypatch):
+    calls, started, release = [], threading.Event(), threading.Event()
+    def slow_fetch(category, max_results):
+        calls.append(category)
+        started.set()
+        release.wait(5)
+        return papers(category)
+    monkeypatch.setattr(feed_cache, 'fetch_latest_papers', slow_fetch)
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(get_feed("math.AT")))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(get_feed("math.AT")))
+    second.start()
+    time.sleep(0.1)
+    release.set()
+    first.join()
+    second.join()
+
+    assert calls == ["math.AT"]
+    assert results == [papers("math.AT")] * 2
+
+def test_data_paths_stay_in_the_data_directory():
+    with pytest.raises(ValueError):
+        data_path("feeds", "../../escaped-300.json")
+    with pytest.raises(ValueError):
+        data_path("categories", "/tmp/escaped.json")
+    assert data_path("feeds", "cs.CL-300.json").endswith("cs.CL-300.json")
@@ -0,0 +1,36 @@
+import multiprocessing
+import os
+import time
+import uuid
+
+import curate_be.arxiv_utils.fulltext_cache as fulltext_cache
+from curate_be.arxiv_utils.tracing import get_metrics
+
+def fake_parse(pdf_bytes):
+    # Runs in the parse pool's worker processes, so it must be importable from this module
+    if pdf_bytes.startswith(b"hang:"):
+        with open(pdf_bytes[5:], 'w') as f:
+            f.write(str(os.getpid()))
+        time.sleep(600)
+    return pdf_bytes.decode()
+
+def test_hung_parse_times_out_and_its_worker_is_killed(monkeypatch, tmp_path):
+    hung_pid_path = tmp_path / "hung.pid"
+    papers = [{'id': f"{uuid.uuid4().hex[:8]}v1", 'pdf_url': body} for body in (f"hang:{hung_pid_path}", "one", "two")]
+    monkeypatch.setattr(fulltext_cache, 'download_pdf', lambda pdf_url, timeout=None: pdf_url.encode())
+    monkeypatch.setattr(fulltext_cache, 'parse_pdf', fake_parse)
+
+    started = time.monotonic()
+    texts = {paper['pdf_url']: text for paper, text in fulltext_cache.iter_full_texts(papers, timeout=5)}
+    assert texts == {f"hang:{hung_pid_path}": None, 'one': "one", 'two': "two"}
+    assert time.monotonic() - started < 10
+
+    # The pool the hung parse ran in was replaced and the hung worker killed
+    assert get_metrics()['counters']['fulltext.parse_pool_recycles'] == 1
+    hung_pid = int(hung_pid_path.read_text())
+    time.sleep(0.5)
+    assert hung_pid not in [process.pid for process in multiprocessing.active_children()]
+
+    # Later parses still work
+    paper = {'id': f"{uuid.uuid4().hex[:8]}v1", 'pdf_url': "three"}
+    assert list(fulltext_cache.iter_full_texts([paper], timeout=5)) == [(paper, "three")]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from curate_be.arxiv_utils.rank import fuse_scores
+
+def test_scores_are_normalized_over_candidates_and_weighted():
+    candidates = np.array([True, True, False, True])
+    top, combined, weighted = fuse_scores(
+        {'bm25': np.array([2.0, 4.0, 100.0, 0.0]), 'embedding': np.array([0.5, 0.0, 0.9, 1.0])},
+        {'bm25': 0.5, 'embedding': 1.0},
+        candidates,
+        top_k=2
+    )
+
+    # The non-candidate's large BM25 score does not set the scale
+    np.testing.assert_allclose(weighted['bm25'][[0, 1, 3]], [0.25, 0.5, 0.0])
+    np.testing.assert_allclose(combined[[0, 1, 3]], [0.75, 0.5, 1.0])
+    assert top.tolist() == [3, 0]
+
+def test_no_candidates_and_all_zero_scores():
+    top, combined, _ = fuse_scores({'bm25': np.array([1.0, 2.0])}, {'bm25': 1.0}, np.zeros(2, dtype=bool), top_k=5)
+    assert top.tolist() == []
+
+    top, combined, _ = fuse_scores({'bm25': np.zeros(3)}, {'bm25': 1.0}, np.ones(3, dtype=bool), top_k=5)
+    assert top.tolist() == [0, 1, 2] and not combined.any()
+
+def test_shortlist_fuses_lexical_and_dense_ranks(monkeypatch):
+    import curate_be.arxiv_utils.rank as rank
+    papers = [
+        {'id': "lexical", 'title': "graph kernels", 'summary': "sparse attention transformers for retrieval"},
+        {'id': "dense", 'title': "vision", 'summary': "images and pixels"},
+        {'id': "both", 'title': "attention", 'summary': "sparse attention transformers"},
+        {'id': "neither", 'title': "biology", 'summary': "cells and proteins"}
+    ] + [{'id': f"filler{n}", 'title': "biology", 'summary': "cells and proteins"} for n in range(6)]
+    vectors = {"sparse attention transformers": [1.0, 0.0], "graph kernels": [0.0, 1.0], "vision": [1.0, 0.0],
+               "attention": [0.9, 0.3], "biology": [-1.0, 0.0]}
+    monkeypatch.setattr(rank, 'get_embeddings_batch', lambda texts: [vectors[text] for text in texts])
+
+    shortlist, rest = rank.shortlist_candidates([{'title': "sparse attention transformers"}], papers, size=3)
+
+    # "both" is near the top of both rankings, so it beats papers that lead only one
+    assert shortlist[0]['id'] == "both"
+    assert {p['id'] for p in shortlist} == {"both", "lexical", "dense"}
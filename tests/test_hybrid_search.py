@@ -0,0 +1,102 @@
+import hashlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import curate_be.arxiv_utils.author_profiles as author_profiles
+import curate_be.arxiv_utils.pull_author_info as pull_author_info
+import curate_be.arxiv_utils.rank as rank
+import curate_be.sync_papers.add_and_delete as add_and_delete
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.paper_store import load_category_papers
+from curate_be.arxiv_utils.rank import aggregate_query_results, score_queries
+
+WORDS = "language model transformer attention retrieval graph neural quantum vision speech".split()
+
+def fake_create(input, model):
+    # Deterministic vectors per text, so repeated runs hit the embedding cache consistently
+    return SimpleNamespace(data=[
+        SimpleNamespace(index=i, embedding=np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).random(1536).tolist())
+        for i, text in enumerate(input)
+    ])
+
+def paper(i):
+    published = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    words = [WORDS[(i * 7 + j * 3) % len(WORDS)] for j in range(6)]
+    return {'id': f"2401.{i:05d}v1", 'title': " ".join(words), 'summary': " ".join(words * 5), 'authors': ["A B"],
+            'published': published, 'updated': published, 'pdf_url': f"http://arxiv.org/pdf/2401.{i:05d}v1"}
+
+@pytest.fixture
+def search(monkeypatch):
+    corpus = [paper(i) for i in range(40)]
+    monkeypatch.setattr(get_openai_client().embeddings, 'create', fake_create)
+    monkeypatch.setattr(pull_author_info, 'resolve_papers', lambda ids: [p for p in corpus if p['id'] in ids])
+    monkeypatch.setattr(pull_author_info, 'get_profile_keywords', lambda author_name, paper_ids: [])
+    monkeypatch.setattr(pull_author_info, 'load_synced_papers', lambda category: corpus)
+    return corpus
+
+def test_stream_yields_the_lexical_ranking_first(search, monkeypatch):
+    selected_ids = [p['id'] for p in search[:3]]
+    queries = [p['title'] for p in search[:3]]
+    events, embedded_after = [], []
+    get_embeddings_batch = rank.get_embeddings_batch
+    def record_embedding(texts):
+        embedded_after.append([event['type'] for event in events])
+        return get_embeddings_batch(texts)
+    monkeypatch.setattr(rank, 'get_embeddings_batch', record_embedding)
+    monkeypatch.setattr(author_profiles, 'get_embeddings_batch', record_embedding)
+
+    for event in pull_author_info.iter_hybrid_search_author_comparison(selected_ids, "A B", "test.stream"):
+        events.append(event)
+
+    # The queries are only embedded once the lexical ranking has been streamed
+    assert embedded_after == [['keywords', 'partial']]
+    assert [event['type'] for event in events] == ['keywords', 'partial', 'final']
+    assert events[1]['stage'] == 'lexical' and events[1]['papers']
+
+    expected = aggregate_query_results(search, score_queries("test.stream", queries, search, weight_bm25=0., weight_embedding=0.2, weight_tfidf=0.2, top_k=50))
+    assert [p['id'] for p in events[-1]['papers']] == [p['id'] for p in expected]
+
+def test_stream_reports_errors(search, monkeypatch):
+    def fail(category):
+        raise RuntimeError("index unavailable")
+    monkeypatch.setattr(pull_author_info, 'load_synced_papers', fail)
+
+    events = list(pull_author_info.iter_hybrid_search_author_comparison([search[0]['id']], "A B", "test.stream"))
+    assert events[-1] == {'type': 'error', 'error': "index unavailable"}
+
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        pull_author_info.hybrid_search_author_comparison([search[0]['id']], "A B", "test.stream")
+
+def test_keywords_are_only_cached_with_every_full_text(search, monkeypatch):
+    saved = []
+    monkeypatch.setattr(pull_author_info, 'get_profile_keywords', lambda author_name, paper_ids: None)
+    monkeypatch.setattr(pull_author_info, 'save_profile_keywords', lambda author_name, paper_ids, keywords: saved.append(paper_ids))
+    texts = {p['id']: p['summary'] for p in search}
+    monkeypatch.setattr(pull_author_info, 'iter_full_texts', lambda papers: iter([(p, texts[p['id']]) for p in papers]))
+
+    selected_ids = [p['id'] for p in search[:2]]
+    pull_author_info.hybrid_search_author_comparison(selected_ids, "A B", "test.stream")
+    assert saved == [selected_ids]
+
+    texts[search[1]['id']] = None
+    pull_author_info.hybrid_search_author_comparison(selected_ids, "A B", "test.stream")
+    assert saved == [selected_ids]
+
+def test_cold_start_only_syncs_arxiv_categories(monkeypatch):
+    synced = []
+    monkeypatch.setattr(pull_author_info, 'update_namespace', lambda index, category: synced.append(category))
+    monkeypatch.setattr(pull_author_info, 'get_index', lambda: None)
+
+    assert pull_author_info.queue_cold_start_sync("../../escaped") is None
+    pull_author_info.queue_cold_start_sync("cs.DL").result()
+    assert synced == ["cs.DL"]
+
+def test_empty_cold_start_writes_nothing(monkeypatch):
+    monkeypatch.setattr(add_and_delete, 'fetch_latest_papers', lambda category, max_results: [])
+    monkeypatch.setattr(add_and_delete, 'delete_all_records_from_namespace', lambda index, category: pytest.fail("namespace cleared"))
+
+    add_and_delete.update_namespace(None, "cs.GL")
+    assert load_category_papers("cs.GL") is None
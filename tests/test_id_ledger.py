@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from curate_be.arxiv_utils.id_ledger import delete_vectors, get_stored_ids, upsert_vectors
+from curate_be.arxiv_utils.vector_index import get_index
+
+def vector(id):
+    return {'id': id, 'values': [1.0] * 1536, 'metadata': {}}
+
+def test_sees_upserts_and_deletes_from_another_process():
+    index = get_index()
+    upsert_vectors(index, [vector('a'), vector('b')], namespace="ledger-test")
+    assert get_stored_ids(index, "ledger-test") == {'a', 'b'}
+
+    # A sync script in another process adds one vector and deletes another
+    subprocess.run([sys.executable, '-c', (
+        "from curate_be.arxiv_utils.id_ledger import delete_vectors, upsert_vectors\n"
+        "from curate_be.arxiv_utils.vector_index import get_index\n"
+        "upsert_vectors(get_index(), [{'id': 'c', 'values': [1.0] * 1536, 'metadata': {}}], namespace='ledger-test')\n"
+        "delete_vectors(get_index(), ['a'], namespace='ledger-test')\n"
+    )], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+    assert get_stored_ids(index, "ledger-test") == {'b', 'c'}
+
+    delete_vectors(index, ['b'], namespace="ledger-test")
+    assert get_stored_ids(index, "ledger-test") == {'c'}
@@ -0,0 +1,20 @@
+import random
+
+from curate_be.arxiv_utils.keyword_matcher import AUTOMATON_MIN_KEYWORDS, KeywordMatcher, get_matcher
+
+def test_automaton_counts_like_str_count():
+    rng = random.Random(0)
+    texts = ["".join(rng.choice("abc ") for _ in range(rng.randrange(0, 200))) for _ in range(50)]
+    texts += ["Attention Is All You Need", "aaaa", "abab aba", ""]
+    keywords = ["a", "aa", "aba", "ab", "b c", "ca", "AB", "aa", "", "attention", "need"]
+    keywords += ["".join(rng.choice("abc ") for _ in range(rng.randrange(1, 5))) for _ in range(30)]
+
+    with_count = KeywordMatcher(keywords, use_automaton=False).count_many(texts)
+    with_automaton = KeywordMatcher(keywords, use_automaton=True).count_many(texts)
+
+    assert with_automaton.tolist() == with_count.tolist()
+    assert with_count.tolist() == [sum(text.lower().count(keyword.lower()) for keyword in keywords) for text in texts]
+
+def test_small_keyword_sets_use_str_count():
+    assert not get_matcher(["graph", "neural"]).use_automaton
+    assert KeywordMatcher([f"keyword {i}" for i in range(AUTOMATON_MIN_KEYWORDS)]).use_automaton
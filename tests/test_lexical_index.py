@@ -0,0 +1,47 @@
+import glob
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import curate_be.arxiv_utils.lexical_index as lexical_index
+from curate_be.arxiv_utils.lexical_index import LexicalIndex, build_lexical_index, get_lexical_index
+
+def paper(n, summary):
+    return {'id': f"2406.{n:05d}v1", 'title': f"Title {n}", 'summary': summary}
+
+def test_empty_corpus_scores_nothing(monkeypatch):
+    monkeypatch.setattr(lexical_index, 'get_embeddings_batch', lambda texts: pytest.fail("nothing to embed"))
+    index = build_lexical_index("cs.OH", [])
+
+    assert index.bm25_scores_batch(["anything"]).shape == (1, 0)
+    assert index.tfidf_scores_batch(["anything"]).shape == (1, 0)
+    assert index.tfidf_scores("anything").shape == (0,)
+    # Summaries without a single word are no different
+    assert not LexicalIndex([paper(1, ""), paper(2, "a")]).tfidf_scores("a").any()
+
+def test_concurrent_builds_of_one_category(monkeypatch):
+    monkeypatch.setattr(lexical_index, 'get_embeddings_batch', lambda texts: [[1.0, float(len(text))] for text in texts])
+    corpora = [[paper(n, f"summary words {n} {m}") for n in range(20)] for m in range(4)]
+    errors = []
+
+    def build(papers):
+        try:
+            for _ in range(5):
+                build_lexical_index("cs.MS", papers)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build, args=(papers,)) for papers in corpora]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert glob.glob(os.path.join(os.path.dirname(lexical_index._index_path("cs.MS")), "*.tmp")) == []
+    # Whichever build landed last, the stored index is a complete one
+    lexical_index._indexes.pop("cs.MS")
+    stored = get_lexical_index("cs.MS", corpora[0])
+    assert np.asarray(stored.title_vectors).shape == (20, 2)
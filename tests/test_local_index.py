@@ -0,0 +1,67 @@
+import uuid
+import numpy as np
+
+from curate_be.arxiv_utils.local_index import LocalIndex
+
+def make_index(persist=True):
+    return LocalIndex(f"test-{uuid.uuid4().hex[:8]}", dimension=4, persist=persist)
+
+def test_upsert_and_query_by_cosine_similarity():
+    index = make_index()
+    index.upsert(vectors=[
+        {'id': 'a', 'values': [1, 0, 0, 0], 'metadata': {'title': 'A'}},
+        {'id': 'b', 'values': [0, 1, 0, 0], 'metadata': {'title': 'B'}},
+        ('c', [1, 1, 0, 0], {'title': 'C'})
+    ], namespace="cs.CL")
+
+    results = index.query(vector=[2, 0, 0, 0], top_k=2, include_metadata=True, namespace="cs.CL")
+    assert [match['id'] for match in results['matches']] == ['a', 'c']
+    assert results.matches[0].score == np.float32(1.0)
+    assert results['matches'][1]['metadata'] == {'title': 'C'}
+    assert index.query(vector=[1, 0, 0, 0], namespace="other")['matches'] == []
+
+def test_upsert_overwrites_existing_ids():
+    index = make_index()
+    index.upsert(vectors=[{'id': 'a', 'values': [1, 0, 0, 0], 'metadata': {'v': 1}}])
+    index.upsert(vectors=[{'id': 'a', 'values': [0, 0, 1, 0], 'metadata': {'v': 2}}])
+
+    fetched = index.fetch(ids=['a'])['vectors']['a']
+    assert fetched['values'] == [0, 0, 1, 0]
+    assert fetched['metadata'] == {'v': 2}
+    assert index.describe_index_stats()['total_vector_count'] == 1
+
+def test_duplicate_ids_in_one_batch_keep_the_last_copy():
+    index = make_index()
+    index.upsert(vectors=[
+        {'id': 'a', 'values': [1, 0, 0, 0], 'metadata': {'v': 1}},
+        {'id': 'b', 'values': [0, 1, 0, 0]},
+        {'id': 'a', 'values': [0, 0, 0, 1], 'metadata': {'v': 2}}
+    ])
+
+    assert list(index.list()) == [['a', 'b']]
+    fetched = index.fetch(ids=['a'])['vectors']['a']
+    assert fetched['values'] == [0, 0, 0, 1]
+    assert fetched['metadata'] == {'v': 2}
+
+def test_delete_removes_vectors():
+    index = make_index()
+    index.upsert(vectors=[(id, [i + 1, 1, 0, 0]) for i, id in enumerate(['a', 'b', 'c'])])
+    index.delete(ids=['b', 'missing'])
+
+    assert list(index.list()) == [['a', 'c']]
+    assert {match['id'] for match in index.query(vector=[0, 1, 0, 0], top_k=10)['matches']} == {'a', 'c'}
+
+    index.delete(delete_all=True)
+    assert list(index.list()) == []
+
+def test_sees_writes_from_another_instance():
+    # Two instances stand in for the web process and a sync script sharing the data directory
+    web = make_index()
+    sync = LocalIndex(web.name, dimension=4)
+    assert web.query(vector=[1, 0, 0, 0], namespace="cs.CL")['matches'] == []
+
+    sync.upsert(vectors=[{'id': 'a', 'values': [1, 0, 0, 0]}], namespace="cs.CL")
+    assert [match['id'] for match in web.query(vector=[1, 0, 0, 0], namespace="cs.CL")['matches']] == ['a']
+
+    sync.delete(ids=['a'], namespace="cs.CL")
+    assert web.query(vector=[1, 0, 0, 0], namespace="cs.CL")['matches'] == []
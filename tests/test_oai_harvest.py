@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+import curate_be.sync_papers.oai_harvest as oai_harvest
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.paper_store import load_category_papers, save_category_papers
+from curate_be.sync_papers.add_and_delete import plan_sync
+
+RECORD = """<record><header><identifier>oai:arXiv.org:{id}</identifier><datestamp>{datestamp}</datestamp></header>
+<metadata><arXivRaw xmlns="http://arxiv.org/OAI/arXivRaw/"><id>{id}</id><title>{title}</title>
+<authors>A. Smith and B. Jones</authors><categories>{categories}</categories><abstract>About {title}.</abstract>
+{versions}</arXivRaw></metadata></record>"""
+VERSION = '<version version="v{n}"><date>{date}</date></version>'
+
+def record(paper_id, title, dates, categories="cs.CL", datestamp="2024-02-01"):
+    versions = "".join(VERSION.format(n=n, date=date) for n, date in enumerate(dates, start=1))
+    return RECORD.format(id=paper_id, title=title, categories=categories, versions=versions, datestamp=datestamp)
+
+# Two pages joined by a resumption token; 2401.00001 is a newer version of a stored paper
+PAGES = {
+    None: [record("2401.00001", "Revised", ["Mon, 1 Jan 2024 10:00:00 GMT", "Thu, 1 Feb 2024 10:00:00 GMT"]),
+           record("2401.00002", "Physics only", ["Tue, 2 Jan 2024 10:00:00 GMT"], categories="physics.optics")],
+    "page2": [record("2401.00003", "Harvested", ["Wed, 3 Jan 2024 10:00:00 GMT"], datestamp="2024-02-02")]
+}
+
+def listing(token):
+    resumption = '<resumptionToken>page2</resumptionToken>' if token is None else '<resumptionToken/>'
+    return (f'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords>{"".join(PAGES[token])}'
+            f'{resumption}</ListRecords></OAI-PMH>').encode()
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        token = parse_qs(urlparse(self.path).query).get('resumptionToken', [None])[0]
+        body = listing(token)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def oai_endpoint(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(oai_harvest, 'OAI_BASE_URL', f"http://127.0.0.1:{server.server_port}/oai")
+    yield
+    server.shutdown()
+    server.server_close()
+
+def fake_create(input, model):
+    return SimpleNamespace(data=[
+        SimpleNamespace(index=i, embedding=np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).random(1536).tolist())
+        for i, text in enumerate(input)
+    ])
+
+def paper(paper_id, published, updated):
+    return {'id': paper_id, 'title': f"Paper {paper_id}", 'summary': "", 'authors': [], 'published': published,
+            'updated': updated, 'pdf_url': f"http://arxiv.org/pdf/{paper_id}"}
+
+def test_backfill_merges_and_survives_retention(oai_endpoint, monkeypatch):
+    monkeypatch.setattr(get_openai_client().embeddings, 'create', fake_create)
+    # Stored papers may lack 'updated' entirely
+    jan = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    stored_paper = paper("2401.00001v1", jan, None)
+    del stored_paper['updated']
+    save_category_papers("cs.CL", [stored_paper, paper("2402.00001v1", datetime(2024, 2, 10, tzinfo=timezone.utc), None)])
+
+    assert oai_harvest.backfill_category("cs.CL") == 2
+
+    corpus = {p['id']: p for p in load_category_papers("cs.CL")}
+    assert corpus.keys() == {"2401.00001v2", "2401.00003v1", "2402.00001v1"}
+    assert corpus["2401.00001v2"]['title'] == "Revised" and corpus["2401.00001v2"]['backfilled']
+
+    # A sync keeping only the newest paper prunes its own window, never the backfill
+    fetched = [paper("2403.00001v1", datetime(2024, 3, 1, tzinfo=timezone.utc), None)]
+    _, ids_to_delete, kept = plan_sync(load_category_papers("cs.CL"), fetched, retention_size=1, retention_days=None)
+    assert [p['id'] for p in kept] == ["2403.00001v1", "2401.00003v1", "2401.00001v2"]
+    assert ids_to_delete == ["2402.00001v1"]
+
+def test_backfill_skips_undated_records_and_deletes_older_versions(oai_endpoint, monkeypatch):
+    monkeypatch.setattr(get_openai_client().embeddings, 'create', fake_create)
+    monkeypatch.setitem(PAGES, None, [
+        record("2404.00001", "Older", ["Mon, 1 Apr 2024 10:00:00 GMT", "Tue, 2 Apr 2024 10:00:00 GMT"], categories="cs.IR"),
+        record("2404.00002", "Undated", [], categories="cs.IR")
+    ])
+    monkeypatch.setitem(PAGES, "page2", [record("2404.00003", "Harvested", ["Wed, 3 Apr 2024 10:00:00 GMT"], categories="cs.IR")])
+    deleted = []
+    delete_vectors = oai_harvest.delete_vectors
+    monkeypatch.setattr(oai_harvest, 'delete_vectors', lambda index, ids, namespace: deleted.extend(ids) or delete_vectors(index, ids, namespace=namespace))
+    # The stored version is newer than the one the harvest returns
+    april = datetime(2024, 4, 1, 10, tzinfo=timezone.utc)
+    save_category_papers("cs.IR", [paper("2404.00001v3", april, datetime(2024, 5, 1, tzinfo=timezone.utc))])
+
+    assert oai_harvest.backfill_category("cs.IR") == 2
+
+    assert [p['id'] for p in load_category_papers("cs.IR")] == ["2404.00003v1", "2404.00001v3"]
+    assert deleted == ["2404.00001v2"]
@@ -0,0 +1,52 @@
+import os
+from datetime import datetime, timezone
+
+import curate_be.arxiv_utils.paper_store as paper_store
+from curate_be.arxiv_utils.paper_store import lookup_papers, remember_papers
+from curate_be.arxiv_utils.storage import read_json, write_json
+
+def paper(paper_id, title="A paper"):
+    published = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {'id': paper_id, 'title': title, 'summary': "", 'authors': [], 'published': published,
+            'updated': published, 'pdf_url': f"http://arxiv.org/pdf/{paper_id}"}
+
+def test_unversioned_alias_moves_to_newer_versions():
+    remember_papers([paper("2401.00001v1", "First")], aliases={"2401.00001": "2401.00001v1"})
+    assert lookup_papers(["2401.00001"])["2401.00001"]['title'] == "First"
+
+    remember_papers([paper("2401.00001v2", "Revised")])
+    assert lookup_papers(["2401.00001"])["2401.00001"]['title'] == "Revised"
+    assert lookup_papers(["2401.00001v1"])["2401.00001v1"]['title'] == "First"
+
+    # An older version arriving later does not move the alias back
+    remember_papers([paper("2401.00001v1", "First")])
+    assert lookup_papers(["2401.00001"])["2401.00001"]['title'] == "Revised"
+
+def test_unversioned_alias_expires(monkeypatch):
+    remember_papers([paper("2401.00002v1")], aliases={"2401.00002": "2401.00002v1"})
+    assert "2401.00002" in lookup_papers(["2401.00002"])
+
+    monkeypatch.setattr(paper_store, 'PAPER_ALIAS_TTL_HOURS', 0)
+    assert lookup_papers(["2401.00002", "2401.00002v1"]).keys() == {"2401.00002v1"}
+
+def test_versioned_ids_resolve_to_their_own_version(monkeypatch):
+    stored = {p['id']: p for p in [paper("2405.00003v1", "Original"), paper("2405.00003v2", "Revised")]}
+    # arXiv answers each requested version with that version
+    monkeypatch.setattr(paper_store, 'search_results', lambda search: [stored[paper_id] for paper_id in search.id_list])
+    monkeypatch.setattr(paper_store, 'paper_from_result', lambda result: result)
+
+    resolved = paper_store.resolve_papers(["2405.00003v1", "2405.00003v2"])
+    assert [p['title'] for p in resolved] == ["Original", "Revised"]
+
+def test_category_rewrites_within_one_mtime_tick_are_seen():
+    paper_store.save_category_papers("cs.DL", [paper("2401.00004v1", "First")])
+    assert [p['title'] for p in paper_store.load_category_papers("cs.DL")] == ["First"]
+    path = paper_store._category_path("cs.DL")
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    # Another process rewrites the file; the new file gets the same mtime
+    record = read_json(path)
+    record['papers'][0]['title'] = "Other"
+    write_json(path, record)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    assert [p['title'] for p in paper_store.load_category_papers("cs.DL")] == ["Other"]
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+from curate_be.sync_papers.add_and_delete import plan_sync
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+def paper(paper_id, days_ago, updated_days_ago=None):
+    published = NOW - timedelta(days=days_ago)
+    updated = NOW - timedelta(days=updated_days_ago if updated_days_ago is not None else days_ago)
+    return {'id': paper_id, 'title': paper_id, 'published': published, 'updated': updated}
+
+def ids(papers):
+    return [p['id'] for p in papers]
+
+def test_only_new_and_revised_papers_are_upserted():
+    stored = [paper("2405.00001v1", 3), paper("2405.00002v1", 2), paper("2405.00003v1", 1)]
+    fetched = [
+        paper("2405.00001v1", 3),                     # unchanged
+        paper("2405.00002v2", 2),                     # new version
+        paper("2405.00003v1", 1, updated_days_ago=0), # same version, newer metadata
+        paper("2405.00004v1", 0)                      # new
+    ]
+
+    to_upsert, to_delete, kept = plan_sync(stored, fetched, retention_size=10, now=NOW)
+
+    assert sorted(ids(to_upsert)) == ["2405.00002v2", "2405.00003v1", "2405.00004v1"]
+    assert to_delete == ["2405.00002v1"]
+    assert ids(kept) == ["2405.00004v1", "2405.00003v1", "2405.00002v2", "2405.00001v1"]
+
+def test_retention_evicts_the_oldest_papers():
+    stored = [paper("2405.00001v1", 30), paper("2405.00002v1", 5)]
+    fetched = [paper("2405.00003v1", 1), paper("2405.00004v1", 0)]
+
+    to_upsert, to_delete, kept = plan_sync(stored, fetched, retention_size=3, now=NOW)
+    assert ids(kept) == ["2405.00004v1", "2405.00003v1", "2405.00002v1"]
+    assert to_delete == ["2405.00001v1"]
+
+    # A paper that would be evicted straight away is not upserted at all
+    to_upsert, to_delete, kept = plan_sync(stored, [paper("2405.00005v1", 60)], retention_size=2, now=NOW)
+    assert ids(to_upsert) == [] and to_delete == []
+
+    _, to_delete, kept = plan_sync(stored, fetched, retention_size=10, retention_days=7, now=NOW)
+    assert ids(kept) == ["2405.00004v1", "2405.00003v1", "2405.00002v1"]
+    assert to_delete == ["2405.00001v1"]
@@ -0,0 +1,76 @@
+import os
+import time
+
+import curate_be.arxiv_utils.rank as rank
+from curate_be.arxiv_utils.rank import _estimate_tokens, _paper_block, chunk_candidates, merge_chunk_rankings, rank_papers
+
+def paper(n, summary="An abstract."):
+    return {'id': f"2401.{n:05d}v1", 'title': f"Paper {n}", 'summary': summary}
+
+def test_chunks_are_dealt_round_robin_within_budget():
+    papers = [paper(n, "word " * 200) for n in range(10)]
+    budget = 3 * _estimate_tokens(_paper_block(papers[0]))
+
+    chunks = chunk_candidates(papers, token_budget=budget)
+
+    assert len(chunks) == 4
+    assert [p['id'] for p in chunks[0]] == [papers[0]['id'], papers[4]['id'], papers[8]['id']]
+    assert sorted(p['id'] for chunk in chunks for p in chunk) == sorted(p['id'] for p in papers)
+    assert all(sum(_estimate_tokens(_paper_block(p)) for p in chunk) <= budget for chunk in chunks)
+    assert chunk_candidates(papers[:2], token_budget=10 ** 6) == [papers[:2]]
+
+def test_merge_combines_llm_and_shortlist_order():
+    shortlist = [paper(n) for n in range(4)]
+    chunks = [shortlist[0::2], shortlist[1::2]]
+
+    # Paper 3 leads its chunk, which lifts it above papers the shortlist put ahead of it
+    merged = merge_chunk_rankings(shortlist, chunks, [[shortlist[0]['id'], shortlist[2]['id']], [shortlist[3]['id']]])
+    assert merged == [shortlist[n]['id'] for n in (0, 3, 2, 1)]
+
+    # A failed chunk keeps its shortlist order
+    assert merge_chunk_rankings(shortlist, chunks, [None, None]) == [p['id'] for p in shortlist]
+
+def test_failed_chunks_fall_back_and_are_not_cached(monkeypatch):
+    shortlist = [paper(n) for n in range(6)]
+    monkeypatch.setattr(rank, 'resolve_papers', lambda ids: [paper(100)])
+    monkeypatch.setattr(rank, 'shortlist_candidates', lambda author_papers, papers: (papers, []))
+    monkeypatch.setattr(rank, 'chunk_candidates', lambda papers: [papers[0::2], papers[1::2]])
+    calls = []
+    def rank_chunk(author_str, papers):
+        calls.append(papers[0]['id'])
+        if papers[0]['id'] == shortlist[1]['id']:
+            raise ValueError("invalid JSON")
+        return [p['id'] for p in reversed(papers)]
+    monkeypatch.setattr(rank, '_rank_chunk', rank_chunk)
+
+    ranking = rank_papers(["2401.00100v1"], shortlist)
+    assert sorted(ranking) == sorted(p['id'] for p in shortlist)
+    assert ranking.index(shortlist[1]['id']) < ranking.index(shortlist[3]['id']) < ranking.index(shortlist[5]['id'])
+
+    # Nothing was cached, so the LLM is asked again
+    rank_papers(["2401.00100v1"], shortlist)
+    assert len(calls) == 4
+
+def test_rerank_cache_expires(monkeypatch):
+    shortlist = [paper(n) for n in range(200, 203)]
+    monkeypatch.setattr(rank, 'resolve_papers', lambda ids: [paper(100)])
+    monkeypatch.setattr(rank, 'shortlist_candidates', lambda author_papers, papers: (papers, []))
+    calls = []
+    monkeypatch.setattr(rank, '_rank_chunk', lambda author_str, papers: calls.append(1) or [p['id'] for p in papers])
+
+    rank_papers(["2401.00100v1"], shortlist)
+    rank_papers(["2401.00100v1"], shortlist)
+    assert len(calls) == 1
+
+    cache_path = rank._rerank_cache_path(["2401.00100v1"], shortlist)
+    expired = time.time() - rank.RERANK_CACHE_TTL_HOURS * 3600 - 60
+    os.utime(cache_path, (expired, expired))
+    rank_papers(["2401.00100v1"], shortlist)
+    assert len(calls) == 2
+
+    # Writing a new ranking removes expired ones
+    stale_path = os.path.join(os.path.dirname(cache_path), "stale.json")
+    open(stale_path, 'w').write("[]")
+    os.utime(stale_path, (expired, expired))
+    rank_papers(["2401.00100v1"], shortlist[:2])
+    assert not os.path.exists(stale_path)
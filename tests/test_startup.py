@@ -0,0 +1,5 @@
+from curate_be.benchmarks.run import measure_startup
+
+def test_app_import_defers_heavy_modules():
+    # A fresh interpreter without credentials, as a gunicorn worker boots
+    assert measure_startup(1)['deferred_modules_loaded'] == []
@@ -0,0 +1,67 @@
+import hashlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+import curate_be.sync_papers.checkpoint as checkpoint
+import curate_be.sync_papers.sync_worker as sync_worker
+from curate_be.arxiv_utils.clients import get_openai_client
+from curate_be.arxiv_utils.id_ledger import get_stored_ids
+from curate_be.arxiv_utils.vector_index import get_index
+from curate_be.sync_papers.sync_worker import run_sync
+
+def papers(category, n):
+    now = datetime.now(timezone.utc)
+    return [{'id': f"2408.{i:05d}v1", 'title': f"{category} paper {i}", 'summary': "", 'authors': ["A B"],
+             'published': now - timedelta(hours=i), 'updated': now - timedelta(hours=i),
+             'pdf_url': f"http://arxiv.org/pdf/2408.{i:05d}v1"} for i in range(n)]
+
+def test_failed_run_resumes_without_fetching_or_embedding_again(monkeypatch):
+    monkeypatch.setattr(checkpoint, 'SYNC_BATCH_SIZE', 2)
+    fetches = Counter()
+    def fake_fetch(category, max_results):
+        fetches[category] += 1
+        return papers(category, 5)
+    monkeypatch.setattr(sync_worker, 'fetch_latest_papers', fake_fetch)
+
+    embedded = []
+    def fake_create(input, model):
+        embedded.append(list(input))
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).random(1536).tolist())
+            for i, text in enumerate(input)
+        ])
+    monkeypatch.setattr(get_openai_client().embeddings, 'create', fake_create)
+
+    # The vector index goes down after cs.SD's first batch of two papers is upserted
+    upserts, outage = [], [True]
+    upsert_vectors = sync_worker.upsert_vectors
+    def flaky_upsert(index, vectors, namespace):
+        if namespace == "cs.SD" and upserts and outage:
+            outage.pop()
+            raise RuntimeError("index unavailable")
+        upserts.append((namespace, [vector['id'] for vector in vectors]))
+        return upsert_vectors(index, vectors, namespace=namespace)
+    monkeypatch.setattr(sync_worker, 'upsert_vectors', flaky_upsert)
+
+    report = run_sync(["cs.SD"], checkpoint_name="test.resume", fetch_workers=1, embed_workers=1, upsert_workers=1)
+    assert report['failed'] == 1
+    assert fetches == {"cs.SD": 1}
+    assert sum(len(batch) for batch in embedded) == 5
+    assert get_stored_ids(get_index(), namespace="cs.SD") == {"2408.00000v1", "2408.00001v1"}
+
+    upserts.clear()
+    report = run_sync(["cs.SD", "eess.AS"], checkpoint_name="test.resume", fetch_workers=1, embed_workers=1, upsert_workers=1)
+    assert report['failed'] == 0
+    assert report['categories']["cs.SD"]['resumed']
+    # cs.SD continues from its second batch, with its fetched plan and cached embeddings
+    assert fetches == {"cs.SD": 1, "eess.AS": 1}
+    assert sum(len(batch) for batch in embedded) == 10
+    assert [ids for namespace, ids in upserts if namespace == "cs.SD"] == [["2408.00002v1", "2408.00003v1"], ["2408.00004v1"]]
+    assert get_stored_ids(get_index(), namespace="cs.SD") == {f"2408.{i:05d}v1" for i in range(5)}
+
+    # The finished run's checkpoint is gone, so the next run starts over
+    run_sync(["cs.SD"], checkpoint_name="test.resume", fetch_workers=1, embed_workers=1, upsert_workers=1)
+    assert fetches["cs.SD"] == 2